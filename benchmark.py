@@ -0,0 +1,261 @@
+"""pyearth 性能基准测试
+
+不需要显示器：VTK使用离屏渲染，Qt使用offscreen平台。测量解析、场景构建和每帧更新的耗时，
+结果写入JSON文件，并可与保存的基准结果比较，超过阈值的项目视为性能回退（退出码为1）。
+
+用法:
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench_baseline.json --threshold 0.2
+    python benchmark.py --output bench_baseline.json     # 生成新的基准结果
+"""
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import datetime
+import tempfile
+import contextlib
+
+# 必须在导入Qt和pyearth之前设置
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pyvista as pv
+
+pv.OFF_SCREEN = True
+
+import pyearth
+
+def measure(function, repeat, setup=None, warmup=1):
+    """调用function共repeat次，返回耗时统计（毫秒）
+    
+    setup在每次调用前执行且不计时；先预热warmup次（不计入统计），排除首次生成缓存等一次性开销。
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            elapsed = (time.perf_counter() - start) * 1000
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+def summarize(samples):
+    """耗时样本（毫秒）的统计"""
+    samples = np.asarray(samples, dtype=float)
+    return {
+        'median_ms': float(np.median(samples)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'min_ms': float(samples.min()),
+        'max_ms': float(samples.max()),
+        'n': int(len(samples)),
+    }
+
+def write_synthetic_star_file(path, n_stars, seed=0):
+    """生成与stars.txt相同格式、包含n_stars颗恒星的合成数据文件"""
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, n_stars)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n_stars)))
+    magnitude = rng.uniform(-1, 9, n_stars)
+    stars_per_constellation = 1000
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_stars):
+            if i % stars_per_constellation == 0:
+                f.write(f"合成{i // stars_per_constellation}主要恒星坐标:\n")
+            ra_h, ra_m = divmod(ra[i] / 15 * 60, 60)
+            dec_d, dec_m = divmod(abs(dec[i]) * 60, 60)
+            sign = '-' if dec[i] < 0 else '+'
+            f.write(f"S{i} Star{i} (星{i}): 视星等 {magnitude[i]:.2f}, "
+                    f"赤经 {int(ra_h)}h {int(ra_m)}m ({ra[i]:.4f}°), "
+                    f"赤纬 {sign}{int(dec_d)}° {int(dec_m)}' ({dec[i]:.4f}°), 光谱型 A0V\n")
+
+def remove_star_cache(path):
+    """删除恒星数据的解析缓存，使下一次读取重新解析文件"""
+    try:
+        os.remove(path + '.cache.npz')
+    except OSError:
+        pass
+
+def offscreen_scene(window_size):
+    """创建尚未构建任何对象的离屏场景"""
+    scene = pyearth.SkyScene()
+    scene.init_sky_scene(pv.Plotter(off_screen=True, window_size=list(window_size)))
+    return scene
+
+def bench_parsing(results, repeat, n_synthetic, work_dir):
+    """解析stars.txt和合成的大型恒星文件"""
+    scene = pyearth.SkyScene()
+
+    synthetic_path = os.path.join(work_dir, f'stars_{n_synthetic}.txt')
+    write_synthetic_star_file(synthetic_path, n_synthetic)
+
+    for label, path, count in (('small', 'stars.txt', repeat), (f'{n_synthetic // 1000}k', synthetic_path, max(3, repeat // 5))):
+        results[f'parse/read_constellations_{label}_cold'] = measure(
+            lambda: scene.read_constellations(path), count, setup=lambda: remove_star_cache(path))
+        # 第一次读取生成缓存，之后命中缓存
+        scene.read_constellations(path)
+        results[f'parse/read_constellations_{label}_cached'] = measure(
+            lambda: scene.read_constellations(path), count)
+    remove_star_cache(synthetic_path)
+
+def bench_scene_build(results, repeat, window_size):
+    """构建天球网格、主要恒星和完整场景"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ephemeris_scene = offscreen_scene(window_size)
+        ephemeris_scene.load_ephemeris()
+    planets, earth = ephemeris_scene.planets, ephemeris_scene.earth
+
+    scenes = []
+    def new_scene():
+        scene = offscreen_scene(window_size)
+        scene.planets, scene.earth = planets, earth
+        scenes.append(scene)
+
+    results['build/add_sky_grid'] = measure(lambda: scenes[-1].add_sky_grid(), repeat, setup=new_scene)
+    results['build/add_main_stars'] = measure(lambda: scenes[-1].add_main_stars(), repeat, setup=new_scene)
+    results['build/initialize_scene'] = measure(lambda: scenes[-1].initialize_scene(), max(3, repeat // 5), setup=new_scene)
+    for scene in scenes:
+        scene.plotter_widget.close()
+
+def bench_frames(results, frames, window_size, step_mapping):
+    """每个滑块步长下的地球自转、日月行星更新的每帧耗时"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        scene = offscreen_scene(window_size)
+        scene.initialize_scene()
+    start_time = scene.simulation_time
+
+    for slider_value, step_seconds in sorted(step_mapping.items()):
+        if step_seconds == 0:
+            continue
+        for name in ('update_earth_rotation', 'update_solar_system'):
+            scene.simulation_time = start_time
+            scene.simulation_step = step_seconds
+            update = getattr(scene, name)
+            def advance():
+                scene.simulation_time += datetime.timedelta(seconds=step_seconds)
+            results[f'frame/{name}/step_{step_seconds:+d}s'] = measure(update, frames, setup=advance)
+    scene.plotter_widget.close()
+
+def bench_simulation_step(results, frames, timeout=120):
+    """在offscreen Qt平台上运行主窗口，测量每个滑块步长下simulation_step_callback的耗时"""
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        window = pyearth.SatelliteOrbitApp()
+        window.show()
+        # 等待分阶段加载完成
+        deadline = time.perf_counter() + timeout
+        while window.ephemeris_prefetcher is None and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.001)
+    if window.ephemeris_prefetcher is None:
+        print("主窗口加载超时，跳过simulation_step_callback基准")
+        window.close()
+        return
+
+    clock = window.simulation_clock
+    for slider_value, step_seconds in sorted(window.step_mapping.items()):
+        if step_seconds == 0:
+            continue
+        window.slider.setValue(slider_value)
+        window.simulation_running = True
+        clock.reset()
+        def one_tick():
+            # 让时钟恰好到期一个固定步
+            clock.last_time = time.perf_counter() - clock.tick_interval
+            clock.accumulator = 0.0
+            app.processEvents()
+        results[f'frame/simulation_step_callback/step_{step_seconds:+d}s'] = measure(
+            window.simulation_step_callback, frames, setup=one_tick)
+    window.simulation_running = False
+    window.close()
+
+def compare(results, baseline, threshold, min_delta_ms=0.05):
+    """与基准结果比较中位数，返回回退的项目列表
+    
+    中位数超过基准的比例大于threshold、且绝对差值大于min_delta_ms（排除亚毫秒项目的计时噪声）时视为回退。
+    """
+    regressions = []
+    print(f"\n{'项目':<56}{'基准(ms)':>12}{'本次(ms)':>12}{'变化':>9}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<56}{'-':>12}{result['median_ms']:12.3f}{'新增':>9}")
+            continue
+        ratio = result['median_ms'] / max(reference['median_ms'], 1e-6)
+        flag = ''
+        if ratio > 1 + threshold and result['median_ms'] - reference['median_ms'] > min_delta_ms:
+            regressions.append(name)
+            flag = '  回退'
+        print(f"{name:<56}{reference['median_ms']:12.3f}{result['median_ms']:12.3f}{(ratio - 1) * 100:8.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="pyearth 性能基准测试（离屏运行）")
+    parser.add_argument('--output', default='bench_results.json', help="结果JSON文件，默认bench_results.json")
+    parser.add_argument('--baseline', help="用于比较的基准结果JSON文件")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="中位数超过基准的比例阈值，默认0.2（即慢20%%视为回退）")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="视为回退的最小绝对差值（毫秒），默认0.05")
+    parser.add_argument('--repeat', type=int, default=20, help="解析和构建的重复次数，默认20")
+    parser.add_argument('--frames', type=int, default=200, help="每个步长测量的帧数，默认200")
+    parser.add_argument('--synthetic-stars', type=int, default=100000, help="合成恒星文件的恒星数，默认100000")
+    parser.add_argument('--size', default='1280x720', help="渲染窗口尺寸，默认1280x720")
+    parser.add_argument('--skip-qt', action='store_true', help="不运行需要Qt主窗口的基准")
+    args = parser.parse_args()
+
+    # 与pyearth.py相同，从项目目录读取stars.txt、de421.bsp和纹理
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    window_size = tuple(int(v) for v in args.size.lower().split('x'))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        print("解析基准...")
+        bench_parsing(results, args.repeat, args.synthetic_stars, work_dir)
+    print("场景构建基准...")
+    bench_scene_build(results, args.repeat, window_size)
+    print("每帧更新基准...")
+    bench_frames(results, args.frames, window_size, pyearth.SIMULATION_STEP_MAPPING)
+    if not args.skip_qt:
+        print("主窗口仿真回调基准...")
+        bench_simulation_step(results, args.frames)
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pyvista': pv.__version__,
+            'vtk': '.'.join(str(v) for v in pv.vtk_version_info),
+            'window_size': list(window_size),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} 个项目超过阈值 {args.threshold:.0%}:")
+            for name in regressions:
+                print(f"  {name}")
+            return 1
+        print(f"\n没有超过阈值 {args.threshold:.0%} 的回退")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,3235 @@
 import sys
-import numpy as np
-import pyvista as pv
-from pyvista import examples
+import time
+import contextlib
+
+class StartupProfiler:
+    """启动耗时统计：记录每个模块导入和加载阶段的耗时（毫秒）以及首帧时间"""
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        # (阶段名称, 开始时刻ms, 耗时ms)
+        self.stages = []
+        self.first_frame_ms = None
+    
+    def elapsed_ms(self):
+        """从模块开始导入到现在的毫秒数"""
+        return (time.perf_counter() - self.start_time) * 1000
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """统计一个阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.stages.append((name, (start - self.start_time) * 1000, (end - start) * 1000))
+    
+    def mark_first_frame(self):
+        """记录首帧渲染完成的时间"""
+        if self.first_frame_ms is None:
+            self.first_frame_ms = self.elapsed_ms()
+    
+    def report(self):
+        """返回启动耗时报告"""
+        lines = ["启动耗时报告:"]
+        for name, start_ms, duration_ms in self.stages:
+            lines.append(f"  {name:<30} 开始 {start_ms:8.1f} ms  耗时 {duration_ms:8.1f} ms")
+        if self.first_frame_ms is not None:
+            lines.append(f"  首帧时间: {self.first_frame_ms:.1f} ms")
+        lines.append(f"  总计: {self.elapsed_ms():.1f} ms")
+        return "\n".join(lines)
+
+# 从模块开始导入时计时
+startup_profiler = StartupProfiler()
+
 import datetime
 import re
 import os
-from skyfield.api import load, wgs84, utc
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QLabel, QSplitter
-from PyQt5.QtCore import Qt
-from pyvistaqt import QtInteractor
+import csv
+import json
+import hashlib
+import multiprocessing
+from collections import deque
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+with startup_profiler.stage('import numpy'):
+    import numpy as np
+with startup_profiler.stage('import pyvista'):
+    import pyvista as pv
+with startup_profiler.stage('import skyfield'):
+    from skyfield.api import load, wgs84, utc
+    from sgp4.api import Satrec, SatrecArray, jday
+    from sgp4 import omm
+with startup_profiler.stage('import PyQt5'):
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QLabel, QSplitter, QSpinBox, QDateTimeEdit, QTableWidget, QTableWidgetItem, QFileDialog
+    from PyQt5.QtCore import Qt, QTimer, QDateTime
+with startup_profiler.stage('import pyvistaqt'):
+    from pyvistaqt import QtInteractor
+    from vtkmodules.vtkRenderingCore import vtkBillboardTextActor3D, vtkPolyDataMapper, vtkActor, vtkTexture
+    from vtkmodules.vtkRenderingOpenGL2 import vtkTextureObject
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+    from vtkmodules.vtkCommonCore import vtkStringArray
+    from vtkmodules.vtkCommonTransforms import vtkMatrixToLinearTransform
+    from vtkmodules.vtkFiltersGeneral import vtkTransformFilter
+
+def rotation_matrix_z(angle):
+    """绕z轴旋转angle弧度的4x4齐次变换矩阵"""
+    c = np.cos(angle)
+    s = np.sin(angle)
+    return np.array([
+        [c, -s, 0, 0],
+        [s, c, 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1]
+    ])
+
+def homogeneous_matrix(rotation):
+    """3x3旋转矩阵转换为4x4齐次变换矩阵"""
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation
+    return matrix
+
+def radec_to_xyz(ra_rad, dec_rad, radius=1.0):
+    """赤经赤纬（弧度）转换为天球上的三维坐标，支持可广播的数组输入"""
+    ra_rad, dec_rad = np.broadcast_arrays(ra_rad, dec_rad)
+    cos_dec = np.cos(dec_rad)
+    return np.stack([
+        radius * cos_dec * np.cos(ra_rad),
+        radius * cos_dec * np.sin(ra_rad),
+        radius * np.sin(dec_rad)
+    ], axis=-1)
+
+# 地球平均半径（公里）
+EARTH_RADIUS_KM = 6371
+
+# 地球网格的多级细节：(纬度方向点数, 经度方向点数)，从粗到细
+EARTH_LOD_RESOLUTIONS = ((25, 50), (50, 100), (100, 200), (200, 400), (400, 800))
+# 原来使用的50x100网格
+EARTH_LOD_DEFAULT = 1
+
+def sphere_tessellation_error(radius, lat_resolution, lon_resolution):
+    """经纬网格球面的最大几何误差：相邻网格点之间的弦到球面的最大距离"""
+    step = max(np.pi / (lat_resolution - 1), 2 * np.pi / lon_resolution)
+    return radius * (1 - np.cos(step / 2))
+
+def celestial_grid(radius, ra_step_deg=10, dec_step_deg=10, samples_per_degree=1):
+    """生成天球上的赤经赤纬网格线，返回只含一个连接数组的PolyData
+    
+    赤经线从南极画到北极，赤纬线绕天球一周（首尾点重合），不包含两极上的赤纬线。
+    """
+    n_meridian_points = int(180 * samples_per_degree) + 1
+    n_parallel_points = int(360 * samples_per_degree) + 1
+    
+    ra_lines = np.radians(np.arange(0, 360, ra_step_deg))
+    n_dec = int(np.floor((90 - 1e-9) / dec_step_deg))
+    dec_lines = np.radians(np.arange(-n_dec, n_dec + 1) * dec_step_deg)
+    
+    # 赤经线：(赤经线数, 每条线的点数)
+    meridian_dec = np.linspace(-np.pi / 2, np.pi / 2, n_meridian_points)
+    meridians = radec_to_xyz(ra_lines[:, None], meridian_dec[None, :], radius)
+    # 赤纬线：(赤纬线数, 每条线的点数)
+    parallel_ra = np.linspace(0, 2 * np.pi, n_parallel_points)
+    parallels = radec_to_xyz(parallel_ra[None, :], dec_lines[:, None], radius)
+    
+    points = np.concatenate([meridians.reshape(-1, 3), parallels.reshape(-1, 3)])
+    
+    # 每条折线的连接记录为 [点数, 点序号...]
+    def polylines(n_lines, n_points, first_point):
+        starts = first_point + np.arange(n_lines) * n_points
+        ids = starts[:, None] + np.arange(n_points)[None, :]
+        return np.hstack([np.full((n_lines, 1), n_points), ids]).ravel()
+    
+    lines = np.concatenate([
+        polylines(len(ra_lines), n_meridian_points, 0),
+        polylines(len(dec_lines), n_parallel_points, len(ra_lines) * n_meridian_points),
+    ])
+    return pv.PolyData(points, lines=lines)
+
+def celestial_grid_labels(radius, step_deg):
+    """网格刻度标签的位置和文本
+    
+    赤经刻度沿天赤道标注；赤纬刻度沿0h、6h、12h、18h四条赤经线标注，保证任意方向都能看到。
+    刻度间隔不小于15°（即1h），更细的网格只加密网格线。
+    """
+    ra_step = max(step_deg, 15)
+    dec_step = max(step_deg, 15)
+    
+    ra_values = np.arange(0, 360, ra_step)
+    ra_labels = []
+    for ra in ra_values:
+        hours, minutes = divmod(int(round(ra * 4)), 60)
+        ra_labels.append(f"{hours}h" if minutes == 0 else f"{hours}h{minutes:02d}m")
+    ra_points = radec_to_xyz(np.radians(ra_values), np.zeros_like(ra_values, dtype=float), radius)
+    
+    n_dec = int(np.floor((90 - 1e-9) / dec_step))
+    dec_values = np.arange(-n_dec, n_dec + 1) * dec_step
+    dec_values = dec_values[dec_values != 0]
+    dec_ra = np.radians([0, 90, 180, 270])
+    dec_points = radec_to_xyz(dec_ra[:, None], np.radians(dec_values)[None, :], radius).reshape(-1, 3)
+    dec_labels = [f"{dec:+g}°" for dec in dec_values] * len(dec_ra)
+    
+    return np.concatenate([ra_points, dec_points]), ra_labels + dec_labels
+
+def format_ra_dec(ra_rad, dec_rad):
+    """将赤经赤纬（弧度）格式化为时分秒/度分秒字符串，秒保留一位小数"""
+    # 先按0.1秒取整再拆分，避免出现60.0s
+    ra_tenths = int(round((np.degrees(ra_rad) / 15) % 24 * 36000)) % (24 * 36000)
+    ra_h, ra_rest = divmod(ra_tenths, 36000)
+    ra_m, ra_s = divmod(ra_rest, 600)
+    ra_hms_str = f"{ra_h}h {ra_m}m {ra_s / 10:.1f}s"
+    
+    dec_deg = np.degrees(dec_rad)
+    dec_tenths = int(round(abs(dec_deg) * 36000))
+    dec_d, dec_rest = divmod(dec_tenths, 36000)
+    dec_m, dec_s = divmod(dec_rest, 600)
+    dec_dms_str = f"{dec_d}° {dec_m}' {dec_s / 10:.1f}\""
+    if dec_deg < 0:
+        dec_dms_str = f"-{dec_dms_str}"
+    return ra_hms_str, dec_dms_str
+
+def chebyshev_evaluate(coefficients, x):
+    """用Clenshaw递推逐点计算切比雪夫级数
+    
+    coefficients形状为 (n_points, degree+1, n_components)，x形状为 (n_points,)，取值范围[-1, 1]
+    """
+    b1 = np.zeros(coefficients.shape[::2])
+    b2 = np.zeros_like(b1)
+    x2 = 2 * x[:, np.newaxis]
+    for k in range(coefficients.shape[1] - 1, 0, -1):
+        b1, b2 = coefficients[:, k, :] + x2 * b1 - b2, b1
+    return coefficients[:, 0, :] + x[:, np.newaxis] * b1 - b2
+
+def direction_to_radec(values):
+    """把 [..., 4] 的 [x, y, z, 距离] 转换为 [..., 3] 的 赤经(弧度)、赤纬(弧度)、距离，方向向量不必是单位向量"""
+    direction = values[..., :3] / np.linalg.norm(values[..., :3], axis=-1)[..., np.newaxis]
+    result = np.empty(values.shape[:-1] + (3,))
+    result[..., 0] = np.arctan2(direction[..., 1], direction[..., 0]) % (2 * np.pi)
+    result[..., 1] = np.arcsin(np.clip(direction[..., 2], -1, 1))
+    result[..., 2] = values[..., 3]
+    return result
+
+# 星历缓存的精度等级: (切比雪夫多项式阶数, 月球分段天数, 其他天体分段天数)
+EPHEMERIS_CACHE_TIERS = {
+    'standard': (10, 2, 16),
+    'high': (16, 1, 8)
+}
+
+# 运动较快、需要更短分段的天体（月球）
+EPHEMERIS_FAST_BODIES = {301}
+
+# 从地球观测天体时要回溯光行时（冥王星约7小时），可计算范围的起点留出的余量（天）
+EPHEMERIS_LIGHT_TIME_MARGIN = 0.5
+
+def ephemeris_coverage(planets):
+    """返回星历文件中所有天体都可以计算的时间范围 (起始TDB儒略日, 结束TDB儒略日)，无法获取时返回None
+    
+    同一天体可能分成多个首尾相接的数据段，先合并再对所有天体取交集；起点再加上光行时余量。
+    """
+    segments = getattr(planets, 'segments', None)
+    if not segments:
+        return None
+    ranges = {}
+    for segment in segments:
+        key = (segment.center, segment.target)
+        start, end = segment.spk_segment.start_jd, segment.spk_segment.end_jd
+        if key in ranges:
+            start, end = min(start, ranges[key][0]), max(end, ranges[key][1])
+        ranges[key] = (start, end)
+    return (max(start for start, end in ranges.values()) + EPHEMERIS_LIGHT_TIME_MARGIN,
+            min(end for start, end in ranges.values()))
+
+class EphemerisCache:
+    """星历的磁盘缓存
+    
+    每个天体的视位置（单位方向向量和距离）按时间分段拟合为切比雪夫多项式，
+    每个时间块的系数保存为一个可内存映射的.npy文件，文件名中包含星历文件、天体ID、
+    精度等级和时间范围。缓存总大小超过上限时按最近最少使用的顺序淘汰文件。
+    热启动时直接读取系数，查询只需计算多项式，不再进行光行时迭代。
+    """
+    def __init__(self, cache_dir='ephemeris_cache', ephemeris_name='de421', tier='standard',
+                 block_days=256, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ephemeris_name = ephemeris_name
+        self.tier = tier
+        self.degree, self.fast_segment_days, self.segment_days = EPHEMERIS_CACHE_TIERS[tier]
+        self.block_days = block_days
+        self.max_bytes = max_bytes
+        
+        # 已加载到内存的时间块: 文件名 -> 系数数组（内存映射）
+        self.blocks = {}
+        # 拟合失败的 (天体ID, 块起点)，本次会话中不再重新拟合
+        self.failed_blocks = set()
+        # 后台线程和界面线程可能同时读写缓存
+        self.lock = threading.RLock()
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.index = self.load_index()
+    
+    def load_index(self):
+        """读取缓存索引（文件名 -> 最近访问时间），并与磁盘上的文件核对"""
+        index = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            pass
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.npy') and not file_name.endswith('.tmp.npy') and file_name not in index:
+                index[file_name] = 0
+        return {name: last_used for name, last_used in index.items()
+                if os.path.exists(os.path.join(self.cache_dir, name))}
+    
+    def save_index(self):
+        """保存缓存索引"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+    
+    def body_segment_days(self, body_id):
+        """天体的切比雪夫分段长度（天）"""
+        return self.fast_segment_days if body_id in EPHEMERIS_FAST_BODIES else self.segment_days
+    
+    def block_file_name(self, body_id, block_start):
+        """时间块对应的缓存文件名"""
+        return f"{self.ephemeris_name}_{body_id}_{self.tier}_{block_start}_{self.block_days}.npy"
+    
+    def fit_block(self, body_id, block_start, sample_function, coverage=None):
+        """对一个时间块内的所有分段一次性采样并拟合切比雪夫系数
+        
+        coverage为星历文件的时间范围 (起始儒略日, 结束儒略日)，不完全在范围内的分段不采样，系数为NaN。
+        """
+        segment_days = self.body_segment_days(body_id)
+        n_segments = self.block_days // segment_days
+        n_nodes = 2 * (self.degree + 1)
+        
+        # 切比雪夫节点（[-1, 1]区间）
+        nodes = np.cos(np.pi * (np.arange(n_nodes) + 0.5) / n_nodes)
+        segment_starts = block_start + np.arange(n_segments) * segment_days
+        inside = np.ones(n_segments, dtype=bool)
+        if coverage is not None:
+            inside = (segment_starts >= coverage[0]) & (segment_starts + segment_days <= coverage[1])
+        jd = segment_starts[inside, np.newaxis] + (nodes + 1) / 2 * segment_days
+        
+        coefficients = np.full((n_segments, self.degree + 1, 4), np.nan)
+        if not inside.any():
+            return coefficients
+        
+        # 整个时间块的所有节点在一次批量计算中得到，形状为 (n_inside * n_nodes, 4)
+        samples = sample_function(jd.ravel()).reshape(len(jd), n_nodes, -1)
+        for i, segment in enumerate(np.flatnonzero(inside)):
+            coefficients[segment] = np.polynomial.chebyshev.chebfit(nodes, samples[i], self.degree)
+        return coefficients
+    
+    def get_block(self, body_id, block_start, sample_function, coverage=None):
+        """获取时间块的系数，依次从内存、磁盘读取，都没有时重新计算并写入磁盘；拟合失败时返回None"""
+        with self.lock:
+            return self.load_block(body_id, block_start, sample_function, coverage)
+    
+    def load_block(self, body_id, block_start, sample_function, coverage=None):
+        """get_block的实现，调用时需持有self.lock"""
+        file_name = self.block_file_name(body_id, block_start)
+        coefficients = self.blocks.get(file_name)
+        if coefficients is not None:
+            return coefficients
+        if (body_id, block_start) in self.failed_blocks:
+            return None
+        
+        path = os.path.join(self.cache_dir, file_name)
+        try:
+            coefficients = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            try:
+                coefficients = self.fit_block(body_id, block_start, sample_function, coverage)
+            except ValueError as e:
+                # 记录下来，之后这一块的时间直接计算，不再每次重新拟合
+                self.failed_blocks.add((body_id, block_start))
+                print(f"星历缓存: 无法拟合 {file_name}，改为直接计算: {e}")
+                return None
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, coefficients)
+            os.replace(tmp_path, path)
+            print(f"星历缓存: 新建 {file_name}")
+        
+        self.blocks[file_name] = coefficients
+        self.index[file_name] = time.time()
+        self.evict()
+        self.save_index()
+        return coefficients
+    
+    def evict(self):
+        """缓存总大小超过上限时，按最近最少使用的顺序删除缓存文件"""
+        sizes = {}
+        for file_name in self.index:
+            try:
+                sizes[file_name] = os.path.getsize(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                sizes[file_name] = 0
+        total = sum(sizes.values())
+        
+        for file_name in sorted(self.index, key=self.index.get):
+            if total <= self.max_bytes:
+                break
+            # 不淘汰本次会话正在使用的时间块
+            if file_name in self.blocks:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                pass
+            total -= sizes[file_name]
+            del self.index[file_name]
+            print(f"星历缓存: 淘汰 {file_name}")
+    
+    def evaluate(self, body_id, tt_jd, sample_function, coverage=None):
+        """计算天体在TT儒略日tt_jd（数组）时的位置
+        
+        sample_function(jd数组) 返回形状为 (n, 4) 的 [x, y, z, 距离(AU)]，仅在缓存未命中时调用；
+        拟合失败的时间块和超出coverage的分段也用它直接计算。
+        返回形状为 (n, 3) 的 赤经(弧度)、赤纬(弧度)、距离(AU)
+        """
+        tt_jd = np.atleast_1d(np.asarray(tt_jd, dtype=float))
+        segment_days = self.body_segment_days(body_id)
+        
+        block_starts = np.floor(tt_jd / self.block_days).astype(np.int64) * self.block_days
+        offsets = tt_jd - block_starts
+        segment_index = np.minimum((offsets // segment_days).astype(np.int64),
+                                   self.block_days // segment_days - 1)
+        x = 2 * (offsets - segment_index * segment_days) / segment_days - 1
+        
+        coefficients = np.full((len(tt_jd), self.degree + 1, 4), np.nan)
+        for block_start in np.unique(block_starts):
+            mask = block_starts == block_start
+            block = self.get_block(body_id, int(block_start), sample_function, coverage)
+            if block is not None:
+                coefficients[mask] = block[segment_index[mask]]
+        
+        # 系数为NaN的时间（拟合失败的时间块、超出星历文件范围的分段）直接计算
+        direct = np.isnan(coefficients[:, 0, 0])
+        result = np.empty((len(tt_jd), 3))
+        result[~direct] = direction_to_radec(chebyshev_evaluate(coefficients[~direct], x[~direct]))
+        if direct.any():
+            result[direct] = direction_to_radec(sample_function(tt_jd[direct]))
+        return result
+
+class EphemerisWindow:
+    """星历引擎在一段等间隔时间序列上的计算结果"""
+    def __init__(self, start_time, step_seconds, positions, gmst_hours):
+        # 起始时间（datetime）和时间间隔（秒）
+        self.start_time = start_time
+        self.step_seconds = step_seconds
+        # 形状为 (n_bodies, n_times, 3)，最后一维为 赤经(弧度)、赤纬(弧度)、距离(AU)
+        self.positions = positions
+        # 形状为 (n_times,)，格林威治平恒星时（小时）
+        self.gmst_hours = gmst_hours
+    
+    def __len__(self):
+        return len(self.gmst_hours)
+    
+    def index_of(self, when):
+        """返回时间when在序列中的下标，不在序列中时返回None"""
+        offset = (when - self.start_time).total_seconds()
+        if self.step_seconds == 0:
+            return 0 if offset == 0 else None
+        # datetime只精确到微秒，相邻窗口首尾相接时舍入误差会逐段累积，容差按步长的1%计算（至少0.5毫秒）
+        index = int(round(offset / self.step_seconds))
+        tolerance = max(5e-4, 0.01 * abs(self.step_seconds))
+        if index < 0 or index >= len(self) or abs(offset - index * self.step_seconds) > tolerance:
+            return None
+        return index
+
+class EphemerisEngine:
+    """批量星历计算引擎
+    
+    地球位置对整个时间向量只计算一次，每个天体对整个时间向量只调用一次observe，
+    渲染循环只需按下标读取结果，快速时间推进时也能一次性向前计算很远。
+    """
+    def __init__(self, planets, earth, ts, body_ids, lookahead=600, cache=None):
+        self.earth = earth
+        self.ts = ts
+        # 可选的磁盘缓存（EphemerisCache），为None时直接用skyfield计算
+        self.cache = cache
+        # 每次向前预先计算的时间步数
+        self.lookahead = lookahead
+        
+        # 解析天体，记录每个天体在结果数组中的行号
+        self.body_names = []
+        self.body_ids = []
+        self.body_targets = []
+        for body_name, skyfield_id in body_ids.items():
+            try:
+                self.body_targets.append(planets[skyfield_id])
+                self.body_ids.append(skyfield_id)
+                self.body_names.append(body_name)
+            except KeyError as e:
+                print(f"星历中缺少天体 {body_name}: {e}")
+        self.body_index = {name: i for i, name in enumerate(self.body_names)}
+        
+        # 星历文件的时间范围（TDB儒略日），磁盘缓存的时间块只在范围内拟合
+        self.coverage = ephemeris_coverage(planets)
+        
+        # 当前缓存的计算窗口
+        self.current_window = None
+    
+    def times(self, start_time, step_seconds, count):
+        """构造从start_time开始、间隔step_seconds秒的skyfield时间向量"""
+        seconds = start_time.second + start_time.microsecond / 1e6 + np.arange(count) * step_seconds
+        return self.ts.utc(start_time.year, start_time.month, start_time.day,
+                           start_time.hour, start_time.minute, seconds)
+    
+    def compute(self, t):
+        """对skyfield时间向量t批量计算所有天体的位置
+        
+        返回 (positions, gmst_hours)，positions形状为 (n_bodies, n_times, 3)
+        """
+        tt_jd = np.atleast_1d(t.tt)
+        positions = np.empty((len(self.body_targets), len(tt_jd), 3))
+        
+        # 优先从磁盘缓存的切比雪夫多项式计算
+        uncached = list(range(len(self.body_targets)))
+        if self.cache is not None:
+            uncached = []
+            for i, body in enumerate(self.body_targets):
+                try:
+                    positions[i] = self.cache.evaluate(self.body_ids[i], tt_jd,
+                                                       lambda jd, body=body: self.sample(body, jd), coverage=self.coverage)
+                except ValueError as e:
+                    # 时间超出星历文件的范围等情况，改为直接计算
+                    print(f"星历缓存不可用于 {self.body_names[i]}: {e}")
+                    uncached.append(i)
+        if not uncached:
+            return positions, np.atleast_1d(t.gmst)
+        
+        # 地球位置对所有天体共用
+        earth_at_t = self.earth.at(t)
+        for i in uncached:
+            ra, dec, distance = earth_at_t.observe(self.body_targets[i]).radec()
+            positions[i, :, 0] = ra.radians
+            positions[i, :, 1] = dec.radians
+            positions[i, :, 2] = distance.au
+        
+        return positions, np.atleast_1d(t.gmst)
+    
+    def sample(self, body, tt_jd):
+        """对TT儒略日数组直接计算天体的视位置，返回形状为 (n, 4) 的 [x, y, z, 距离(AU)]"""
+        t = self.ts.tt_jd(tt_jd)
+        position = self.earth.at(t).observe(body).position.au
+        distance = np.linalg.norm(position, axis=0)
+        return np.column_stack([position.T / distance[:, np.newaxis], distance])
+    
+    def covers(self, when):
+        """时间when是否在星历文件的可计算范围内，范围未知时返回True"""
+        if self.coverage is None:
+            return True
+        tdb = self.ts.from_datetime(when).tdb
+        return self.coverage[0] <= tdb <= self.coverage[1]
+    
+    def window(self, start_time, step_seconds, count):
+        """计算从start_time开始的等间隔时间序列，返回EphemerisWindow
+        
+        序列在星历文件的可计算范围边界处截断，至少保留起始时刻（它也超出范围时由compute抛出ValueError）。
+        """
+        if step_seconds == 0:
+            count = 1
+        t = self.times(start_time, step_seconds, count)
+        if self.coverage is not None and count > 1:
+            tdb = t.tdb
+            inside = (tdb >= self.coverage[0]) & (tdb <= self.coverage[1])
+            if not inside.all():
+                t = t[:max(1, int(np.argmin(inside)))]
+        positions, gmst_hours = self.compute(t)
+        return EphemerisWindow(start_time, step_seconds, positions, gmst_hours)
+    
+    def lookup(self, when, step_seconds=0):
+        """查询时间when的所有天体位置和GMST
+        
+        优先从当前窗口中按下标读取；不在窗口中时沿当前步长方向一次性向前计算lookahead步。
+        返回 (positions, gmst_hours)，positions形状为 (n_bodies, 3)
+        """
+        window = self.current_window
+        index = window.index_of(when) if window is not None else None
+        if index is None:
+            window = self.window(when, step_seconds, self.lookahead)
+            self.current_window = window
+            index = 0
+        return window.positions[:, index, :], window.gmst_hours[index]
+
+class KeyframeIndex:
+    """用于快速跳转时间的关键帧索引
+    
+    每隔interval_days天保存一帧所有天体的方向向量和距离，按block_days天分块，
+    第一次用到某一块时在后台线程中计算并保存到磁盘，以后直接内存映射读取。
+    查询任意时间时用相邻4个关键帧做三次插值，与跳转的距离无关。
+    """
+    def __init__(self, engine, cache_dir='ephemeris_cache', ephemeris_name='de421', interval_days=1, block_days=256):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.ephemeris_name = ephemeris_name
+        self.interval_days = interval_days
+        self.block_days = block_days
+        # 块起点（关键帧序号）-> 形状为 (n_bodies, block_days + 3, 4) 的 [x, y, z, 距离]
+        self.blocks = {}
+        self.pending = set()
+        # 计算失败的块起点，本次会话中不再重新计算
+        self.failed_blocks = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='keyframes')
+    
+    def block_path(self, block_start):
+        return os.path.join(self.cache_dir,
+                            f"keyframes_{self.ephemeris_name}_{self.interval_days:g}d_{block_start}.npy")
+    
+    def build_block(self, block_start):
+        """计算一块关键帧：前后各多算一帧，块内任意位置都有相邻的4个关键帧
+        
+        超出星历文件时间范围的关键帧不计算，值为NaN；整块都超出范围时抛出ValueError。
+        """
+        keyframes = np.arange(block_start - 1, block_start + self.block_days + 2)
+        tt_jd = keyframes * float(self.interval_days)
+        inside = np.ones(len(tt_jd), dtype=bool)
+        coverage = self.engine.coverage
+        if coverage is not None:
+            inside = (tt_jd >= coverage[0]) & (tt_jd <= coverage[1])
+            if not inside.any():
+                raise ValueError("关键帧块超出星历文件的时间范围")
+        block = np.full((len(self.engine.body_targets), len(tt_jd), 4), np.nan)
+        for i, body in enumerate(self.engine.body_targets):
+            block[i, inside] = self.engine.sample(body, tt_jd[inside])
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.block_path(block_start)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, block)
+        os.replace(tmp_path, path)
+        return block
+    
+    def load_block(self, block_start):
+        """后台线程：读取或计算一块关键帧并发布"""
+        try:
+            try:
+                block = np.load(self.block_path(block_start), mmap_mode='r')
+            except (OSError, ValueError):
+                block = self.build_block(block_start)
+            with self.lock:
+                self.blocks[block_start] = block
+        except Exception as e:
+            # 记录下来，之后不再重新计算这一块
+            with self.lock:
+                self.failed_blocks.add(block_start)
+            print(f"计算关键帧失败: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(block_start)
+    
+    def request(self, block_start):
+        """在后台准备一块关键帧，已在准备中时忽略"""
+        with self.lock:
+            if block_start in self.blocks or block_start in self.pending or block_start in self.failed_blocks:
+                return
+            self.pending.add(block_start)
+        self.executor.submit(self.load_block, block_start)
+    
+    def lookup(self, when, exact_on_miss=False):
+        """返回时间when的 (positions, gmst_hours)，positions形状为 (n_bodies, 3)
+        
+        关键帧块已就绪时三次插值；否则在后台准备关键帧块并返回None，
+        exact_on_miss为True时（如跳转）改为在当前线程直接计算这一时刻。
+        相邻关键帧超出星历文件的时间范围（值为NaN）时与未就绪相同。
+        """
+        t = self.engine.ts.from_datetime(when)
+        tt_jd = float(t.tt)
+        # GMST是时间的解析函数，直接计算而不插值
+        gmst_hours = float(t.gmst)
+        
+        position = tt_jd / self.interval_days
+        keyframe = int(np.floor(position))
+        block_start = (keyframe // self.block_days) * self.block_days
+        with self.lock:
+            block = self.blocks.get(block_start)
+        values = None
+        if block is None:
+            self.request(block_start)
+        else:
+            # Catmull-Rom 三次插值，u为两个关键帧之间的位置
+            i = keyframe - block_start + 1
+            p0, p1, p2, p3 = (block[:, i - 1], block[:, i], block[:, i + 1], block[:, i + 2])
+            u = position - keyframe
+            values = 0.5 * (2 * p1 + (p2 - p0) * u + (2 * p0 - 5 * p1 + 4 * p2 - p3) * u ** 2
+                            + (3 * p1 - p0 - 3 * p2 + p3) * u ** 3)
+            if np.isnan(values).any():
+                values = None
+        
+        if values is None:
+            if not exact_on_miss:
+                return None
+            values = np.stack([self.engine.sample(body, np.array([tt_jd]))[0] for body in self.engine.body_targets])
+        return direction_to_radec(values), gmst_hours
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# 恒星数据行的完整格式，例如：
+# α Ori Betelgeuse (参宿四): 视星等 0.45, 赤经 5h 55m (88.7500°), 赤纬 +7° 24' (7.4000°), 光谱型 M2Ib
+STAR_LINE_PATTERN = re.compile(
+    r'(.+?)\s+\((.*?)\):\s+视星等\s+([\d.-]+),\s+赤经\s+(.+?),\s+赤纬\s+(.+?),\s+光谱型\s+(.+)'
+)
+# 简化格式：没有括号中的名称，赤经、赤纬、光谱型可以缺省
+STAR_LINE_FALLBACK_PATTERN = re.compile(
+    r'(\S+)\s*(.*?):\s*视星等\s*([\d.-]+)(?:,\s*赤经\s*(.+?))?(?:,\s*赤纬\s*(.+?))?(?:,\s*光谱型\s*(.*))?$'
+)
+# 括号中的度数，例如 (88.7500°)
+DEGREES_IN_PARENS_PATTERN = re.compile(r'\(([\d.+-]+)°\)')
+# 时分格式的赤经，例如 5h 55m
+HOURS_MINUTES_PATTERN = re.compile(r'([\d.+-]+)h\s+([\d.]+)m')
+# 度分格式的赤纬，例如 +7° 24'
+DEGREES_MINUTES_PATTERN = re.compile(r"([\d.+-]+)°\s+([\d.]+)'")
+
+# 恒星数据的列名，星座按 constellation 列中的下标引用 constellation_names
+STAR_COLUMNS = ('constellation', 'id', 'name', 'magnitude', 'ra_deg', 'dec_deg', 'spectral_type')
+
+def parse_ra_degrees(ra_str):
+    """解析赤经字符串为度数，优先使用括号中的度数"""
+    match = DEGREES_IN_PARENS_PATTERN.search(ra_str)
+    if match:
+        return float(match.group(1))
+    match = HOURS_MINUTES_PATTERN.search(ra_str)
+    if match:
+        return (float(match.group(1)) + float(match.group(2)) / 60) * 15  # 1小时 = 15度
+    return float(ra_str.replace('°', ''))
+
+def parse_dec_degrees(dec_str):
+    """解析赤纬字符串为度数，优先使用括号中的度数"""
+    match = DEGREES_IN_PARENS_PATTERN.search(dec_str)
+    if match:
+        return float(match.group(1))
+    match = DEGREES_MINUTES_PATTERN.search(dec_str)
+    if match:
+        degrees = float(match.group(1))
+        minutes = float(match.group(2)) / 60
+        return degrees - minutes if match.group(1).startswith('-') else degrees + minutes
+    return float(dec_str.replace('°', ''))
+
+def parse_star_file(file_path):
+    """流式解析HeavensAbove格式的恒星数据文件，直接生成列数组
+    
+    返回 (constellation_names, columns)，columns为 STAR_COLUMNS 中各列的numpy数组
+    """
+    constellation_names = []
+    rows = {name: [] for name in STAR_COLUMNS}
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            
+            # 检查是否是星座标题行
+            if line.endswith('主要恒星坐标:'):
+                constellation_names.append(line[:-len('主要恒星坐标:')].strip())
+                continue
+            if not constellation_names:
+                continue
+            
+            match = STAR_LINE_PATTERN.match(line) or STAR_LINE_FALLBACK_PATTERN.match(line)
+            if not match:
+                continue
+            star_id, star_name, magnitude, ra_str, dec_str, spectral_type = match.groups()
+            
+            try:
+                ra_deg = parse_ra_degrees(ra_str or '')
+                dec_deg = parse_dec_degrees(dec_str or '')
+                magnitude = float(magnitude)
+            except ValueError as e:
+                print(f"解析恒星数据失败: {line}, 错误: {e}")
+                continue
+            
+            rows['constellation'].append(len(constellation_names) - 1)
+            rows['id'].append(star_id.strip())
+            # 括号中没有名称时使用编号
+            rows['name'].append(star_name.strip() or star_id.strip())
+            rows['magnitude'].append(magnitude)
+            rows['ra_deg'].append(ra_deg)
+            rows['dec_deg'].append(dec_deg)
+            rows['spectral_type'].append((spectral_type or '').strip())
+    
+    columns = {
+        'constellation': np.array(rows['constellation'], dtype=np.int32),
+        'id': np.array(rows['id'], dtype=str),
+        'name': np.array(rows['name'], dtype=str),
+        'magnitude': np.array(rows['magnitude'], dtype=float),
+        'ra_deg': np.array(rows['ra_deg'], dtype=float),
+        'dec_deg': np.array(rows['dec_deg'], dtype=float),
+        'spectral_type': np.array(rows['spectral_type'], dtype=str)
+    }
+    return np.array(constellation_names, dtype=str), columns
+
+def file_sha1(file_path):
+    """计算文件内容的SHA1"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_star_columns(file_path):
+    """读取恒星数据文件的列数组，解析结果缓存在同目录的 .cache.npz 旁路文件中
+    
+    源文件的修改时间和大小不变时直接读取缓存；修改时间变化但内容哈希相同时也复用缓存，
+    只有内容变化时才重新解析。
+    """
+    cache_path = file_path + '.cache.npz'
+    stat = os.stat(file_path)
+    source_hash = None
+    
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache:
+            cached = {name: cache[name] for name in cache.files}
+        if (int(cached['source_mtime_ns']) == stat.st_mtime_ns
+                and int(cached['source_size']) == stat.st_size):
+            return cached['constellation_names'], {name: cached[name] for name in STAR_COLUMNS}
+        source_hash = file_sha1(file_path)
+        if str(cached['source_hash']) == source_hash:
+            constellation_names = cached['constellation_names']
+            columns = {name: cached[name] for name in STAR_COLUMNS}
+            save_star_columns(cache_path, constellation_names, columns, stat, source_hash)
+            return constellation_names, columns
+    except (OSError, KeyError, ValueError):
+        pass
+    
+    constellation_names, columns = parse_star_file(file_path)
+    if source_hash is None:
+        source_hash = file_sha1(file_path)
+    save_star_columns(cache_path, constellation_names, columns, stat, source_hash)
+    return constellation_names, columns
+
+def save_star_columns(cache_path, constellation_names, columns, stat, source_hash):
+    """把恒星数据的列数组和源文件信息写入旁路缓存文件"""
+    try:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, constellation_names=constellation_names,
+                 source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size,
+                 source_hash=source_hash, **columns)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"写入恒星数据缓存 {cache_path} 失败: {e}")
+
+class StarCatalog:
+    """恒星数据的列式存储
+    
+    每一列是一个连续的NumPy数组；编号、名称和光谱型放在去重的字符串表中，列中只保存int32下标；
+    同一星座的恒星在数组中连续存放（保持文件中的顺序），第i个星座的范围为 offsets[i]:offsets[i+1]。
+    """
+    def __init__(self, constellation_names, columns):
+        constellation = np.asarray(columns['constellation'], dtype=np.int64)
+        order = np.argsort(constellation, kind='stable')
+        self.constellation_names = [str(name) for name in constellation_names]
+        self.constellation_lookup = {name: i for i, name in enumerate(self.constellation_names)}
+        counts = np.bincount(constellation, minlength=len(self.constellation_names))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        
+        self.magnitude = np.asarray(columns['magnitude'], dtype=np.float32)[order]
+        self.ra_deg = np.asarray(columns['ra_deg'], dtype=float)[order]
+        self.dec_deg = np.asarray(columns['dec_deg'], dtype=float)[order]
+        # 天球单位向量
+        self.xyz = radec_to_xyz(np.radians(self.ra_deg), np.radians(self.dec_deg)).astype(np.float32)
+        
+        # 字符串表：相同的字符串（如光谱型）只保存一次
+        text = np.concatenate([np.asarray(columns[key]).astype(str)[order] for key in ('id', 'name', 'spectral_type')])
+        strings, codes = np.unique(text, return_inverse=True)
+        self.id_codes, self.name_codes, self.spectral_codes = codes.astype(np.int32).reshape(3, -1)
+        self.strings = strings.tolist()
+    
+    def __len__(self):
+        return len(self.magnitude)
+    
+    def lookup_strings(self, codes):
+        """字符串表下标转换为字符串列表"""
+        return [self.strings[code] for code in codes]
+    
+    def ids(self, indices=slice(None)):
+        return self.lookup_strings(self.id_codes[indices])
+    
+    def names(self, indices=slice(None)):
+        return self.lookup_strings(self.name_codes[indices])
+    
+    def spectral_types(self, indices=slice(None)):
+        return self.lookup_strings(self.spectral_codes[indices])
+    
+    def constellation(self, name):
+        """星座的恒星范围，返回slice，星座不存在时为空"""
+        i = self.constellation_lookup.get(name)
+        if i is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+    
+    def constellation_indices(self, name):
+        """星座的恒星下标数组"""
+        constellation = self.constellation(name)
+        return np.arange(constellation.start, constellation.stop)
+    
+    def constellation_of(self, indices):
+        """恒星所在星座的编号"""
+        return np.searchsorted(self.offsets, indices, side='right') - 1
+    
+    def brighter_than(self, limiting_magnitude, indices=None):
+        """视星等不暗于limiting_magnitude的恒星下标，indices给定时只在其中筛选"""
+        if indices is None:
+            return np.flatnonzero(self.magnitude <= limiting_magnitude)
+        indices = np.asarray(indices)
+        return indices[self.magnitude[indices] <= limiting_magnitude]
+    
+    def within(self, direction, radius_deg, indices=None):
+        """与方向direction的角距离不超过radius_deg的恒星下标"""
+        direction = np.asarray(direction, dtype=float)
+        direction = direction / np.linalg.norm(direction)
+        if indices is None:
+            return np.flatnonzero(self.xyz @ direction >= np.cos(np.radians(radius_deg)))
+        indices = np.asarray(indices)
+        return indices[self.xyz[indices] @ direction >= np.cos(np.radians(radius_deg))]
+    
+    def record(self, index):
+        """一颗恒星的全部数据，返回字典"""
+        return {
+            'id': self.strings[self.id_codes[index]],
+            'name': self.strings[self.name_codes[index]],
+            'constellation': self.constellation_names[int(self.constellation_of(index))],
+            'magnitude': float(self.magnitude[index]),
+            'ra_deg': float(self.ra_deg[index]),
+            'dec_deg': float(self.dec_deg[index]),
+            'spectral_type': self.strings[self.spectral_codes[index]]
+        }
+
+# 二进制星表的列格式（结构化数组），x/y/z为天球单位向量
+STAR_CATALOG_DTYPE = np.dtype([
+    ('ra_deg', 'f8'),
+    ('dec_deg', 'f8'),
+    ('magnitude', 'f4'),
+    ('x', 'f4'),
+    ('y', 'f4'),
+    ('z', 'f4')
+])
+
+def sky_tile_ids(ra_deg, dec_deg, tile_deg):
+    """按赤经赤纬把天球划分为tile_deg见方的分块，返回每个位置所在分块的编号"""
+    n_ra = int(round(360 / tile_deg))
+    n_dec = int(round(180 / tile_deg))
+    ra_cell = np.clip((np.asarray(ra_deg) % 360 // tile_deg).astype(np.int64), 0, n_ra - 1)
+    dec_band = np.clip(((np.asarray(dec_deg) + 90) // tile_deg).astype(np.int64), 0, n_dec - 1)
+    return dec_band * n_ra + ra_cell
+
+def sky_tile_centers(tile_deg):
+    """返回所有分块中心的单位向量，形状为 (n_tiles, 3)"""
+    n_ra = int(round(360 / tile_deg))
+    n_dec = int(round(180 / tile_deg))
+    dec_centers = -90 + (np.arange(n_dec) + 0.5) * tile_deg
+    ra_centers = (np.arange(n_ra) + 0.5) * tile_deg
+    dec_grid, ra_grid = np.meshgrid(dec_centers, ra_centers, indexing='ij')
+    return radec_to_xyz(np.radians(ra_grid.ravel()), np.radians(dec_grid.ravel()))
+
+def write_star_catalog(path, ra_deg, dec_deg, magnitude, tile_deg=10):
+    """把恒星数据写成按分块和视星等排序的二进制星表
+    
+    星表本体为结构化数组的.npy文件，可直接内存映射；分块索引写入同名的.tiles.npz，
+    每个分块内的恒星在文件中连续存放且按视星等从亮到暗排列。
+    """
+    ra_deg = np.asarray(ra_deg, dtype=float) % 360
+    dec_deg = np.asarray(dec_deg, dtype=float)
+    magnitude = np.asarray(magnitude, dtype=float)
+    
+    tile_ids = sky_tile_ids(ra_deg, dec_deg, tile_deg)
+    order = np.lexsort((magnitude, tile_ids))
+    
+    stars = np.empty(len(order), dtype=STAR_CATALOG_DTYPE)
+    stars['ra_deg'] = ra_deg[order]
+    stars['dec_deg'] = dec_deg[order]
+    stars['magnitude'] = magnitude[order]
+    xyz = radec_to_xyz(np.radians(stars['ra_deg']), np.radians(stars['dec_deg']))
+    stars['x'] = xyz[:, 0]
+    stars['y'] = xyz[:, 1]
+    stars['z'] = xyz[:, 2]
+    np.save(path, stars)
+    
+    n_tiles = int(round(360 / tile_deg)) * int(round(180 / tile_deg))
+    counts = np.bincount(tile_ids, minlength=n_tiles)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    np.savez(star_catalog_index_path(path), offsets=offsets, tile_deg=tile_deg)
+    print(f"写入星表: {path}, 恒星数量: {len(stars)}")
+
+def star_catalog_index_path(path):
+    """星表分块索引文件的路径"""
+    return os.path.splitext(path)[0] + '.tiles.npz'
+
+def convert_star_catalog(csv_path, path, tile_deg=10):
+    """把Hipparcos、Yale BSC等导出的CSV星表转换为二进制星表
+    
+    CSV需要包含表头，赤经赤纬以度为单位，支持常见的列名（如 RAdeg/DEdeg/Vmag）。
+    """
+    column_names = {
+        'ra_deg': ('ra', 'ra_deg', 'radeg', 'ra_icrs', 'raicrs'),
+        'dec_deg': ('dec', 'dec_deg', 'dedeg', 'de_icrs', 'deicrs'),
+        'magnitude': ('mag', 'magnitude', 'vmag', 'hpmag')
+    }
+    data = np.genfromtxt(csv_path, delimiter=',', names=True, dtype=float, encoding='utf-8')
+    columns = {}
+    for key, candidates in column_names.items():
+        for name in data.dtype.names:
+            if name.lower() in candidates:
+                columns[key] = data[name]
+                break
+        else:
+            raise ValueError(f"星表 {csv_path} 中缺少 {key} 列")
+    
+    valid = np.isfinite(columns['ra_deg']) & np.isfinite(columns['dec_deg']) & np.isfinite(columns['magnitude'])
+    write_star_catalog(path, columns['ra_deg'][valid], columns['dec_deg'][valid],
+                       columns['magnitude'][valid], tile_deg=tile_deg)
+
+class TiledStarCatalog:
+    """内存映射的分块星表
+    
+    启动时只映射文件，不读入恒星数据；按视野选出可见的分块，
+    并在每个分块内按极限星等截取最亮的一段，只读取这些恒星。
+    """
+    def __init__(self, path):
+        self.path = path
+        self.stars = np.load(path, mmap_mode='r')
+        with np.load(star_catalog_index_path(path)) as index:
+            self.offsets = index['offsets']
+            self.tile_deg = float(index['tile_deg'])
+        self.tile_centers = sky_tile_centers(self.tile_deg)
+        # 分块中心到分块边缘的最大角距离（保守估计）
+        self.tile_radius = np.radians(self.tile_deg)
+    
+    def __len__(self):
+        return len(self.stars)
+    
+    def visible_tiles(self, view_direction, half_angle):
+        """返回与视野圆锥（半角half_angle，弧度）相交的分块编号"""
+        view_direction = np.asarray(view_direction, dtype=float)
+        view_direction = view_direction / np.linalg.norm(view_direction)
+        cos_distance = self.tile_centers @ view_direction
+        limit = min(np.pi, half_angle + self.tile_radius)
+        return np.nonzero(cos_distance >= np.cos(limit))[0]
+    
+    def select(self, tiles, limiting_magnitude, max_stars=None):
+        """取出给定分块中亮于极限星等的恒星"""
+        parts = []
+        for tile in tiles:
+            start, stop = self.offsets[tile], self.offsets[tile + 1]
+            if start == stop:
+                continue
+            # 分块内按视星等排序，用二分查找确定截止位置
+            stop = start + np.searchsorted(self.stars['magnitude'][start:stop], limiting_magnitude, side='right')
+            if stop > start:
+                parts.append(self.stars[start:stop])
+        if not parts:
+            return np.empty(0, dtype=STAR_CATALOG_DTYPE)
+        
+        selected = np.concatenate(parts)
+        if max_stars is not None and len(selected) > max_stars:
+            brightest = np.argpartition(selected['magnitude'], max_stars - 1)[:max_stars]
+            selected = selected[brightest]
+        return selected
+
+class SkyIndex:
+    """天球方向（单位向量）的空间索引，用于拾取离某个方向最近的恒星
+
+    与分块星表相同，按赤经赤纬把天球划分为tile_deg见方的分块，恒星按分块编号排序，
+    每个分块在数组中的起止位置由偏移量数组给出。查询时由查询圆直接算出可能相交的分块，
+    只比较这些分块中的恒星，耗时与恒星总数无关。
+    """
+    def __init__(self, directions, tile_deg=1.0):
+        directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+        self.tile_deg = tile_deg
+        self.n_ra = int(round(360 / tile_deg))
+        self.n_dec = int(round(180 / tile_deg))
+
+        radec = direction_to_radec(np.column_stack([directions, np.ones(len(directions))]))
+        tile_ids = sky_tile_ids(np.degrees(radec[:, 0]), np.degrees(radec[:, 1]), tile_deg)
+        # 按分块排序后的下标和单位向量
+        self.order = np.argsort(tile_ids, kind='stable')
+        self.directions = radec_to_xyz(radec[self.order, 0], radec[self.order, 1])
+        counts = np.bincount(tile_ids, minlength=self.n_ra * self.n_dec)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.order)
+
+    def nearby_tiles(self, ra_deg, dec_deg, radius_deg):
+        """与以 (ra_deg, dec_deg) 为中心、半径radius_deg的圆相交的分块编号"""
+        tile = self.tile_deg
+        first_band = max(0, int((dec_deg - radius_deg + 90) // tile))
+        last_band = min(self.n_dec - 1, int((dec_deg + radius_deg + 90) // tile))
+        bands = np.arange(first_band, last_band + 1)
+        if abs(dec_deg) + radius_deg >= 90:
+            # 圆包含天极，所有赤经
+            cells = np.arange(self.n_ra)
+        else:
+            # 球冠在赤经方向的最大半宽
+            half_width = np.degrees(np.arcsin(np.sin(np.radians(radius_deg)) / np.cos(np.radians(dec_deg))))
+            cells = np.arange(int((ra_deg - half_width) // tile), int((ra_deg + half_width) // tile) + 1) % self.n_ra
+            cells = np.unique(cells)
+        return (bands[:, None] * self.n_ra + cells[None, :]).ravel()
+
+    def nearest(self, direction, max_angle_deg):
+        """离direction最近、且角距离不超过max_angle_deg的恒星，返回 (原始下标, 角距离度)，没有时返回 (None, None)"""
+        direction = np.asarray(direction, dtype=float)
+        direction = direction / np.linalg.norm(direction)
+        ra_deg = np.degrees(np.arctan2(direction[1], direction[0])) % 360
+        dec_deg = np.degrees(np.arcsin(np.clip(direction[2], -1, 1)))
+
+        tiles = self.nearby_tiles(ra_deg, dec_deg, max_angle_deg)
+        starts, stops = self.offsets[tiles], self.offsets[tiles + 1]
+        nonempty = stops > starts
+        if not np.any(nonempty):
+            return None, None
+        candidates = np.concatenate([np.arange(start, stop) for start, stop in zip(starts[nonempty], stops[nonempty])])
+
+        cos_distance = self.directions[candidates] @ direction
+        best = int(np.argmax(cos_distance))
+        angle = np.degrees(np.arccos(min(1.0, cos_distance[best])))
+        if angle > max_angle_deg:
+            return None, None
+        return int(self.order[candidates[best]]), float(angle)
+
+def load_satellites(file_path):
+    """读取本地的TLE（两行或三行格式）或OMM（CSV、XML）文件，返回 (名称列表, Satrec列表)"""
+    names = []
+    satellites = []
+    extension = os.path.splitext(file_path)[1].lower()
+    
+    if extension in ('.csv', '.xml'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            records = omm.parse_csv(f) if extension == '.csv' else omm.parse_xml(f)
+            for fields in records:
+                satellite = Satrec()
+                try:
+                    omm.initialize(satellite, fields)
+                except (KeyError, ValueError) as e:
+                    print(f"解析OMM记录失败: {fields.get('OBJECT_NAME', '')}, 错误: {e}")
+                    continue
+                names.append(fields.get('OBJECT_NAME', str(satellite.satnum)))
+                satellites.append(satellite)
+        return names, satellites
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+    name = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith('1 ') and i + 1 < len(lines) and lines[i + 1].startswith('2 '):
+            try:
+                satellite = Satrec.twoline2rv(line, lines[i + 1])
+            except ValueError as e:
+                print(f"解析TLE失败: {line}, 错误: {e}")
+            else:
+                names.append(name or line[2:7].strip())
+                satellites.append(satellite)
+            name = None
+            i += 2
+            continue
+        # 三行格式的名称行，可能以 "0 " 开头
+        name = line[2:].strip() if line.startswith('0 ') else line.strip()
+        i += 1
+    return names, satellites
+
+class SatelliteConstellation:
+    """一组卫星，使用向量化的SGP4一次性计算所有卫星的位置"""
+    def __init__(self, file_path):
+        self.names, satellites = load_satellites(file_path)
+        if not satellites:
+            raise ValueError(f"{file_path} 中没有卫星")
+        self.satellites = SatrecArray(satellites)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def positions(self, when):
+        """返回时间when所有卫星的TEME坐标（公里），形状为 (n, 3)，以及计算成功的掩码"""
+        jd, fraction = jday(when.year, when.month, when.day, when.hour, when.minute,
+                            when.second + when.microsecond / 1e6)
+        errors, positions, velocities = self.satellites.sgp4(np.array([jd]), np.array([fraction]))
+        return positions[:, 0, :], errors[:, 0] == 0
+
+# 过境预报的默认时间范围（天）和最低仰角（度）
+PASS_PREDICTION_DAYS = 7
+PASS_MIN_ELEVATION_DEG = 10
+
+def load_ground_stations(file_path):
+    """读取地面站CSV文件，每行为 名称,纬度,经度[,海拔米]（度，东经、北纬为正），返回地面站字典列表
+
+    地面站的地固坐标（公里）和当地天顶方向由WGS84椭球计算。
+    """
+    stations = []
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            try:
+                name = row[0].strip()
+                latitude, longitude = float(row[1]), float(row[2])
+                elevation_m = float(row[3]) if len(row) > 3 and row[3].strip() else 0.0
+            except (IndexError, ValueError):
+                # 表头或格式错误的行
+                if stations or row[0].strip().lower() not in ('name', '名称'):
+                    print(f"跳过地面站文件中的行: {','.join(row)}")
+                continue
+            phi, lam = np.radians(latitude), np.radians(longitude)
+            stations.append({
+                'name': name,
+                'latitude': latitude,
+                'longitude': longitude,
+                'elevation_m': elevation_m,
+                'position': wgs84.latlon(latitude, longitude, elevation_m=elevation_m).itrs_xyz.km,
+                'up': np.array([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)]),
+            })
+    return stations
+
+def julian_dates(start_time, seconds):
+    """start_time之后seconds秒（数组）的儒略日，按SGP4的习惯拆分为 (整数部分, 小数部分)"""
+    jd, fraction = jday(start_time.year, start_time.month, start_time.day, start_time.hour, start_time.minute,
+                        start_time.second + start_time.microsecond / 1e6)
+    fraction = fraction + np.asarray(seconds, dtype=float) / 86400
+    days = np.floor(fraction)
+    return jd + days, fraction - days
+
+def gmst82(jd, fraction):
+    """IAU 1982格林威治平恒星时（弧度），与SGP4的TEME坐标系一致"""
+    t = ((jd - 2451545.0) + fraction) / 36525.0
+    seconds = 67310.54841 + (876600.0 * 3600 + 8640184.812866) * t + 0.093104 * t * t - 6.2e-6 * t ** 3
+    return (seconds % 86400) * (2 * np.pi / 86400)
+
+def teme_to_earth_fixed(positions, theta):
+    """把TEME坐标 (..., n_times, 3) 按恒星时theta（弧度，n_times）绕z轴转到地固坐标系（忽略极移）"""
+    c, s = np.cos(theta), np.sin(theta)
+    x, y = positions[..., 0], positions[..., 1]
+    return np.stack((c * x + s * y, c * y - s * x, positions[..., 2]), axis=-1)
+
+def elevation_sines(earth_fixed, station):
+    """地固坐标 (..., 3) 相对地面站的仰角正弦"""
+    d = earth_fixed - station['position']
+    return (d @ station['up']) / np.linalg.norm(d, axis=-1)
+
+def pass_elevation_sines(satellites, satellite_index, station_positions, station_ups, start_time, sample_seconds):
+    """每次过境在各自的采样时刻（秒，形状 (n_passes, n_samples)）的仰角正弦，每颗卫星调用一次SGP4"""
+    sines = np.empty_like(sample_seconds)
+    order = np.argsort(satellite_index, kind='stable')
+    for rows in np.split(order, np.flatnonzero(np.diff(satellite_index[order])) + 1):
+        jd, fraction = julian_dates(start_time, sample_seconds[rows].ravel())
+        errors, positions, velocities = satellites[satellite_index[rows[0]]].sgp4_array(jd, fraction)
+        d = (teme_to_earth_fixed(positions, gmst82(jd, fraction)).reshape(len(rows), -1, 3)
+             - station_positions[rows, None])
+        values = np.einsum('pwk,pk->pw', d, station_ups[rows]) / np.linalg.norm(d, axis=-1)
+        values[errors.reshape(len(rows), -1) != 0] = -1
+        sines[rows] = values
+    return sines
+
+def find_passes(names, satellites, stations, start_time, end_time, min_elevation_deg=0, step_seconds=60,
+                refinement_steps=(10, 1)):
+    """计算卫星经过地面站的过境（AOS、LOS、最大仰角），返回按AOS排序的过境字典列表
+
+    先用SatrecArray在step_seconds间隔的时间网格上一次性计算所有卫星、所有时刻的仰角，找出越过最低仰角的网格区间；
+    再按refinement_steps（秒）逐级缩小升起、落下和最高点所在的区间，每一级对所有过境一起计算（每颗卫星一次SGP4调用），
+    最后线性插值得到AOS、LOS，抛物线插值得到最大仰角。短于step_seconds的过境可能被漏掉。
+    """
+    n_steps = int((end_time - start_time).total_seconds() // step_seconds) + 1
+    seconds = np.arange(n_steps) * float(step_seconds)
+    jd, fraction = julian_dates(start_time, seconds)
+    errors, positions, velocities = SatrecArray(satellites).sgp4(jd, fraction)
+    earth_fixed = teme_to_earth_fixed(positions, gmst82(jd, fraction))
+    threshold = np.sin(np.radians(min_elevation_deg))
+    
+    # 粗网格：每个 (地面站, 卫星) 的可见区间，first/last为区间内第一个和最后一个网格点
+    found = []
+    for station_index, station in enumerate(stations):
+        sines = elevation_sines(earth_fixed, station)
+        sines[errors != 0] = -1
+        above = sines > threshold
+        edges = np.diff(np.pad(above, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        satellite_index, first = np.nonzero(edges == 1)
+        last = np.nonzero(edges == -1)[1] - 1
+        if not len(first):
+            continue
+        # 每个可见区间内粗网格仰角最大的点
+        visible = np.flatnonzero(above.ravel())
+        segment = np.searchsorted(satellite_index * n_steps + first, visible, side='right') - 1
+        order = np.lexsort((-sines.ravel()[visible], segment))
+        peak = visible[order[np.r_[0, np.flatnonzero(np.diff(segment[order])) + 1]]] % n_steps
+        found.append((np.full(len(first), station_index), satellite_index, first, last, peak))
+    if not found:
+        return []
+    station_index, satellite_index, first, last, peak = (np.concatenate(columns) for columns in zip(*found))
+    station_positions = np.array([station['position'] for station in stations])[station_index]
+    station_ups = np.array([station['up'] for station in stations])[station_index]
+    
+    # 升起区间 [rise, rise+width]、落下区间 [fall, fall+width] 和最高点 peak±width，逐级缩小
+    # 时间范围开始时已在过境或结束时仍在过境的，AOS或LOS取范围的端点，不需要细化
+    rows = np.arange(len(first))
+    rise = seconds[np.maximum(first - 1, 0)]
+    fall = seconds[last]
+    peak = seconds[peak]
+    width = float(step_seconds)
+    for resolution in refinement_steps:
+        resolution = min(float(resolution), width)
+        offsets = np.arange(0, width + resolution / 2, resolution)
+        peak_offsets = np.arange(-width, width + resolution / 2, resolution)
+        n = len(offsets)
+        sample_seconds = np.clip(np.concatenate((rise[:, None] + offsets, fall[:, None] + offsets,
+                                                 peak[:, None] + peak_offsets), axis=1), 0, seconds[-1])
+        samples = pass_elevation_sines(satellites, satellite_index, station_positions, station_ups, start_time,
+                                       sample_seconds)
+        rise_above = samples[:, :n] > threshold
+        fall_above = samples[:, n:2 * n] > threshold
+        # 第一个高于阈值的点之前、最后一个高于阈值的点，以及采样中的最高点
+        rise_index = np.minimum(np.maximum(np.argmax(rise_above, axis=1) - 1, 0), n - 2)
+        rise = rise + offsets[rise_index]
+        fall_index = np.minimum(n - 1 - np.argmax(fall_above[:, ::-1], axis=1), n - 2)
+        fall = fall + offsets[fall_index]
+        peak_samples = samples[:, 2 * n:]
+        j = np.argmax(peak_samples, axis=1)
+        peak = sample_seconds[rows, 2 * n + j]
+        width = resolution
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # AOS、LOS：最后一级采样中越过阈值的相邻两点之间线性插值
+        a, b = samples[rows, rise_index], samples[rows, rise_index + 1]
+        aos = rise + (threshold - a) / (b - a) * width
+        aos = np.where((first > 0) & (a <= threshold) & (b > threshold), aos, seconds[first])
+        a, b = samples[rows, n + fall_index], samples[rows, n + fall_index + 1]
+        los = fall + (a - threshold) / (a - b) * width
+        los = np.where((last < n_steps - 1) & (a > threshold) & (b <= threshold), los, seconds[last])
+        
+        # 最大仰角：最后一级采样的最高点与相邻两点做抛物线插值
+        elevations = np.degrees(np.arcsin(np.clip(peak_samples, -1, 1)))
+        inner = np.clip(j, 1, len(peak_offsets) - 2)
+        a, b, c = (elevations[rows, inner + i] for i in (-1, 0, 1))
+        curvature = a - 2 * b + c
+        shift = np.where((j == inner) & (curvature < 0), 0.5 * (a - c) / curvature, 0)
+        max_elevation = np.where(shift != 0, b - 0.25 * (a - c) * shift, elevations[rows, j])
+        max_offset = np.clip(peak + shift * width, 0, seconds[-1])
+    
+    passes = []
+    for i in np.lexsort((satellite_index, station_index, aos)):
+        passes.append({
+            'station': stations[station_index[i]]['name'],
+            'satellite': names[satellite_index[i]],
+            'aos': start_time + datetime.timedelta(seconds=float(aos[i])),
+            'los': start_time + datetime.timedelta(seconds=float(los[i])),
+            'max_elevation': float(max_elevation[i]),
+            'max_time': start_time + datetime.timedelta(seconds=float(max_offset[i])),
+        })
+    return passes
+
+# 每个过境计算进程中的卫星列表（Satrec不能序列化，由初始化函数从文件读取一次）
+_pass_satellites = None
+
+def _init_pass_worker(satellite_path):
+    """进程池初始化函数：在每个进程中读取一次卫星文件"""
+    global _pass_satellites
+    _pass_satellites = load_satellites(satellite_path)
+
+def _predict_passes_chunk(first, last, stations, start_time, end_time, min_elevation_deg, step_seconds):
+    """在当前进程中计算第first到last颗卫星的过境"""
+    names, satellites = _pass_satellites
+    return find_passes(names[first:last], satellites[first:last], stations, start_time, end_time,
+                       min_elevation_deg, step_seconds)
+
+def predict_passes(satellite_path, stations, start_time, end_time, min_elevation_deg=0, step_seconds=60,
+                   workers=None, max_samples_per_chunk=2000000):
+    """预报卫星文件中所有卫星经过各地面站的过境，按AOS排序
+
+    卫星按段分配到进程池中并行计算；每段的卫星数受max_samples_per_chunk（卫星数×时间网格点数）限制，
+    控制每个进程中位置数组占用的内存。workers为1时在当前进程中计算。
+    """
+    names, satellites = load_satellites(satellite_path)
+    if not satellites or not stations:
+        return []
+
+    n_steps = int((end_time - start_time).total_seconds() // step_seconds) + 1
+    workers = workers or os.cpu_count() or 1
+    n_chunks = min(len(satellites), max(workers * 4, -(-len(satellites) * n_steps // max_samples_per_chunk)))
+    bounds = [i * len(satellites) // n_chunks for i in range(n_chunks + 1)]
+
+    start = time.perf_counter()
+    passes = []
+    if workers == 1:
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            passes.extend(find_passes(names[first:last], satellites[first:last], stations, start_time, end_time,
+                                      min_elevation_deg, step_seconds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_pass_worker, initargs=(satellite_path,)) as pool:
+            n = len(bounds) - 1
+            for chunk in pool.map(_predict_passes_chunk, bounds[:-1], bounds[1:], [stations] * n,
+                                  [start_time] * n, [end_time] * n, [min_elevation_deg] * n, [step_seconds] * n):
+                passes.extend(chunk)
+    passes.sort(key=lambda p: (p['aos'], p['station'], p['satellite']))
+    print(f"过境预报: {len(satellites)} 颗卫星, {len(stations)} 个地面站, {len(passes)} 次过境, "
+          f"用时 {time.perf_counter() - start:.1f} 秒")
+    return passes
+
+def write_passes_csv(passes, file_path):
+    """把过境列表导出为CSV文件（时间为ISO格式的UTC）"""
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['station', 'satellite', 'aos_utc', 'los_utc', 'max_elevation_deg', 'max_elevation_utc'])
+        for p in passes:
+            writer.writerow([p['station'], p['satellite'], p['aos'].isoformat(timespec='seconds'),
+                             p['los'].isoformat(timespec='seconds'), f"{p['max_elevation']:.2f}",
+                             p['max_time'].isoformat(timespec='seconds')])
+
+class EphemerisPrefetcher:
+    """在后台线程中预先计算星历，并以双缓冲的方式发布结果
+    
+    前台缓冲是界面线程正在读取的时间窗口，后台缓冲是工作线程沿播放方向算好的下一段。
+    界面线程只读取已经发布的窗口，查询不到时提交计算请求并立即返回None，从不等待计算。
+    """
+    def __init__(self, engine, profiler=None):
+        self.engine = engine
+        # 可选的FrameProfiler，记录后台计算的耗时
+        self.profiler = profiler
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ephemeris')
+        self.lock = threading.Lock()
+        self.front = None
+        self.back = None
+        # 正在计算的请求: (起始时间, 步长)
+        self.pending = None
+    
+    def request(self, start_time, step_seconds):
+        """提交一个从start_time开始的时间窗口计算请求，已有请求在计算时忽略"""
+        with self.lock:
+            if self.pending is not None:
+                return
+            self.pending = (start_time, step_seconds)
+        future = self.executor.submit(self.compute, start_time, step_seconds)
+        future.add_done_callback(self.publish)
+    
+    def compute(self, start_time, step_seconds):
+        """在工作线程中计算一个时间窗口"""
+        if self.profiler is None:
+            return self.engine.window(start_time, step_seconds, self.engine.lookahead)
+        with self.profiler.stage('ephemeris window'):
+            return self.engine.window(start_time, step_seconds, self.engine.lookahead)
+    
+    def publish(self, future):
+        """工作线程计算完成后发布到后台缓冲"""
+        try:
+            window = future.result()
+        except Exception as e:
+            print(f"后台星历计算失败: {e}")
+            window = None
+        with self.lock:
+            if window is not None:
+                self.back = window
+            self.pending = None
+    
+    def lookup(self, when, step_seconds=0):
+        """查询时间when的所有天体位置和GMST，结果尚未算好时返回None
+        
+        返回 (positions, gmst_hours)，positions形状为 (n_bodies, 3)
+        """
+        with self.lock:
+            front, back = self.front, self.back
+        
+        window, index = None, None
+        if front is not None:
+            window, index = front, front.index_of(when)
+        if index is None and back is not None:
+            window, index = back, back.index_of(when)
+            if index is not None:
+                # 播放进入后台缓冲，交换前后台
+                with self.lock:
+                    self.front, self.back = back, None
+                front, back = back, None
+        
+        if index is None:
+            self.request(when, step_seconds)
+            return None
+        
+        if step_seconds != window.step_seconds:
+            # 步长或方向变化，从当前时间按新步长预取
+            if back is None or back.step_seconds != step_seconds:
+                self.request(when, step_seconds)
+        elif back is None and step_seconds != 0 and index >= len(window) // 2:
+            # 当前窗口用过一半，沿播放方向预取紧接着的下一段（已到星历文件的范围边界时不再预取）
+            next_start = window.start_time + datetime.timedelta(seconds=len(window) * window.step_seconds)
+            if self.engine.covers(next_start):
+                self.request(next_start, step_seconds)
+        
+        return window.positions[:, index, :], window.gmst_hours[index]
+    
+    def shutdown(self):
+        """停止工作线程"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# 滑块步长对应的墙钟时间（秒）：滑块选择的是每0.1秒墙钟时间推进的仿真秒数
+SIMULATION_STEP_INTERVAL = 0.1
+
+# 滑块值到仿真步长（每个SIMULATION_STEP_INTERVAL墙钟时间推进的仿真秒数）的映射
+SIMULATION_STEP_MAPPING = {
+    -7: -86400,  # -24h
+    -6: -21600,  # -6h
+    -5: -3600,   # -3600s
+    -4: -300,    # -300s
+    -3: -60,     # -60s
+    -2: -10,     # -10s
+    -1: -1,      # -1s
+    0: 0,        # 0s
+    1: 1,        # 1s
+    2: 10,       # 10s
+    3: 60,       # 60s
+    4: 300,      # 300s
+    5: 3600,     # 3600s
+    6: 21600,    # 6h
+    7: 86400     # 24h
+}
+
+class SimulationClock:
+    """与渲染解耦的固定步长仿真时钟
+    
+    仿真时间按墙钟时间推进：每经过一个固定步长（1/target_fps秒）的墙钟时间推进一步，
+    与每帧的计算和渲染耗时无关。计算落后时，一次回调中累积的多个步合并推进，
+    中间帧被丢弃，只渲染最新的一帧，因此播放速度保持准确。
+    """
+    def __init__(self, target_fps=30):
+        self.target_fps = target_fps
+        self.reset()
+    
+    @property
+    def tick_interval(self):
+        """固定步长对应的墙钟时间（秒）"""
+        return 1.0 / self.target_fps
+    
+    def reset(self, now=None):
+        """重新开始计时（暂停期间的墙钟时间不计入仿真）"""
+        self.last_time = time.perf_counter() if now is None else now
+        self.accumulator = 0.0
+        self.frame_times = deque(maxlen=max(2, int(self.target_fps * 2)))
+        self.dropped_frames = 0
+    
+    def advance(self, now=None):
+        """返回自上次调用以来到期的固定步数"""
+        now = time.perf_counter() if now is None else now
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        ticks = int(self.accumulator // self.tick_interval)
+        self.accumulator -= ticks * self.tick_interval
+        if ticks > 1:
+            self.dropped_frames += ticks - 1
+        return ticks
+    
+    def record_frame(self, now=None):
+        """记录一帧渲染完成的时间，用于统计实际帧率"""
+        self.frame_times.append(time.perf_counter() if now is None else now)
+    
+    def achieved_fps(self):
+        """最近约2秒内的实际帧率"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+class FrameProfiler:
+    """逐帧性能统计
+    
+    按阶段记录每帧的耗时，保留最近history帧用于计算p50/p95/最大值；
+    开始录制后同时记录Chrome trace格式的时间线事件，可在 chrome://tracing 或 Perfetto 中查看。
+    可以在任意线程中使用。
+    """
+    def __init__(self, history=300, max_trace_events=1000000):
+        self.history = history
+        self.max_trace_events = max_trace_events
+        self.lock = threading.Lock()
+        # 阶段名称 -> 最近的耗时（毫秒）
+        self.durations = {}
+        self.trace_events = None
+        self.frame_start = None
+        self.origin = time.perf_counter()
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """统计一个阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+    
+    def record(self, name, start, end):
+        """记录一个阶段从start到end（perf_counter秒）的耗时"""
+        with self.lock:
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = deque(maxlen=self.history)
+            durations.append((end - start) * 1000)
+            if self.trace_events is not None and len(self.trace_events) < self.max_trace_events:
+                self.trace_events.append({
+                    'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                    'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+                })
+    
+    def begin_frame(self):
+        """一帧开始"""
+        self.frame_start = time.perf_counter()
+    
+    def end_frame(self):
+        """一帧结束，整帧耗时记为'frame'阶段"""
+        if self.frame_start is not None:
+            self.record('frame', self.frame_start, time.perf_counter())
+            self.frame_start = None
+    
+    def statistics(self):
+        """返回 {阶段名称: (p50, p95, 最大值)}，单位毫秒"""
+        with self.lock:
+            samples = {name: np.array(durations) for name, durations in self.durations.items() if durations}
+        return {name: (np.percentile(values, 50), np.percentile(values, 95), values.max())
+                for name, values in samples.items()}
+    
+    def summary(self):
+        """多行的统计文本，用于屏幕上的性能面板"""
+        # VTK默认字体不含中文字形，面板文本只使用ASCII
+        lines = [f"{'stage':<16}{'p50':>8}{'p95':>8}{'max':>8} ms"]
+        for name, (p50, p95, worst) in sorted(self.statistics().items()):
+            lines.append(f"{name:<16}{p50:8.2f}{p95:8.2f}{worst:8.2f}")
+        if self.tracing:
+            lines.append(f"tracing: {len(self.trace_events)} events")
+        return "\n".join(lines)
+    
+    @property
+    def tracing(self):
+        return self.trace_events is not None
+    
+    def start_trace(self):
+        """开始录制时间线"""
+        with self.lock:
+            self.trace_events = []
+    
+    def stop_trace(self, file_path):
+        """停止录制并把时间线写入Chrome trace格式的JSON文件，返回事件数"""
+        with self.lock:
+            events, self.trace_events = self.trace_events or [], None
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+class LabelManager:
+    """三维文本标签管理器
+    
+    每个标签只在第一次出现时创建一个演员，之后只原地更新锚点位置，
+    文本只在格式化后的字符串变化时才更新，稳定播放时不再分配新的演员。
+    """
+    def __init__(self, plotter, font_size=8, registry=None, layer=None):
+        self.plotter = plotter
+        self.font_size = font_size
+        # 新建的标签演员登记到场景演员登记表的layer图层中
+        self.registry = registry
+        self.layer = layer
+        # 标签键 -> 演员
+        self.actors = {}
+        # 标签键 -> 当前显示的文本
+        self.texts = {}
+    
+    def update(self, key, text, position, color='white'):
+        """创建或原地更新标签，返回标签演员"""
+        actor = self.actors.get(key)
+        if actor is None:
+            actor = vtkBillboardTextActor3D()
+            text_property = actor.GetTextProperty()
+            text_property.SetFontSize(int(self.font_size * 2))
+            text_property.SetColor(pv.Color(color).float_rgb)
+            self.plotter.add_actor(actor, reset_camera=False, name=f'label_{key}', pickable=False)
+            self.actors[key] = actor
+            if self.registry is not None:
+                self.registry.add(self.layer, f'label_{key}', actor)
+        
+        actor.SetPosition(position[0], position[1], position[2])
+        if self.texts.get(key) != text:
+            actor.SetInput(text)
+            self.texts[key] = text
+        return actor
+    
+    def set_visibility(self, visible):
+        """设置所有标签的可见性"""
+        for actor in self.actors.values():
+            actor.SetVisibility(visible)
+
+class SceneRegistry:
+    """场景演员登记表
+    
+    每个演员按图层（如'stars'、'solar_system'）登记，图层的显示和隐藏一次设置该层的所有演员；
+    可以统计每个图层的演员数量和几何数据、纹理占用的内存，并列出渲染器中未登记的演员以便发现泄漏。
+    反复出现的临时演员（如不同网格间距的刻度标签）用完后隐藏并放回对象池，再次需要时直接取出。
+    """
+    def __init__(self, plotter, pool_size=8):
+        self.plotter = plotter
+        # 每个图层的对象池最多保留的空闲演员数量
+        self.pool_size = pool_size
+        # 图层 -> {名称: 演员}
+        self.layers = {}
+        # 图层 -> 是否显示
+        self.visibility = {}
+        # 图层 -> {池键: 空闲演员}，按放回的先后排列
+        self.pools = {}
+        # (图层, 名称) -> 从对象池取出时的池键
+        self.pool_keys = {}
+    
+    def add(self, layer, name, actor):
+        """登记演员并返回演员；同名的旧演员从场景中移除，隐藏的图层中新演员也隐藏"""
+        if actor is None:
+            return None
+        actors = self.layers.setdefault(layer, {})
+        old = actors.get(name)
+        if old is not None and old is not actor:
+            self.remove(layer, name)
+        actors[name] = actor
+        if not self.is_visible(layer):
+            actor.SetVisibility(False)
+        return actor
+    
+    def add_props(self, layer, name, add):
+        """调用add()并把期间加入渲染器的所有演员登记为name、name_1、...，返回add()的结果
+        
+        用于pyvista中会顺带添加辅助演员的调用（如坐标轴的方向标记会在主渲染器中加入一个二维演员）。
+        """
+        before = {prop.GetAddressAsString('vtkObject') for prop in self.renderer_props()}
+        result = add()
+        added = [prop for prop in self.renderer_props() if prop.GetAddressAsString('vtkObject') not in before]
+        for i, prop in enumerate(added):
+            self.add(layer, name if i == 0 else f'{name}_{i}', prop)
+        return result
+    
+    def get(self, layer, name):
+        """按图层和名称查找演员，未登记时返回None"""
+        return self.layers.get(layer, {}).get(name)
+    
+    def actors(self, layer):
+        """图层中的所有演员"""
+        return list(self.layers.get(layer, {}).values())
+    
+    def remove(self, layer, name):
+        """从场景中移除演员并取消登记"""
+        actor = self.layers.get(layer, {}).pop(name, None)
+        self.pool_keys.pop((layer, name), None)
+        if actor is not None:
+            self.plotter.remove_actor(actor, render=False)
+    
+    def is_visible(self, layer):
+        return self.visibility.get(layer, True)
+    
+    def set_visible(self, layer, visible):
+        """显示或隐藏整个图层"""
+        visible = bool(visible)
+        self.visibility[layer] = visible
+        for actor in self.layers.get(layer, {}).values():
+            actor.SetVisibility(visible)
+    
+    def acquire(self, layer, name, key, factory):
+        """从图层的对象池中取出池键为key的演员登记为name，池中没有时调用factory()创建
+        
+        name原来的演员放回对象池；factory创建的演员在pyvista中的名称必须随key不同，否则会互相替换。
+        """
+        if self.pool_keys.get((layer, name)) == key:
+            return self.get(layer, name)
+        self.release(layer, name)
+        actor = self.pools.get(layer, {}).pop(key, None)
+        if actor is None:
+            actor = factory()
+        self.add(layer, name, actor)
+        actor.SetVisibility(self.is_visible(layer))
+        self.pool_keys[(layer, name)] = key
+        return actor
+    
+    def release(self, layer, name):
+        """隐藏name的演员并放回对象池，对象池超过pool_size时移除最早放回的演员"""
+        key = self.pool_keys.pop((layer, name), None)
+        actor = self.layers.get(layer, {}).pop(name, None)
+        if actor is None:
+            return
+        if key is None:
+            self.plotter.remove_actor(actor, render=False)
+            return
+        actor.SetVisibility(False)
+        pool = self.pools.setdefault(layer, {})
+        pool[key] = actor
+        while len(pool) > self.pool_size:
+            self.plotter.remove_actor(pool.pop(next(iter(pool))), render=False)
+    
+    def counts(self):
+        """每个图层的 (使用中的演员数, 对象池中的空闲演员数)"""
+        layers = dict.fromkeys(list(self.layers) + list(self.pools))
+        return {layer: (len(self.layers.get(layer, {})), len(self.pools.get(layer, {}))) for layer in layers}
+    
+    @staticmethod
+    def actor_resources(actor):
+        """演员引用的数据集和纹理"""
+        resources = []
+        algorithm = actor.GetMapper() if hasattr(actor, 'GetMapper') else None
+        # 管线尚未执行时（如首次渲染前）映射器的输入为空，沿管线向上找到已有数据的输入
+        while algorithm is not None and algorithm.GetNumberOfInputPorts() > 0 and algorithm.GetNumberOfInputConnections(0) > 0:
+            data = algorithm.GetInputDataObject(0, 0)
+            if data is None or not hasattr(data, 'GetNumberOfPoints') or data.GetNumberOfPoints() > 0:
+                resources.append(data)
+                break
+            algorithm = algorithm.GetInputAlgorithm(0, 0)
+        texture = actor.GetTexture() if hasattr(actor, 'GetTexture') else None
+        if texture is not None:
+            resources.append(texture)
+        return [resource for resource in resources if resource is not None]
+    
+    @staticmethod
+    def resource_bytes(resource):
+        """数据集或纹理的 (内存字节数, 估计的显存字节数)
+        
+        显存按上传的内容估计：顶点坐标为float32，点数据数组和单元连接按原大小，纹理为8位像素（有多级纹理时加1/3）。
+        """
+        if hasattr(resource, 'GetMipmap'):
+            image = resource.GetInputDataObject(0, 0)
+            if image is None:
+                return 0, 0
+            width, height, depth = image.GetDimensions()
+            scalars = image.GetPointData().GetScalars()
+            components = scalars.GetNumberOfComponents() if scalars is not None else 3
+            gpu = width * height * depth * components
+            if resource.GetMipmap():
+                gpu = gpu * 4 // 3
+            return image.GetActualMemorySize() * 1024, gpu
+        
+        if not hasattr(resource, 'GetNumberOfPoints'):
+            return resource.GetActualMemorySize() * 1024, 0
+        # vtkPolyData.GetActualMemorySize()还计入了从文件读取的网格缓存的单元结构，远大于实际占用，这里只累加各个数组
+        parts = [resource.GetPointData(), resource.GetCellData(), resource.GetFieldData()]
+        if resource.GetPoints() is not None:
+            parts.append(resource.GetPoints().GetData())
+        if hasattr(resource, 'GetPolys'):
+            parts.extend([resource.GetVerts(), resource.GetLines(), resource.GetPolys(), resource.GetStrips()])
+        cpu = sum(part.GetActualMemorySize() for part in parts) * 1024
+        gpu = resource.GetNumberOfPoints() * 12
+        point_data = resource.GetPointData()
+        for i in range(point_data.GetNumberOfArrays()):
+            array = point_data.GetAbstractArray(i)
+            if array is not None and hasattr(array, 'GetDataTypeSize'):
+                gpu += array.GetNumberOfValues() * array.GetDataTypeSize()
+        if hasattr(resource, 'GetPolys'):
+            for cells in (resource.GetVerts(), resource.GetLines(), resource.GetPolys(), resource.GetStrips()):
+                gpu += cells.GetNumberOfConnectivityIds() * 4
+        return cpu, gpu
+    
+    def memory(self):
+        """每个图层的 (内存字节数, 估计的显存字节数)，多个演员共享的数据集和纹理只计算一次"""
+        seen = set()
+        usage = {}
+        for layer in dict.fromkeys(list(self.layers) + list(self.pools)):
+            cpu = gpu = 0
+            for actor in self.actors(layer) + list(self.pools.get(layer, {}).values()):
+                for resource in self.actor_resources(actor):
+                    address = resource.GetAddressAsString('vtkObject')
+                    if address in seen:
+                        continue
+                    seen.add(address)
+                    resource_cpu, resource_gpu = self.resource_bytes(resource)
+                    cpu += resource_cpu
+                    gpu += resource_gpu
+            usage[layer] = (cpu, gpu)
+        return usage
+    
+    def untracked(self):
+        """渲染器中没有登记（也不在对象池中）的演员，正常情况下应为空"""
+        registered = set()
+        for actors in list(self.layers.values()) + list(self.pools.values()):
+            registered.update(actor.GetAddressAsString('vtkObject') for actor in actors.values())
+        return [prop for prop in self.renderer_props() if prop.GetAddressAsString('vtkObject') not in registered]
+    
+    def renderer_props(self):
+        """主渲染器中的所有演员"""
+        props = self.plotter.renderer.GetViewProps()
+        return [props.GetItemAsObject(i) for i in range(props.GetNumberOfItems())]
+    
+    def summary(self):
+        """每个图层的演员数量和内存占用，返回多行文本（只使用ASCII，可以显示在性能面板中）"""
+        counts = self.counts()
+        memory = self.memory()
+        lines = [f"{'layer':<22}{'actors':>7}{'pool':>5}{'cpu MB':>8}{'gpu MB':>8}"]
+        for layer, (active, pooled) in counts.items():
+            cpu, gpu = memory.get(layer, (0, 0))
+            lines.append(f"{layer:<22}{active:>7}{pooled:>5}{cpu / 2**20:8.1f}{gpu / 2**20:8.1f}")
+        untracked = self.untracked()
+        if untracked:
+            lines.append(f"untracked: {len(untracked)} ({', '.join(sorted({prop.GetClassName() for prop in untracked}))})")
+        return '\n'.join(lines)
+
+# 附加视图的参考系：(控制面板中的名称, 视图左上角的标题)
+SCENE_VIEW_FRAMES = {
+    'inertial': ('惯性视图', 'Inertial'),
+    'earth_fixed': ('地固视图', 'Earth-fixed'),
+    'moon': ('月球视图', 'Moon'),
+}
+
+class SceneView:
+    """与主视图同步的附加视图
+    
+    视图中的三维演员都是场景演员登记表中演员的镜像：共享输入数据、材质和地球/星空变换矩阵，
+    只有映射器和纹理对象各自一份（显卡资源属于各自的渲染窗口），不复制网格和图像数据。
+    仿真每步只更新一次场景，各视图在渲染前同步镜像的位置和可见性，并按参考系移动相机：
+    inertial 相机不动，earth_fixed 相机随地球自转，moon 相机跟随月球。
+    """
+    # 不在附加视图中显示的图层；文字标签只在主视图中显示
+    skipped_layers = ('axes', 'hud')
+    
+    def __init__(self, scene, plotter, frame='inertial'):
+        self.scene = scene
+        self.plotter = plotter
+        self.frame = frame
+        # 原演员地址 -> [原演员, 镜像演员, 原映射器]
+        self.mirrors = {}
+        # 原映射器地址 -> 镜像的映射器（地球切换细节级别后再切回时重复使用）
+        self.mappers = {}
+        self.light = None
+        self.last_gmst_rad = None
+        self.last_moon_position = None
+        
+        plotter.add_text(SCENE_VIEW_FRAMES[frame][1], position='upper_left', font_size=10, color='white', name='view_title')
+        plotter.camera_position = scene.plotter_widget.camera_position
+        plotter.enable_terrain_style()
+    
+    def mirror_mapper(self, mapper):
+        """映射器的镜像：相同的设置，输入连接到同一个管线输出"""
+        address = mapper.GetAddressAsString('vtkObject')
+        copy = self.mappers.get(address)
+        if copy is None:
+            copy = mapper.NewInstance()
+            copy.ShallowCopy(mapper)
+            copy.SetInputConnection(mapper.GetInputConnection(0, 0))
+            self.mappers[address] = copy
+        return copy
+    
+    def mirror(self, actor):
+        """在本视图中创建演员的镜像"""
+        mirror = vtkActor()
+        mirror.SetMapper(self.mirror_mapper(actor.GetMapper()))
+        mirror.SetProperty(actor.GetProperty())
+        if actor.GetBackfaceProperty() is not None:
+            mirror.SetBackfaceProperty(actor.GetBackfaceProperty())
+        texture = actor.GetTexture()
+        if texture is not None:
+            # 纹理图像共享，显卡上的纹理对象各自一份
+            copy = vtkTexture()
+            copy.SetInputConnection(texture.GetInputConnection(0, 0))
+            copy.SetInterpolate(texture.GetInterpolate())
+            copy.SetMipmap(texture.GetMipmap())
+            copy.SetRepeat(texture.GetRepeat())
+            copy.SetEdgeClamp(texture.GetEdgeClamp())
+            copy.SetColorMode(texture.GetColorMode())
+            mirror.SetTexture(copy)
+        # 共享同一个矩阵对象，地球自转和岁差章动原地更新后所有视图同时生效
+        mirror.SetUserMatrix(actor.GetUserMatrix())
+        mirror.SetPickable(False)
+        self.plotter.renderer.AddActor(mirror)
+        return mirror
+    
+    def sync_actors(self):
+        """为新登记的演员创建镜像，移除已经不在登记表中的镜像，同步位置、可见性和映射器"""
+        seen = set()
+        for layer, actors in self.scene.scene_actors.layers.items():
+            if layer in self.skipped_layers:
+                continue
+            for actor in actors.values():
+                if not isinstance(actor, vtkActor):
+                    continue
+                address = actor.GetAddressAsString('vtkObject')
+                seen.add(address)
+                entry = self.mirrors.get(address)
+                if entry is None:
+                    entry = self.mirrors[address] = [actor, self.mirror(actor), actor.GetMapper()]
+                original, mirror, mapper = entry
+                if original.GetMapper() is not mapper:
+                    # 地球更换了细节级别
+                    entry[2] = original.GetMapper()
+                    mirror.SetMapper(self.mirror_mapper(entry[2]))
+                mirror.SetVisibility(original.GetVisibility())
+                mirror.SetPosition(original.GetPosition())
+        for address in [address for address in self.mirrors if address not in seen]:
+            self.plotter.renderer.RemoveActor(self.mirrors.pop(address)[1])
+        
+        light = getattr(self.scene, 'sun_light', None)
+        if light is not None and light is not self.light:
+            self.plotter.renderer.AddLight(light)
+            self.light = light
+    
+    def update_camera(self):
+        """按视图的参考系移动相机，保留用户在视图中的旋转和缩放"""
+        camera = self.plotter.camera
+        if self.frame == 'earth_fixed':
+            gmst_rad = self.scene.last_gmst_rad
+            if gmst_rad is not None and self.last_gmst_rad is not None and gmst_rad != self.last_gmst_rad:
+                rotation = rotation_matrix_z(gmst_rad - self.last_gmst_rad)[:3, :3]
+                camera.position = tuple(rotation @ np.array(camera.position))
+                camera.focal_point = tuple(rotation @ np.array(camera.focal_point))
+                camera.up = tuple(rotation @ np.array(camera.up))
+            self.last_gmst_rad = gmst_rad
+        elif self.frame == 'moon':
+            moon = self.scene.scene_actors.get('solar_system', 'moon')
+            if moon is None:
+                return
+            position = np.array(moon.GetPosition())
+            if self.last_moon_position is None:
+                # 从地球一侧看向月球，月球后面是星空
+                direction = position / np.linalg.norm(position)
+                distance = self.scene.bodies['moon']['size'] * 12
+                self.plotter.camera_position = (tuple(position - direction * distance), tuple(position), (0, 0, 1))
+            else:
+                camera.position = tuple(np.array(camera.position) + position - self.last_moon_position)
+                camera.focal_point = tuple(position)
+            self.last_moon_position = position
+        self.plotter.renderer.ResetCameraClippingRange()
+    
+    def update(self):
+        """渲染前同步镜像演员和相机"""
+        self.sync_actors()
+        self.update_camera()
+    
+    def render(self):
+        self.update()
+        self.plotter.render()
+    
+    def close(self):
+        self.plotter.close()
+
+# 天球（星空背景和日月行星所在的球面）半径
+SKY_RADIUS = 1000000
+
+# 天球网格可选的间距（度），视野缩小时依次加密
+SKY_GRID_SPACINGS = (30, 15, 10, 5, 2, 1)
+
+# 星空纹理的候选文件，按优先顺序排列，使用第一个存在的文件
+SKY_TEXTURE_FILES = ('textures/starmap_8k_flipped.jpg', 'textures/starmap_4k_flipped.jpg')
+CONSTELLATION_TEXTURE_FILES = ('textures/constellation_figures_flipped.jpg',)
+
+class TextureCache:
+    """预解码的多级纹理缓存
+    
+    每张源图片只在第一次使用时解码一次，逐级缩小一半生成多级纹理，
+    以未压缩的.npy文件保存在缓存目录中；以后启动时直接读取所需的那一级，不再解码JPEG。
+    源文件的修改时间或大小变化时重新生成。
+    """
+    def __init__(self, cache_dir='texture_cache', min_width=256):
+        self.cache_dir = cache_dir
+        # 最小一级纹理的宽度
+        self.min_width = min_width
+    
+    def source_key(self, source_path):
+        """缓存文件名前缀：源文件名加上绝对路径的哈希，避免同名文件冲突"""
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        digest = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:8]
+        return f"{name}_{digest}"
+    
+    def levels(self, source_path):
+        """返回源图片各级纹理的 [(宽, 高, 文件路径)]，按宽度从大到小排列，缓存无效时重新生成"""
+        key = self.source_key(source_path)
+        manifest_path = os.path.join(self.cache_dir, f"{key}.json")
+        stat = os.stat(source_path)
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['mtime_ns'] == stat.st_mtime_ns and manifest['size'] == stat.st_size:
+                levels = [(w, h, os.path.join(self.cache_dir, name)) for w, h, name in manifest['levels']]
+                if all(os.path.exists(path) for _, _, path in levels):
+                    return levels
+        except (OSError, ValueError, KeyError):
+            pass
+        return self.build_levels(source_path, key, manifest_path, stat)
+    
+    def build_levels(self, source_path, key, manifest_path, stat):
+        """解码源图片并生成所有级别的纹理"""
+        start = time.perf_counter()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        image = pv.read_texture(source_path).to_array()
+        
+        entries = []
+        while True:
+            height, width = image.shape[:2]
+            name = f"{key}_{width}x{height}.npy"
+            path = os.path.join(self.cache_dir, name)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, image)
+            os.replace(tmp_path, path)
+            entries.append((width, height, name))
+            if width // 2 < self.min_width or height < 2:
+                break
+            # 2x2 像素取平均缩小一半
+            h2, w2 = height // 2, width // 2
+            blocks = image[:h2 * 2, :w2 * 2].reshape(h2, 2, w2, 2, -1).astype(np.uint16)
+            image = ((blocks.sum(axis=(1, 3)) + 2) // 4).astype(np.uint8)
+        
+        manifest = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'levels': entries}
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+        print(f"纹理缓存: 新建 {os.path.basename(source_path)}，共 {len(entries)} 级，"
+              f"用时 {(time.perf_counter() - start) * 1000:.0f} ms")
+        return [(w, h, os.path.join(self.cache_dir, name)) for w, h, name in entries]
+    
+    @staticmethod
+    def select_level(levels, target_width=None, max_size=None):
+        """选择纹理级别：不超过max_size的级别中，取宽度不小于target_width的最小一级，都不够时取最大的一级"""
+        fitting = [level for level in levels if not max_size or max(level[0], level[1]) <= max_size]
+        if not fitting:
+            # 连最小一级都超过限制，只能使用最小一级
+            return levels[-1]
+        if target_width:
+            sufficient = [level for level in fitting if level[0] >= target_width]
+            if sufficient:
+                return sufficient[-1]
+        return fitting[0]
+    
+    def load(self, source_paths, target_width=None, max_size=None):
+        """从候选源文件中第一个存在的文件加载合适级别的纹理，都不存在时返回None"""
+        for source_path in source_paths:
+            if os.path.exists(source_path):
+                break
+        else:
+            print(f"未找到纹理文件: {', '.join(source_paths)}")
+            return None
+        
+        try:
+            levels = self.levels(source_path)
+        except OSError as e:
+            # 缓存目录不可写时直接使用源图片
+            print(f"纹理缓存不可用 ({e})，直接读取 {source_path}")
+            return pv.read_texture(source_path)
+        width, height, path = self.select_level(levels, target_width, max_size)
+        print(f"纹理 {os.path.basename(source_path)}: 使用 {width}x{height}")
+        return pv.Texture(np.load(path))
+
+class TrailBuffer:
+    """多条固定容量的环形轨迹，全部放在同一个PolyData中
+    
+    每条轨迹占用capacity个点，相邻点之间各有一条两点线段，连接数组只在创建时分配一次。
+    追加一个位置时只写入一个点，并改写两条线段：把上一个点连到新点，
+    把新点到最旧点之间的线段改为退化线段（两端相同，不可见），因此每帧的开销与轨迹长度无关。
+    """
+    def __init__(self, n_trails, capacity=2000):
+        self.n_trails = n_trails
+        self.capacity = capacity
+        n_points = n_trails * capacity
+        
+        # 所有线段初始都是退化的 (i, i)
+        ids = np.arange(n_points)
+        lines = np.column_stack([np.full(n_points, 2), ids, ids]).ravel()
+        self.mesh = pv.PolyData(np.zeros((n_points, 3)), lines=lines)
+        
+        # 直接读写VTK数组的numpy视图
+        self.points = self.mesh.points
+        self.connectivity = vtk_to_numpy(self.mesh.GetLines().GetConnectivityArray())
+        # 每条轨迹第一个点的序号
+        self.offsets = np.arange(n_trails) * capacity
+        self.head = 0
+        self.count = 0
+    
+    def append(self, positions):
+        """为每条轨迹追加一个位置，positions形状为 (n_trails, 3)"""
+        head = self.head
+        new_ids = self.offsets + head
+        self.points[new_ids] = positions
+        
+        # 线段k连接点k和点k+1；新点所在的线段作为缺口，断开最新点与最旧点
+        self.connectivity[2 * new_ids] = new_ids
+        self.connectivity[2 * new_ids + 1] = new_ids
+        if self.count > 0:
+            previous_ids = self.offsets + (head - 1) % self.capacity
+            self.connectivity[2 * previous_ids + 1] = new_ids
+        
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.mesh.GetPoints().Modified()
+        self.mesh.GetLines().Modified()
+        self.mesh.Modified()
+    
+    def clear(self):
+        """清空所有轨迹"""
+        ids = np.arange(self.n_trails * self.capacity)
+        self.connectivity[0::2] = ids
+        self.connectivity[1::2] = ids
+        self.head = 0
+        self.count = 0
+        self.mesh.GetLines().Modified()
+        self.mesh.Modified()
+
+class SkyScene:
+    """天空场景：地球、星空、恒星、日月行星和天球网格
+    
+    与Qt界面无关，只通过 self.plotter_widget 操作PyVista绘图器，
+    既用于主窗口，也可以配合离屏的 pv.Plotter 批量导出图片。
+    """
+    def init_sky_scene(self, plotter, simulation_time=None, star_catalog_path=None, max_texture_size=None,
+                       satellite_path=None, station_path=None):
+        """初始化场景状态，plotter为任意PyVista绘图器，max_texture_size限制纹理的最大边长"""
+        self.plotter_widget = plotter
+        
+        # 初始化仿真时间为当前时间
+        if simulation_time is None:
+            simulation_time = datetime.datetime.now(datetime.timezone.utc)
+        self.simulation_time = simulation_time
+        
+        # 初始化地球自转速度
+        self.earth_rotation_speed = 1.0
+        
+        # 场景中所有演员按图层登记，图层的显示开关、演员数量和内存统计都通过登记表
+        self.scene_actors = SceneRegistry(plotter)
+        # 太阳位置的光源
+        self.sun_light = None
+        
+        # 可选的二进制分块星表（由 --convert-star-catalog 生成）
+        self.star_catalog_path = star_catalog_path
+        
+        # 可选的卫星TLE/OMM文件
+        self.satellite_path = satellite_path
+        
+        # 可选的地面站CSV文件
+        self.station_path = station_path
+        
+        # 天球网格间距（度）；放大视野时自动加密；是否显示赤经赤纬刻度
+        self.sky_grid_spacing = 10
+        self.sky_grid_adaptive = True
+        self.sky_grid_labels = False
+        
+        # 日月行星的轨迹：每条轨迹的点数，是否显示
+        self.trail_capacity = 2000
+        self.show_trails = False
+        
+        # 地球网格细节级别允许的屏幕空间误差（像素）
+        self.earth_lod_pixel_error = 0.5
+        
+        # 鼠标拾取恒星和天体的范围（像素）
+        self.pick_radius_pixels = 8
+        
+        # 逐帧性能统计
+        self.frame_profiler = FrameProfiler()
+        
+        # 预解码的多级纹理缓存
+        self.texture_cache = TextureCache()
+        self.max_texture_size = max_texture_size
+        
+        # 获取时间尺度（星历文件在initialize_scene或分阶段加载时读取）
+        self.ts = load.timescale()
+        
+        # 当前仿真步长（秒），星历引擎沿此方向预先计算
+        self.simulation_step = 0
+        # 仿真时间的锚点: [锚点时间, 步长, 累计步数, 上一次算出的仿真时间]
+        self.simulation_anchor = None
+        
+        # 保存上一次的GMST值，用于计算旋转角度差值
+        self.last_gmst_rad = None
+        
+        # 星空层（星空背景、星座连线图、恒星、星座连线、天球网格）的岁差章动矩阵，
+        # 把J2000（ICRS）坐标转到仿真日期的真赤道和春分点，与按GMST自转的地球和TEME卫星一致。
+        # 由星空层的所有演员共享，仿真时间变化超过precession_update_seconds时原地更新一次
+        self.celestial_transform = pv.vtkmatrix_from_array(np.eye(4))
+        self.celestial_time = None
+        self.precession_update_seconds = 3600
+        self.update_celestial_orientation()
+    
+    def lookup_ephemeris(self, exact=False):
+        """查询当前仿真时间的星历
+        
+        启用了后台预取时只读取已发布的结果，尚未算好时用关键帧插值代替；关键帧也未就绪时返回None（保持上一帧的位置），
+        只有exact为True（跳转）或还没有显示过天体位置时才同步计算这一时刻。没有后台预取时同步计算。
+        """
+        prefetcher = getattr(self, 'ephemeris_prefetcher', None)
+        if prefetcher is not None:
+            ephemeris = prefetcher.lookup(self.simulation_time, self.simulation_step)
+            if ephemeris is None and getattr(self, 'keyframes', None):
+                exact = exact or getattr(self, 'body_positions', None) is None
+                ephemeris = self.keyframes.lookup(self.simulation_time, exact_on_miss=exact)
+            return ephemeris
+        if not hasattr(self, 'ephemeris'):
+            # 星历尚未加载完成
+            return None
+        return self.ephemeris.lookup(self.simulation_time, self.simulation_step)
+    
+    def update_scene(self, ephemeris=None):
+        """把场景更新到当前仿真时间（不渲染），ephemeris为None时查询当前时间的星历"""
+        profiler = self.frame_profiler
+        if ephemeris is None:
+            with profiler.stage('ephemeris lookup'):
+                ephemeris = self.lookup_ephemeris()
+        
+        # 更新星空层的岁差章动
+        with profiler.stage('precession'):
+            self.update_celestial_orientation()
+        
+        # 更新日月和行星位置
+        with profiler.stage('solar system'):
+            self.update_solar_system(ephemeris)
+        
+        # 更新地球自转
+        with profiler.stage('earth rotation'):
+            self.update_earth_rotation(ephemeris)
+        
+        # 相机可能随地球转动，更新星表的可见分块
+        with profiler.stage('star catalog'):
+            self.update_star_catalog_lod()
+        
+        # 更新卫星位置
+        with profiler.stage('satellites'):
+            self.update_satellites()
+        
+        # 视野变化时更新天球网格的间距
+        with profiler.stage('sky grid'):
+            self.update_sky_grid()
+        
+        # 相机距离变化时更换地球网格的细节级别
+        with profiler.stage('earth lod'):
+            self.update_earth_lod()
+    
+    def seek(self, when):
+        """跳转到时间when并更新一次场景（不渲染）
+        
+        启用了后台预取时先使用关键帧插值的位置（关键帧未就绪时同步计算这一时刻），精确位置在后台算好后由之后的帧读取。
+        """
+        self.simulation_time = when
+        # 跳转后的轨迹重新开始，避免画出跨越跳转的线段
+        if hasattr(self, 'trails'):
+            self.trails.clear()
+            self.trail_time = None
+        self.update_scene(self.lookup_ephemeris(exact=True))
+    
+    def initialize_scene(self):
+        """同步初始化完整的3D场景"""
+        if not hasattr(self, 'planets'):
+            with startup_profiler.stage('load ephemeris'):
+                self.load_ephemeris()
+        for name, stage in self.scene_stages():
+            with startup_profiler.stage(name):
+                stage()
+        
+        # 相机在第一个阶段（地球）设置，裁剪范围只包含地球，加入天球等对象后重新计算
+        self.plotter_widget.reset_camera_clipping_range()
+        
+        # 渲染场景
+        self.plotter_widget.render()
+    
+    def scene_stages(self):
+        """场景的加载阶段，按顺序返回 (阶段名称, 函数)，地球最先以便尽快显示首帧"""
+        return [
+            ('build earth', self.add_earth),
+            ('build sky', self.add_sky),
+            ('build sky grid', self.add_sky_grid),
+            ('build stars', self.add_main_stars),
+            ('build star catalog', self.add_star_catalog),
+            ('build solar system', self.add_solar_system),
+            ('build satellites', self.add_satellites),
+            ('build ground stations', self.add_ground_stations)
+        ]
+    
+    def load_ephemeris(self):
+        """加载星历文件（可在后台线程中调用）"""
+        # 加载de421.bsp文件
+        print("正在加载de421.bsp文件...")
+        planets = load('de421.bsp')
+        print("成功加载de421.bsp文件")
+        
+        # 获取地球
+        self.earth = planets['earth']
+        self.planets = planets
+    
+    def texture_size_limits(self):
+        """返回 (视口所需的纹理宽度, 纹理最大边长)
+        
+        按当前视场角，天球一周360°对应的屏幕像素数即为不损失细节所需的纹理宽度；
+        最大边长取GPU支持的最大纹理尺寸和用户设置中较小的一个。
+        """
+        width, height = self.plotter_widget.window_size
+        view_angle = self.plotter_widget.camera.view_angle
+        target_width = int(height * 360.0 / view_angle)
+        
+        # 没有OpenGL上下文时返回值不大于0，此时不限制
+        max_size = vtkTextureObject.GetMaximumTextureSize(self.plotter_widget.render_window)
+        if max_size <= 0:
+            max_size = None
+        if self.max_texture_size:
+            max_size = min(max_size or self.max_texture_size, self.max_texture_size)
+        return target_width, max_size
+    
+    def load_texture(self, source_paths):
+        """通过纹理缓存加载适合当前视口和GPU的纹理"""
+        target_width, max_size = self.texture_size_limits()
+        return self.texture_cache.load(source_paths, target_width=target_width, max_size=max_size)
+    
+    def earth_lod_mesh(self, level):
+        """第level级细节的地球网格，第一次用到时生成"""
+        from pyvista import examples
+        mesh = self.earth_lod_meshes.get(level)
+        if mesh is None:
+            lat_resolution, lon_resolution = EARTH_LOD_RESOLUTIONS[level]
+            # 各级网格的纹理坐标都是同一个经纬度参数化，共用同一张纹理
+            mesh = examples.planets.load_earth(lat_resolution=lat_resolution, lon_resolution=lon_resolution)
+            # 修改地球模型的半径为真实半径（6371公里）
+            mesh.points *= EARTH_RADIUS_KM
+            self.earth_lod_meshes[level] = mesh
+        return mesh
+    
+    def update_earth_lod(self):
+        """按相机到地表的距离和屏幕空间误差选择地球网格的细节级别
+        
+        选择屏幕上的几何误差不超过earth_lod_pixel_error像素的最粗一级，只在级别变化时更换演员的映射器。
+        """
+        if not hasattr(self, 'earth_lod_level'):
+            return
+        camera = self.plotter_widget.camera
+        distance = max(np.linalg.norm(camera.position) - EARTH_RADIUS_KM, 1.0)
+        height = self.plotter_widget.window_size[1]
+        # 距离distance处每公里对应的像素数
+        pixels_per_km = height / (2 * distance * np.tan(np.radians(camera.view_angle) / 2))
+        
+        level = len(EARTH_LOD_RESOLUTIONS) - 1
+        for candidate, (lat_resolution, lon_resolution) in enumerate(EARTH_LOD_RESOLUTIONS):
+            error = sphere_tessellation_error(EARTH_RADIUS_KM, lat_resolution, lon_resolution)
+            if error * pixels_per_km <= self.earth_lod_pixel_error:
+                level = candidate
+                break
+        if level == self.earth_lod_level:
+            return
+        
+        mapper = self.earth_lod_mappers.get(level)
+        if mapper is None:
+            mapper = vtkPolyDataMapper()
+            mapper.SetInputData(self.earth_lod_mesh(level))
+            mapper.ScalarVisibilityOff()
+            self.earth_lod_mappers[level] = mapper
+        # 纹理、材质和地球变换矩阵都在演员上，更换映射器后保持不变
+        self.scene_actors.get('earth', 'earth').SetMapper(mapper)
+        self.earth_mesh = self.earth_lod_meshes[level]
+        self.earth_lod_level = level
+    
+    def add_earth(self):
+        """添加地球模型，并设置相机和坐标轴"""
+        from pyvista import examples
+        
+        # 加载地球模型：多级细节的网格按需生成，先用与原来相同的50x100经纬网格
+        self.earth_lod_meshes = {}
+        self.earth_lod_mappers = {}
+        mesh = self.earth_lod_mesh(EARTH_LOD_DEFAULT)
+        
+        # 地球网格的几何数据保持不变，随GMST的自转通过演员的4x4用户变换矩阵实现，
+        # 避免每帧改写全部顶点并重新上传到VTK。网格的+x轴为格林威治子午线（纹理u=0.5）、
+        # +y轴为东经90度，与地固坐标系一致，因此初始不需要额外旋转
+        self.earth_base_matrix = np.eye(4)
+        
+        # 加载地球纹理
+        texture = self.load_texture((examples.mapfile,))
+        if texture is None:
+            texture = examples.load_globe_texture()
+        
+        # 添加地球模型到场景中
+        self.earth_mesh = mesh
+        earth_actor = self.scene_actors.add('earth', 'earth', self.plotter_widget.add_mesh(self.earth_mesh, texture=texture, name='earth'))
+        self.earth_lod_mappers[EARTH_LOD_DEFAULT] = earth_actor.GetMapper()
+        self.earth_lod_level = EARTH_LOD_DEFAULT
+        
+        # 地球变换矩阵，由地球及所有随地球固连的演员共享，每帧只原地更新一次
+        self.earth_transform = pv.vtkmatrix_from_array(self.earth_base_matrix)
+        self.add_earth_fixed_actor(earth_actor)
+        
+        # 设置相机位置
+        cam_pos = (0, -50000, 25000)
+        focal_point = (0, 0, 0)
+        view_up = (0, 0, 1)
+        self.plotter_widget.camera_position = (cam_pos, focal_point, view_up)
+        
+        # 启用地形交互模式（保持 view_up 固定）
+        self.plotter_widget.enable_terrain_style()
+        
+        # 在每次渲染后保存相机位置
+        # 注意：这里我们不使用回调，而是在update_earth_rotation方法中直接使用当前相机位置
+        # 这样可以避免QtInteractor没有add_callback方法的问题
+        
+        # 添加坐标轴，设置标签颜色为白色
+        self.scene_actors.add_props('axes', 'axes', lambda: self.plotter_widget.add_axes(xlabel='X', ylabel='Y', zlabel='Z', color='white'))
+        
+        # 按初始相机距离选择地球网格的细节级别，交互缩放时重新选择
+        self.update_earth_lod()
+        if self.plotter_widget.iren is not None:
+            self.plotter_widget.iren.add_observer('InteractionEvent', lambda obj, event: self.update_earth_lod())
+        
+        # 更新地球自转的初始位置
+        self.update_earth_rotation()
+    
+    def add_sky(self):
+        """添加星空背景和星座连线图"""
+        from pyvista import examples
+        
+        # 添加星空模型（第一层：星空背景）
+        mesh_sky = examples.planets.load_earth()
+        mesh_sky.points *= 1000000
+        
+        # 加载星空纹理
+        texture_sky = self.load_texture(SKY_TEXTURE_FILES)
+        
+        # 添加星空模型到场景中
+        self.add_celestial_actor(self.scene_actors.add('sky', 'sky', self.plotter_widget.add_mesh(mesh_sky, texture=texture_sky, name='sky')))
+        
+        # 添加星座连线图（第二层）
+        mesh_constellations = examples.planets.load_earth()
+        mesh_constellations.points *= 1000000  # 稍微大一点，确保在星空背景之上
+        mesh_constellations.flip_faces()
+        
+        # 加载星座连线纹理
+        texture_constellations = self.load_texture(CONSTELLATION_TEXTURE_FILES)
+        
+        # 添加星座连线模型到场景中
+        self.add_celestial_actor(self.scene_actors.add('constellation_figures', 'constellations', self.plotter_widget.add_mesh(
+            mesh_constellations, texture=texture_constellations, name='constellations', opacity=0.2)))
+    
+    def add_earth_fixed_actor(self, actor):
+        """将演员与地球固连，使其共享地球的变换矩阵随地球一起自转"""
+        actor.SetUserMatrix(self.earth_transform)
+        return actor
+    
+    def add_celestial_actor(self, actor):
+        """把J2000坐标的演员加入星空层，使其共享岁差章动矩阵"""
+        actor.SetUserMatrix(self.celestial_transform)
+        return actor
+    
+    def celestial_labels(self, points, labels):
+        """J2000坐标的点标签的输入：经过岁差章动矩阵变换的点集，标签文本在'labels'数组中
+        
+        二维的点标签演员不使用用户变换矩阵，因此在管线中用同一个矩阵变换锚点，矩阵更新时自动重新计算。
+        """
+        source = pv.PolyData(np.asarray(points, dtype=float))
+        # 中文名称不能用pyvista的字符串数组转换，直接用vtkStringArray
+        label_array = vtkStringArray()
+        label_array.SetName('labels')
+        for label in labels:
+            label_array.InsertNextValue(str(label))
+        source.GetPointData().AddArray(label_array)
+        transform = vtkMatrixToLinearTransform()
+        transform.SetInput(self.celestial_transform)
+        label_filter = vtkTransformFilter()
+        label_filter.SetTransform(transform)
+        label_filter.SetInputData(source)
+        return label_filter
+    
+    def update_celestial_orientation(self):
+        """仿真时间变化超过precession_update_seconds时重新计算岁差章动矩阵（ICRS到真赤道和春分点）"""
+        if (self.celestial_time is not None and
+                abs((self.simulation_time - self.celestial_time).total_seconds()) < self.precession_update_seconds):
+            return
+        self.celestial_time = self.simulation_time
+        self.celestial_matrix = self.ts.from_datetime(self.simulation_time).M
+        self.celestial_transform.DeepCopy(homogeneous_matrix(self.celestial_matrix).ravel())
+    
+    def add_sky_grid(self):
+        """在天球上添加赤经赤纬网格线，所有网格线合并为一个PolyData"""
+        # 与星空模型的半径相同
+        self.sky_grid_radius = 1000000 - 500
+        self.sky_grid_current_spacing = self.effective_sky_grid_spacing()
+        self.sky_grid = celestial_grid(self.sky_grid_radius, self.sky_grid_current_spacing, self.sky_grid_current_spacing)
+        
+        # 添加网格线到场景中，使用半透明的白色
+        self.add_celestial_actor(self.scene_actors.add('sky_grid', 'grid', self.plotter_widget.add_mesh(
+            self.sky_grid, color='white', opacity=0.5, line_width=1, name='sky_grid')))
+        if self.sky_grid_labels:
+            self.update_sky_grid(force=True)
+        
+        # 缩放视野时加密或放稀网格
+        if self.plotter_widget.iren is not None:
+            self.plotter_widget.iren.add_observer('InteractionEvent', lambda obj, event: self.update_sky_grid())
+    
+    def effective_sky_grid_spacing(self):
+        """当前视野下的网格间距（度）：视野较小时从SKY_GRID_SPACINGS中选择更细的间距"""
+        spacing = self.sky_grid_spacing
+        if not self.sky_grid_adaptive:
+            return spacing
+        # 视野内至少保持约3条网格线
+        finest = self.plotter_widget.camera.view_angle / 3
+        if spacing <= finest:
+            return spacing
+        finer = [value for value in SKY_GRID_SPACINGS if value <= finest]
+        return finer[0] if finer else SKY_GRID_SPACINGS[-1]
+    
+    def update_sky_grid(self, force=False):
+        """网格间距变化时重建网格线和刻度标签"""
+        if not hasattr(self, 'sky_grid'):
+            return
+        spacing = self.effective_sky_grid_spacing()
+        if spacing == self.sky_grid_current_spacing and not force:
+            return
+        self.sky_grid_current_spacing = spacing
+        
+        self.sky_grid.copy_from(celestial_grid(self.sky_grid_radius, spacing, spacing))
+        
+        # 刻度标签按间距放在对象池中，缩放回到用过的间距时直接取出，不再重建
+        if self.sky_grid_labels:
+            def create_labels():
+                points, labels = celestial_grid_labels(self.sky_grid_radius - 500, spacing)
+                return self.plotter_widget.add_point_labels(
+                    self.celestial_labels(points, labels), 'labels', font_size=10, text_color='white', shape=None, show_points=False,
+                    always_visible=True, name=f'sky_grid_labels_{spacing}', reset_camera=False)
+            self.scene_actors.acquire('sky_grid', 'labels', spacing, create_labels)
+        else:
+            self.scene_actors.release('sky_grid', 'labels')
+    
+    
+    def add_solar_system(self):
+        """添加日月和行星到场景中"""
+        # 定义要显示的天体
+        self.bodies = {
+            'sun': {
+                'name': '太阳',
+                'color': 'yellow', 
+                'size': 10000,
+                'skyfield_name': 10  # 太阳的ID
+            },
+            'moon': {
+                'name': '月球',
+                'color': 'white', 
+                'size': 10000,
+                'skyfield_name': 301  # 月球的ID
+            },
+            'mercury': {
+                'name': '水星',
+                'color': 'white', 
+                'size': 2000,
+                'skyfield_name': 199  # 水星的ID
+            },
+            'venus': {
+                'name': '金星',
+                'color': 'yellow', 
+                'size': 3000,
+                'skyfield_name': 299  # 金星的ID
+            },
+            'mars': {
+                'name': '火星',
+                'color': 'red', 
+                'size': 2500,
+                'skyfield_name': 499  # 火星的ID
+            },
+            'jupiter': {
+                'name': '木星',
+                'color': 'orange', 
+                'size': 8000,
+                'skyfield_name': 5  # 木星 barycenter的ID
+            },
+            'saturn': {
+                'name': '土星',
+                'color': 'yellow', 
+                'size': 6000,
+                'skyfield_name': 6  # 土星 barycenter的ID
+            },
+            'uranus': {
+                'name': '天王星',
+                'color': 'lightblue', 
+                'size': 4000,
+                'skyfield_name': 7  # 天王星 barycenter的ID
+            },
+            'neptune': {
+                'name': '海王星',
+                'color': 'blue', 
+                'size': 3500,
+                'skyfield_name': 8  # 海王星 barycenter的ID
+            }
+        }
+        
+        # 天球半径
+        self.sky_radius = SKY_RADIUS
+        
+        # 创建批量星历引擎，所有天体在一次批量计算中得到，结果由磁盘缓存加速
+        self.ephemeris_cache = EphemerisCache(ephemeris_name='de421')
+        self.ephemeris = EphemerisEngine(
+            self.planets, self.earth, self.ts,
+            {body_name: body_info['skyfield_name'] for body_name, body_info in self.bodies.items()},
+            cache=self.ephemeris_cache
+        )
+        positions, gmst_hours = self.ephemeris.lookup(self.simulation_time, self.simulation_step)
+        
+        # 跳转时间用的关键帧索引，与星历缓存放在同一目录
+        self.keyframes = KeyframeIndex(self.ephemeris, cache_dir=self.ephemeris_cache.cache_dir,
+                                       ephemeris_name=self.ephemeris_cache.ephemeris_name)
+        
+        # 天体标签只创建一次，之后原地更新
+        self.body_labels = LabelManager(self.plotter_widget, registry=self.scene_actors, layer='solar_system')
+        
+        # 遍历每个天体
+        for body_name, body_info in self.bodies.items():
+            try:
+                index = self.ephemeris.body_index.get(body_name)
+                if index is None:
+                    continue
+                ra_rad, dec_rad, distance_au = positions[index]
+                
+                # 使用赤经赤纬计算天球坐标
+                pos = radec_to_xyz(ra_rad, dec_rad, self.sky_radius)
+                
+                # 创建天体模型（球心在原点，通过演员位置移动，更新时无需改写顶点）
+                size = body_info['size']
+                sphere = pv.Sphere(radius=size)
+                
+                # 添加到场景中
+                actor = self.plotter_widget.add_mesh(sphere, color=body_info['color'], name=body_info['name'])
+                actor.SetPosition(pos)
+                self.scene_actors.add('solar_system', body_name, actor)
+                
+                # 如果是太阳，添加到地心的连线并设置光源
+                if body_name == 'sun':
+                    # 创建太阳到地心的连线
+                    line_points = [pos, [0, 0, 0]]  # 太阳位置到原点（地心）
+                    line = pv.lines_from_points(line_points)
+                    sun_earth_line = self.plotter_widget.add_mesh(line, color='yellow', line_width=2, name='sun_earth_line')
+                    self.scene_actors.add('solar_system', 'sun_earth_line', sun_earth_line)
+                    
+                    # 在太阳位置设置光源
+                    # 保存光源引用，以便后续更新；光源不是演员，不登记到图层中，隐藏日月行星时地球仍然受光
+                    light = pv.Light(position=pos, focal_point=[0, 0, 0], intensity=1.0, color='white')
+                    self.plotter_widget.add_light(light)
+                    self.sun_light = light
+                
+                # 转换为时分秒格式
+                ra_hms_str, dec_dms_str = format_ra_dec(ra_rad, dec_rad)
+                
+                # 添加标签，包含赤经赤纬信息
+                label_text = f"{body_info['name']}\nRA: {ra_hms_str}\nDec: {dec_dms_str}"
+                self.body_labels.update(body_name, label_text, pos, color=body_info['color'])
+                
+                print(f"添加天体: {body_info['name']}，位置: {pos}")
+                print(f"  赤经: {ra_hms_str}，赤纬: {dec_dms_str}")
+                print(f"  距离: {distance_au:.6f} AU")
+                
+            except Exception as e:
+                print(f"添加天体 {body_info['name']} 失败: {e}")
+                continue
+        
+        # 标记为使用了真实位置
+        use_real_positions = True
+        
+        self.add_trails()
+        # 按岁差章动矩阵放到仿真日期的坐标系中，并记下拾取用的天体位置
+        self.update_solar_system((positions, gmst_hours))
+    
+    def add_trails(self):
+        """添加日月行星在天球上的视运动轨迹，所有天体共用一个环形缓冲PolyData和一个演员"""
+        body_names = self.ephemeris.body_names
+        self.trails = TrailBuffer(len(body_names), self.trail_capacity)
+        self.trail_time = None
+        
+        # 轨迹颜色与天体相同，按线段设置一次
+        colors = np.array([pv.Color(self.bodies[name]['color']).int_rgb for name in body_names], dtype=np.uint8)
+        self.trails.mesh.cell_data['colors'] = np.repeat(colors, self.trail_capacity, axis=0)
+        self.scene_actors.add('trails', 'trails', self.plotter_widget.add_mesh(
+            self.trails.mesh, scalars='colors', rgb=True, opacity=0.6, line_width=1,
+            name='trails', reset_camera=False, pickable=False))
+        self.scene_actors.set_visible('trails', self.show_trails and self.scene_actors.is_visible('solar_system'))
+    
+    def update_trails(self, sky_positions):
+        """仿真时间前进时把天体当前位置追加到轨迹"""
+        if not hasattr(self, 'trails') or self.trail_time == self.simulation_time:
+            return
+        self.trail_time = self.simulation_time
+        # 略小于天体所在的半径，画在天体球的后面
+        self.trails.append(sky_positions * 0.999)
+    
+    def update_earth_rotation(self, ephemeris=None):
+        """更新地球模型的旋转，ephemeris为None时查询当前时间的星历"""
+        # 从批量星历结果中读取GMST（小时）
+        if ephemeris is None:
+            ephemeris = self.lookup_ephemeris()
+        if ephemeris is not None:
+            positions, gmst_hours = ephemeris
+        else:
+            # 后台星历尚未算好，GMST只是一个公式，直接计算以保持地球转动连续
+            gmst_hours = self.ts.from_datetime(self.simulation_time).gmst
+        
+        # 将小时转换为弧度（1小时 = 2π/24 弧度）
+        gmst_rad = gmst_hours * (2 * np.pi / 24)
+        
+        # 计算地球自转角度
+        # 注意：这里我们使用GMST来计算地球的旋转角度
+        # 因为GMST表示的是格林威治子午线的恒星时，与地球自转直接相关
+        rotation_angle = gmst_rad
+        
+        # 更新地球变换矩阵（O(1)，网格顶点不变）
+        if hasattr(self, 'earth_transform') and self.earth_transform:
+            earth_matrix = rotation_matrix_z(rotation_angle) @ self.earth_base_matrix
+            # 原地更新共享矩阵，所有随地球固连的演员同时生效
+            self.earth_transform.DeepCopy(earth_matrix.ravel())
+        
+        # 根据checkbox状态决定是否旋转相机
+        if hasattr(self, 'earth_rotation_checkbox'):
+            # 获取checkbox状态
+            earth_rotation_only = self.earth_rotation_checkbox.isChecked()
+            
+            # 如果不选地球自转（即相机随地球一起自转）
+            if not earth_rotation_only:
+                # 获取当前相机位置
+                current_camera = self.plotter_widget.camera_position
+                if current_camera:
+                    cam_pos, focal_point, view_up = current_camera
+                    
+                    # 计算GMST的差值
+                    if self.last_gmst_rad is not None:
+                        # 使用差值作为旋转角度
+                        delta_gmst_rad = gmst_rad - self.last_gmst_rad
+                    else:
+                        # 第一次运行，使用0作为旋转角度
+                        delta_gmst_rad = 0
+                    
+                    # 将相机位置转换为numpy数组
+                    cam_pos_np = np.array(cam_pos)
+                    
+                    # 创建旋转矩阵（绕z轴旋转）
+                    camera_rotation_matrix = rotation_matrix_z(delta_gmst_rad)[:3, :3]
+                    
+                    # 应用旋转到相机位置
+                    rotated_cam_pos = camera_rotation_matrix @ cam_pos_np
+                    
+                    # 更新相机位置
+                    self.plotter_widget.camera_position = (tuple(rotated_cam_pos), focal_point, view_up)
+        
+        # 更新last_gmst_rad为当前值
+        self.last_gmst_rad = gmst_rad
+    
+    def update_solar_system(self, ephemeris=None):
+        """更新日月和行星位置，ephemeris为None时查询当前时间的星历"""
+        
+        # 从批量星历结果中按下标读取当前时间的所有天体位置
+        if ephemeris is None:
+            ephemeris = self.lookup_ephemeris()
+        if ephemeris is None:
+            # 后台星历尚未算好，保持上一帧的位置
+            return
+        positions, gmst_hours = ephemeris
+        
+        # 一次性计算所有天体的天球坐标，与星空层相同地转到仿真日期的真赤道和春分点
+        sky_positions = radec_to_xyz(positions[:, 0], positions[:, 1], self.sky_radius) @ self.celestial_matrix.T
+        self.update_trails(sky_positions)
+        # 保存当前的天体位置，用于拾取
+        self.body_positions = positions
+        self.body_directions = sky_positions / self.sky_radius
+        
+        # 遍历每个天体
+        for body_name, body_info in self.bodies.items():
+            try:
+                index = self.ephemeris.body_index.get(body_name)
+                if index is None:
+                    continue
+                ra_rad, dec_rad, distance_au = positions[index]
+                pos = sky_positions[index]
+                
+                # 更新天体位置（只移动演员，不改写球体顶点）
+                actor = self.scene_actors.get('solar_system', body_name)
+                if actor is not None:
+                    actor.SetPosition(pos)
+                
+                # 如果是太阳，更新到地心的连线和光源位置
+                if body_name == 'sun':
+                    # 更新太阳到地心的连线
+                    line_actor = self.scene_actors.get('solar_system', 'sun_earth_line')
+                    if line_actor is not None:
+                        line_mesh = line_actor.GetMapper().GetInput()
+                        line_mesh.points = np.array([pos, [0, 0, 0]])  # 太阳位置到原点（地心）
+                    
+                    # 更新光源位置
+                    if self.sun_light is not None:
+                        self.sun_light.SetPosition(pos[0], pos[1], pos[2])
+                        
+                # 更新标签位置和内容（原地更新已有的标签演员，文本不变时不更新）
+                if body_name in self.body_labels.actors:
+                    # 转换为时分秒格式
+                    ra_hms_str, dec_dms_str = format_ra_dec(ra_rad, dec_rad)
+                    label_text = f"{body_info['name']}\nRA: {ra_hms_str}\nDec: {dec_dms_str}"
+                    self.body_labels.update(body_name, label_text, pos)
+                
+            except Exception as e:
+                print(f"更新天体 {body_info['name']} 失败: {e}")
+                continue
+    
+    def read_constellations(self, file_path):
+        """读取星座数据文件，返回StarCatalog"""
+        constellation_names, columns = load_star_columns(file_path)
+        return StarCatalog(constellation_names, columns)
+    
+    def add_main_stars(self):
+        """在天球上添加主要恒星"""
+        # 读取星座数据
+        catalog = self.read_constellations('stars.txt')
+        
+        # 定义星座颜色映射
+        constellation_colors = {
+            '猎户座': 'red',
+            '摩羯座': 'green',
+            '天鹰座': 'blue',
+            '天琴座': 'cyan',
+            '天鹅座': 'magenta',
+            '大熊座': 'yellow',
+            '牧夫座': 'orange',
+            '狮子座': 'purple',
+            '双子座': 'pink',
+            '仙女座': 'lightgreen',
+            '飞马座': 'lightblue'
+        }
+        
+        # 定义星座连线数据
+        constellation_connections = {
+            '猎户座': [
+                [0, 2],
+                [2, 6],
+                [4, 5],
+                [5, 6],
+                [6, 1],
+                [1, 3],
+                [3, 4],
+                [4, 0]
+            ],
+            '摩羯座': [
+                [2, 1],
+                [1, 5],
+                [5, 8],
+                [8, 3],
+                [3, 0],
+                [0, 4],
+                [4, 9],
+                [9, 6],
+                [6, 7],
+                [7, 1]
+            ],
+            '牧夫座': [
+                [0, 1],
+                [1, 4],
+                [4, 5],
+                [5, 3],
+                [3, 6],
+                [6, 0],
+                [0, 2],
+                [0, 7]
+            ],
+            '狮子座': [
+                [0, 7],
+                [7, 1],
+                [1, 6],
+                [6, 8],
+                [8, 4],
+                [1, 3],
+                [3, 2],
+                [2, 5],
+                [5, 0]
+            ],
+            '双子座': [
+                [1, 13],
+                [0, 11],
+                [11, 7],
+                [11, 9],
+                [9, 13],
+                [13, 8],
+                [13, 4],
+                [4, 12],
+                [4, 3],
+                [11, 6],
+                [6, 10],
+                [10, 5],
+                [10, 2]
+            ],
+            '仙女座_飞马座联合': [
+                [2, 1],
+                [1, 3],
+                [3, 0],
+                [4, 10],
+                [10, 9],
+                [9, 6],
+                [6, 7],
+                [7, 0],
+                [0, 5],
+                [5, 8],
+                [5, 6]
+            ]
+        }
+        
+        # 天球半径
+        sky_radius = 1000000 - 500  # 与星空模型的半径相同
+        
+        # 按连线分组整理恒星：(连线名称, 恒星下标数组, 每颗恒星的颜色, 连线颜色)
+        groups = []
+        
+        # 特殊处理：联合仙女座和飞马座
+        andromeda_stars = catalog.constellation_indices('仙女座')
+        pegasus_stars = catalog.constellation_indices('飞马座')
+        if len(andromeda_stars) or len(pegasus_stars):
+            combined_stars = np.concatenate([andromeda_stars, pegasus_stars])
+            combined_colors = ['lightgreen'] * len(andromeda_stars) + ['lightblue'] * len(pegasus_stars)
+            groups.append(('仙女座_飞马座联合', combined_stars, combined_colors, 'white'))
+            print(f"加载联合星座: 仙女座_飞马座, 恒星数量: {len(combined_stars)}")
+        
+        # 遍历其他星座
+        for constellation_name in catalog.constellation_names:
+            # 跳过已经处理过的星座
+            if constellation_name in ['仙女座', '飞马座']:
+                continue
+            
+            stars = catalog.constellation_indices(constellation_name)
+            if not len(stars):
+                continue
+            
+            # 确定星座颜色
+            color = constellation_colors.get(constellation_name, 'white')
+            groups.append((constellation_name, stars, [color] * len(stars), color))
+            print(f"加载星座: {constellation_name}, 恒星数量: {len(stars)}")
+        
+        # 所有恒星的下标和颜色拼接为连续数组，星座连线的端点换算为拼接后的下标
+        star_indices = np.concatenate([group[1] for group in groups]) if groups else np.empty(0, dtype=np.int64)
+        star_colors = [color for group in groups for color in group[2]]
+        line_cells = []
+        line_colors = []
+        offset = 0
+        for group_name, stars, colors, line_color in groups:
+            # 连接恒星形成星座轮廓
+            if len(stars) > 1:
+                # 检查是否有预设的连线数据，没有时按顺序连接所有恒星
+                connections = np.array(constellation_connections.get(group_name, []), dtype=np.int64).reshape(-1, 2)
+                if not len(connections):
+                    connections = np.column_stack([np.arange(len(stars) - 1), np.arange(1, len(stars))])
+                connections = connections[np.all((connections >= 0) & (connections < len(stars)), axis=1)]
+                line_cells.append(np.column_stack([np.full(len(connections), 2), connections + offset]))
+                line_colors.extend([line_color] * len(connections))
+            offset += len(stars)
+        
+        self.star_index = None
+        
+        if not len(star_indices):
+            return
+        
+        # 拾取用的空间索引，下标与star_indices一致
+        self.main_stars = catalog
+        self.main_star_indices = star_indices
+        self.star_index = SkyIndex(catalog.xyz[star_indices])
+        
+        rgb_cache = {}
+        def to_rgb(color_names):
+            """颜色名称列表转换为uint8 RGB数组"""
+            for name in color_names:
+                if name not in rgb_cache:
+                    rgb_cache[name] = pv.Color(name).int_rgb
+            return np.array([rgb_cache[name] for name in color_names], dtype=np.uint8)
+        
+        # 所有恒星合并为一个点集，大小由视星等决定，颜色由星座决定
+        star_cloud = pv.PolyData(catalog.xyz[star_indices].astype(float) * sky_radius)
+        star_cloud['size'] = np.maximum(5, 20 - catalog.magnitude[star_indices].astype(float) * 2)
+        star_cloud['colors'] = to_rgb(star_colors)
+        self.star_cloud = star_cloud
+        
+        # 用一个球体字形批量生成所有恒星标记，只产生一个演员
+        star_glyph = pv.Sphere(radius=1, theta_resolution=8, phi_resolution=8)
+        star_glyphs = star_cloud.glyph(geom=star_glyph, scale='size', orient=False)
+        self.add_celestial_actor(self.scene_actors.add('stars', 'stars', self.plotter_widget.add_mesh(
+            star_glyphs, scalars='colors', rgb=True, name='stars')))
+        
+        # 恒星名称标签按颜色分组，每种颜色一个标签演员
+        star_color_array = np.array(star_colors)
+        for color in dict.fromkeys(star_colors):
+            indices = np.flatnonzero(star_color_array == color)
+            text_actor = self.plotter_widget.add_point_labels(
+                self.celestial_labels(star_cloud.points[indices], catalog.names(star_indices[indices])), 'labels',
+                font_size=8, text_color=color, show_points=False, shape=None,
+                name=f'star_labels_{color}'
+            )
+            self.scene_actors.add('stars', f'labels_{color}', text_actor)
+        
+        # 所有星座连线合并为一个线段集合，颜色作为单元数据
+        if line_cells:
+            lines = pv.PolyData(star_cloud.points.copy(), lines=np.concatenate(line_cells).ravel())
+            lines.cell_data['colors'] = to_rgb(line_colors)
+            self.add_celestial_actor(self.scene_actors.add('stars', 'constellation_lines', self.plotter_widget.add_mesh(
+                lines, scalars='colors', rgb=True, preference='cell', line_width=2, name='constellation_lines'
+            )))
+    
+    def add_star_catalog(self):
+        """加载内存映射的二进制星表，并按当前视野添加可见的恒星"""
+        self.star_catalog = None
+        self.star_catalog_selection = None
+        
+        # 视野为60度时的极限星等，视野越小极限星等越暗
+        self.star_catalog_base_magnitude = 6.5
+        # 同时显示的恒星数量上限
+        self.star_catalog_max_stars = 200000
+        
+        if not self.star_catalog_path:
+            return
+        try:
+            self.star_catalog = TiledStarCatalog(self.star_catalog_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"加载星表 {self.star_catalog_path} 失败: {e}")
+            return
+        print(f"映射星表: {self.star_catalog_path}, 恒星数量: {len(self.star_catalog)}")
+        
+        self.star_catalog_cloud = pv.PolyData(np.zeros((1, 3)))
+        self.star_catalog_cloud['magnitude'] = np.zeros(1)
+        self.add_celestial_actor(self.scene_actors.add('stars', 'catalog', self.plotter_widget.add_mesh(
+            self.star_catalog_cloud, scalars='magnitude', cmap='gray_r', clim=[-1.5, 8],
+            style='points', point_size=2, lighting=False, show_scalar_bar=False, name='star_catalog'
+        )))
+        self.update_star_catalog_lod()
+        
+        # 交互旋转相机时更新可见分块
+        if self.plotter_widget.iren is not None:
+            self.plotter_widget.iren.add_observer('InteractionEvent', lambda obj, event: self.update_star_catalog_lod())
+    
+    def add_satellites(self):
+        """从TLE/OMM文件加载卫星，所有卫星用一个点云演员显示"""
+        self.satellites = None
+        self.satellite_time = None
+        if not self.satellite_path:
+            return
+        try:
+            self.satellites = SatelliteConstellation(self.satellite_path)
+        except (OSError, ValueError) as e:
+            print(f"加载卫星 {self.satellite_path} 失败: {e}")
+            return
+        print(f"加载卫星: {self.satellite_path}, 卫星数量: {len(self.satellites)}")
+        
+        # TEME坐标系的z轴为地球自转轴，x轴指向春分点，地球网格按GMST绕z轴转动，因此直接使用TEME坐标（公里）
+        self.satellite_cloud = pv.PolyData(np.zeros((len(self.satellites), 3)))
+        self.scene_actors.add('satellites', 'satellites', self.plotter_widget.add_mesh(
+            self.satellite_cloud, color='lime', style='points', point_size=3, render_points_as_spheres=True,
+            lighting=False, name='satellites', reset_camera=False
+        ))
+        self.update_satellites()
+    
+    def update_satellites(self):
+        """仿真时间变化时用向量化的SGP4重新计算所有卫星的位置，原地更新点坐标"""
+        if not getattr(self, 'satellites', None) or self.satellite_time == self.simulation_time:
+            return
+        self.satellite_time = self.simulation_time
+        positions, valid = self.satellites.positions(self.simulation_time)
+        # 计算失败（如已再入大气层）的卫星放到地心，被地球遮挡
+        positions[~valid] = 0
+        self.satellite_cloud.points[:] = positions
+        self.satellite_cloud.GetPoints().Modified()
+    
+    def add_ground_stations(self):
+        """从CSV文件加载地面站，在地球表面用随地球固连的点标出"""
+        self.ground_stations = []
+        if not self.station_path:
+            return
+        try:
+            self.ground_stations = load_ground_stations(self.station_path)
+        except OSError as e:
+            print(f"加载地面站 {self.station_path} 失败: {e}")
+            return
+        print(f"加载地面站: {self.station_path}, 地面站数量: {len(self.ground_stations)}")
+        if not self.ground_stations:
+            return
+        
+        # 地面站的地固坐标与地球网格一致，共享地球的变换矩阵随地球自转；稍微抬高避免被地表遮挡
+        positions = np.array([station['position'] for station in self.ground_stations]) * 1.002
+        self.add_earth_fixed_actor(self.scene_actors.add('ground_stations', 'stations', self.plotter_widget.add_mesh(
+            pv.PolyData(positions), color='yellow', style='points', point_size=8, render_points_as_spheres=True,
+            lighting=False, name='ground_stations', reset_camera=False
+        )))
+    
+    def pick_direction(self, display_x, display_y):
+        """显示坐标（像素，原点在左下角）处的视线与天球的交点方向，场景坐标系的单位向量"""
+        renderer = self.plotter_widget.renderer
+        points = []
+        for depth in (0.0, 1.0):
+            renderer.SetDisplayPoint(display_x, display_y, depth)
+            renderer.DisplayToWorld()
+            x, y, z, w = renderer.GetWorldPoint()
+            points.append(np.array([x, y, z]) / w)
+        origin = points[0]
+        ray = (points[1] - points[0]) / np.linalg.norm(points[1] - points[0])
+        
+        # 相机不在球心，恒星和天体都按球心方向索引，因此先求视线与天球的交点（相机在天球内部）
+        b = origin @ ray
+        c = origin @ origin - SKY_RADIUS ** 2
+        point = origin + (-b + np.sqrt(max(b * b - c, 0.0))) * ray
+        return point / np.linalg.norm(point)
+    
+    def pick(self, display_x, display_y):
+        """拾取显示坐标处最近的天体或主要恒星，返回 ('body', 天体键) 或 ('star', 下标)，没有时返回None"""
+        direction = self.pick_direction(display_x, display_y)
+        max_angle = self.pick_radius_pixels * self.plotter_widget.camera.view_angle / max(self.plotter_widget.window_size[1], 1)
+        picked, picked_angle = None, None
+        
+        # 日月行星：球体的角半径也算在拾取范围内
+        if getattr(self, 'body_directions', None) is not None and self.scene_actors.is_visible('solar_system'):
+            for body_name, index in self.ephemeris.body_index.items():
+                angle = np.degrees(np.arccos(np.clip(self.body_directions[index] @ direction, -1, 1)))
+                angle -= np.degrees(self.bodies[body_name]['size'] / SKY_RADIUS)
+                if angle <= max_angle and (picked_angle is None or angle < picked_angle):
+                    picked, picked_angle = ('body', body_name), angle
+        
+        # 主要恒星：索引为J2000坐标，把方向转回J2000
+        if getattr(self, 'star_index', None) is not None and self.scene_actors.is_visible('stars'):
+            index, angle = self.star_index.nearest(direction @ self.celestial_matrix, max_angle)
+            if index is not None and (picked_angle is None or angle < picked_angle):
+                picked = ('star', index)
+        return picked
+    
+    def describe_pick(self, picked):
+        """拾取对象的说明文本：名称、视星等、光谱型以及当前的赤经赤纬"""
+        kind, key = picked
+        if kind == 'body':
+            index = self.ephemeris.body_index[key]
+            ra_rad, dec_rad, distance_au = self.body_positions[index]
+            direction = self.body_directions[index]
+            lines = [self.bodies[key]['name'], f"距离: {distance_au:.6f} AU"]
+        else:
+            star = self.main_stars.record(self.main_star_indices[key])
+            ra_rad, dec_rad = np.radians(star['ra_deg']), np.radians(star['dec_deg'])
+            direction = self.celestial_matrix @ radec_to_xyz(ra_rad, dec_rad)
+            lines = [f"{star['name']} ({star['id']})", f"视星等: {star['magnitude']:.2f}",
+                     f"光谱型: {star['spectral_type'] or '-'}"]
+        
+        # 仿真日期的真赤道和春分点坐标，随仿真时间变化
+        ra_date, dec_date, _ = direction_to_radec(np.append(direction, 1.0))
+        ra_str, dec_str = format_ra_dec(ra_date, dec_date)
+        lines += [f"赤经: {ra_str}", f"赤纬: {dec_str}"]
+        ra_str, dec_str = format_ra_dec(ra_rad, dec_rad)
+        lines.append(f"J2000: {ra_str}, {dec_str}")
+        return "\n".join(lines)
+    
+    def update_star_catalog_lod(self):
+        """根据相机视野选择可见分块和极限星等，只在选择变化时重建星表点集"""
+        if not getattr(self, 'star_catalog', None):
+            return
+        
+        camera = self.plotter_widget.camera
+        view_direction = np.array(camera.focal_point) - np.array(camera.position)
+        if not np.any(view_direction):
+            return
+        # 星表分块为J2000坐标，把视线方向转回J2000
+        view_direction = view_direction @ self.celestial_matrix
+        
+        # 视野对角线的半角
+        width, height = self.plotter_widget.window_size
+        aspect = width / max(height, 1)
+        half_angle = np.arctan(np.tan(np.radians(camera.view_angle) / 2) * np.hypot(1, aspect))
+        
+        # 放大（视野变小）时显示更暗的恒星，按0.25等取整以减少重建次数
+        field_deg = 2 * np.degrees(half_angle)
+        limiting_magnitude = self.star_catalog_base_magnitude + 5 * np.log10(60 / max(field_deg, 0.1))
+        limiting_magnitude = np.round(limiting_magnitude * 4) / 4
+        
+        tiles = self.star_catalog.visible_tiles(view_direction, half_angle)
+        selection = (tuple(tiles), limiting_magnitude)
+        if selection == self.star_catalog_selection:
+            return
+        self.star_catalog_selection = selection
+        
+        stars = self.star_catalog.select(tiles, limiting_magnitude, self.star_catalog_max_stars)
+        if len(stars) == 0:
+            self.scene_actors.get('stars', 'catalog').SetVisibility(False)
+            return
+        
+        # 与主要恒星相同，放在星空背景内侧
+        sky_radius = 1000000 - 1000
+        points = np.column_stack([stars['x'], stars['y'], stars['z']]).astype(float) * sky_radius
+        cloud = pv.PolyData(points)
+        cloud['magnitude'] = np.asarray(stars['magnitude'], dtype=float)
+        self.star_catalog_cloud.copy_from(cloud)
+        self.scene_actors.get('stars', 'catalog').SetVisibility(self.scene_actors.is_visible('stars'))
 
-class SatelliteOrbitApp(QMainWindow):
-    def __init__(self):
+class SatelliteOrbitApp(QMainWindow, SkyScene):
+    def __init__(self, star_catalog_path=None, max_texture_size=None, satellite_path=None, station_path=None, views=()):
         super().__init__()
         self.setWindowTitle("Satellite Orbit Simulation")
         self.setGeometry(100, 100, 1200, 800)
@@ -45,44 +3263,47 @@ class SatelliteOrbitApp(QMainWindow):
         control_layout.addWidget(control_title)
         
         # 创建3D场景部件
-        self.plotter_widget = QtInteractor(central_widget)
-        splitter.addWidget(self.plotter_widget)  # 将3D场景部件添加到分割器中
+        plotter_widget = QtInteractor(central_widget)
+        splitter.addWidget(plotter_widget)  # 将3D场景部件添加到分割器中
+        
+        # 附加视图上下排列在主视图右侧，没有附加视图时隐藏
+        self.view_splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.view_splitter)
+        self.view_splitter.hide()
+        self.scene_views = {}
+        self.initial_views = list(views)
+        
+        # 初始化场景状态（仿真时间、星历等）
+        self.init_sky_scene(plotter_widget, star_catalog_path=star_catalog_path, max_texture_size=max_texture_size,
+                            satellite_path=satellite_path, station_path=station_path)
         
         # 添加仿真时间显示
         self.time_label = QLabel("仿真时间:")
         control_layout.addWidget(self.time_label)
         
-        # 初始化仿真时间为当前时间
-        self.simulation_time = datetime.datetime.now(datetime.timezone.utc)
         self.time_display_label = QLabel(self.simulation_time.strftime("%Y-%m-%d %H:%M:%S UTC"))
         self.time_display_label.setStyleSheet("font-family: monospace;")
         control_layout.addWidget(self.time_display_label)
         
-        # 初始化地球自转速度
-        self.earth_rotation_speed = 1.0
-        
-        # 保存日月和行星演员的引用
-        self.solar_system_actors = {}
-        
-        # 加载de421.bsp文件
-        print("正在加载de421.bsp文件...")
-        self.planets = load('de421.bsp')
-        print("成功加载de421.bsp文件")
-        
-        # 获取地球
-        self.earth = self.planets['earth']
-        
-        # 获取时间尺度
-        self.ts = load.timescale()
+        # 添加跳转到指定时间的控件（UTC）
+        seek_layout = QHBoxLayout()
+        self.seek_edit = QDateTimeEdit()
+        self.seek_edit.setTimeSpec(Qt.UTC)
+        self.seek_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.seek_edit.setCalendarPopup(True)
+        # de421星历的时间范围
+        self.seek_edit.setDateTimeRange(QDateTime(1900, 1, 1, 0, 0, 0, 0, Qt.UTC), QDateTime(2050, 12, 31, 0, 0, 0, 0, Qt.UTC))
+        self.seek_edit.setDateTime(QDateTime.fromSecsSinceEpoch(int(self.simulation_time.timestamp()), Qt.UTC))
+        seek_layout.addWidget(self.seek_edit)
+        self.seek_button = QPushButton("跳转")
+        self.seek_button.clicked.connect(self.seek_callback)
+        seek_layout.addWidget(self.seek_button)
+        control_layout.addLayout(seek_layout)
         
         # 仿真控制变量
         self.simulation_running = False
-        self.simulation_step = 0
         self.timer = None
         
-        # 保存上一次的GMST值，用于计算旋转角度差值
-        self.last_gmst_rad = None
-        
         # 添加显示/隐藏恒星的复选框
         from PyQt5.QtWidgets import QCheckBox
         self.stars_checkbox = QCheckBox("显示恒星")
@@ -96,6 +3317,22 @@ class SatelliteOrbitApp(QMainWindow):
         self.grid_checkbox.stateChanged.connect(self.toggle_sky_grid)
         control_layout.addWidget(self.grid_checkbox)
         
+        # 天球网格的间距和赤经赤纬刻度
+        grid_layout = QHBoxLayout()
+        grid_layout.addWidget(QLabel("网格间距:"))
+        self.grid_spacing_spinbox = QSpinBox()
+        self.grid_spacing_spinbox.setRange(1, 45)
+        self.grid_spacing_spinbox.setSuffix("°")
+        self.grid_spacing_spinbox.setValue(self.sky_grid_spacing)
+        self.grid_spacing_spinbox.valueChanged.connect(self.grid_spacing_callback)
+        grid_layout.addWidget(self.grid_spacing_spinbox)
+        control_layout.addLayout(grid_layout)
+        
+        self.grid_labels_checkbox = QCheckBox("显示网格刻度")
+        self.grid_labels_checkbox.setChecked(self.sky_grid_labels)
+        self.grid_labels_checkbox.stateChanged.connect(self.toggle_sky_grid_labels)
+        control_layout.addWidget(self.grid_labels_checkbox)
+        
         # 添加显示/隐藏星座连线图的复选框
         self.constellations_checkbox = QCheckBox("显示星座连线图")
         self.constellations_checkbox.setChecked(True)  # 默认显示星座连线图
@@ -108,12 +3345,32 @@ class SatelliteOrbitApp(QMainWindow):
         self.solar_system_checkbox.stateChanged.connect(self.toggle_solar_system)
         control_layout.addWidget(self.solar_system_checkbox)
         
+        # 添加显示/隐藏卫星的复选框
+        self.satellites_checkbox = QCheckBox("显示卫星")
+        self.satellites_checkbox.setChecked(True)  # 默认显示卫星
+        self.satellites_checkbox.stateChanged.connect(self.toggle_satellites)
+        control_layout.addWidget(self.satellites_checkbox)
+        
+        # 添加显示/隐藏日月行星轨迹的复选框
+        self.trails_checkbox = QCheckBox("显示日月和行星轨迹")
+        self.trails_checkbox.setChecked(self.show_trails)
+        self.trails_checkbox.stateChanged.connect(self.toggle_trails)
+        control_layout.addWidget(self.trails_checkbox)
+        
         # 添加地球自转控制复选框
         self.earth_rotation_checkbox = QCheckBox("地球自转")
         self.earth_rotation_checkbox.setChecked(True)  # 默认选中，相机不动
         self.earth_rotation_checkbox.stateChanged.connect(self.toggle_earth_rotation)
         control_layout.addWidget(self.earth_rotation_checkbox)
         
+        # 附加视图的复选框
+        self.view_checkboxes = {}
+        for frame, (title, _) in SCENE_VIEW_FRAMES.items():
+            checkbox = QCheckBox(title)
+            checkbox.stateChanged.connect(lambda state, frame=frame: self.toggle_scene_view(frame, state))
+            control_layout.addWidget(checkbox)
+            self.view_checkboxes[frame] = checkbox
+        
         # 添加仿真控制按钮
         self.run_button = QPushButton("运行仿真")
         self.run_button.clicked.connect(self.run_simulation)
@@ -138,381 +3395,351 @@ class SatelliteOrbitApp(QMainWindow):
         self.slider_value_label = QLabel("步长值: 1s")
         control_layout.addWidget(self.slider_value_label)
         
-        # 定义步长映射
-        self.step_mapping = {
-            -7: -86400,  # -24h
-            -6: -21600,  # -6h
-            -5: -3600,   # -3600s
-            -4: -300,    # -300s
-            -3: -60,     # -60s
-            -2: -10,     # -10s
-            -1: -1,      # -1s
-            0: 0,        # 0s
-            1: 1,        # 1s
-            2: 10,       # 10s
-            3: 60,       # 60s
-            4: 300,      # 300s
-            5: 3600,     # 3600s
-            6: 21600,    # 6h
-            7: 86400     # 24h
-        }
+        # 添加目标帧率设置和实际帧率显示
+        self.simulation_clock = SimulationClock(target_fps=30)
+        fps_layout = QHBoxLayout()
+        fps_layout.addWidget(QLabel("目标帧率:"))
+        self.fps_spinbox = QSpinBox()
+        self.fps_spinbox.setRange(5, 120)
+        self.fps_spinbox.setValue(self.simulation_clock.target_fps)
+        self.fps_spinbox.valueChanged.connect(self.target_fps_callback)
+        fps_layout.addWidget(self.fps_spinbox)
+        control_layout.addLayout(fps_layout)
+        
+        self.fps_label = QLabel("帧率: - / 30 FPS")
+        self.fps_label.setStyleSheet("font-family: monospace;")
+        control_layout.addWidget(self.fps_label)
+        self.fps_label_update_time = 0.0
+        
+        # 添加性能面板开关和时间线录制按钮
+        self.performance_hud_checkbox = QCheckBox("显示性能面板")
+        self.performance_hud_checkbox.setChecked(False)
+        self.performance_hud_checkbox.stateChanged.connect(self.toggle_performance_hud)
+        control_layout.addWidget(self.performance_hud_checkbox)
+        
+        self.trace_button = QPushButton("录制性能时间线")
+        self.trace_button.clicked.connect(self.toggle_trace_recording)
+        control_layout.addWidget(self.trace_button)
+        
+        # 鼠标悬停和单击拾取的恒星或天体信息
+        self.picked = None
+        self.pick_press_position = None
+        self.hover_label = QLabel("")
+        self.hover_label.setWordWrap(True)
+        control_layout.addWidget(self.hover_label)
+        self.pick_label = QLabel("单击恒星或天体查看信息")
+        self.pick_label.setWordWrap(True)
+        self.pick_label.setStyleSheet("font-family: monospace;")
+        control_layout.addWidget(self.pick_label)
+        if plotter_widget.iren is not None:
+            plotter_widget.iren.add_observer('MouseMoveEvent', self.hover_callback)
+            plotter_widget.iren.add_observer('LeftButtonPressEvent', self.pick_press_callback)
+            plotter_widget.iren.add_observer('LeftButtonReleaseEvent', self.pick_release_callback)
+        
+        # 地面站过境预报：在后台计算从仿真时间开始若干天的过境，结果显示在表格中，可导出为CSV
+        self.passes = []
+        self.pass_future = None
+        self.pass_executor = None
+        pass_layout = QHBoxLayout()
+        pass_layout.addWidget(QLabel("最低仰角:"))
+        self.pass_elevation_spinbox = QSpinBox()
+        self.pass_elevation_spinbox.setRange(0, 89)
+        self.pass_elevation_spinbox.setSuffix("°")
+        self.pass_elevation_spinbox.setValue(PASS_MIN_ELEVATION_DEG)
+        pass_layout.addWidget(self.pass_elevation_spinbox)
+        control_layout.addLayout(pass_layout)
+        
+        pass_buttons_layout = QHBoxLayout()
+        self.pass_button = QPushButton(f"预报过境（{PASS_PREDICTION_DAYS}天）")
+        self.pass_button.clicked.connect(self.predict_passes_callback)
+        pass_buttons_layout.addWidget(self.pass_button)
+        self.export_passes_button = QPushButton("导出CSV")
+        self.export_passes_button.setEnabled(False)
+        self.export_passes_button.clicked.connect(self.export_passes)
+        pass_buttons_layout.addWidget(self.export_passes_button)
+        control_layout.addLayout(pass_buttons_layout)
+        
+        self.pass_status_label = QLabel("")
+        control_layout.addWidget(self.pass_status_label)
+        self.pass_table = QTableWidget(0, 5)
+        self.pass_table.setHorizontalHeaderLabels(["地面站", "卫星", "AOS (UTC)", "LOS (UTC)", "最大仰角"])
+        self.pass_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.pass_table.verticalHeader().setVisible(False)
+        self.pass_table.setMinimumHeight(160)
+        control_layout.addWidget(self.pass_table)
+        
+        # 滑块值到仿真步长的映射
+        self.step_mapping = SIMULATION_STEP_MAPPING
+        
+        # 添加加载进度显示
+        self.loading_label = QLabel("正在加载...")
+        control_layout.addWidget(self.loading_label)
         
         # 添加垂直伸展器
         control_layout.addStretch()
         
-        # 初始化3D场景
-        self.initialize_scene()
+        # 窗口显示后再分阶段初始化3D场景
+        self.ephemeris_prefetcher = None
+        self.startup_executor = None
+        QTimer.singleShot(0, self.start_staged_loading)
     
-    def initialize_scene(self):
-        """初始化3D场景"""
-        # 加载地球模型
-        mesh = examples.planets.load_earth()
-        
-        # 修改地球模型的半径为真实半径（6371公里）
-        true_earth_radius = 6371  # 真实地球的平均半径（公里）
-        # 缩放地球模型
-        mesh.points *= true_earth_radius
-        
-        pi_matrix = np.array([
-            [-1, 0, 0],
-            [0, -1, 0],
-            [0, 0, 1]
-        ])
-        
-        # 应用旋转矩阵到地球模型
-        rotated_points = []
-        for point in mesh.points:
-            # 应用旋转矩阵
-            rotated_point = pi_matrix @ point
-            rotated_points.append(rotated_point)
-        
-        # 更新地球模型的点
-        mesh.points = np.array(rotated_points)
-        
-        # 加载地球纹理
-        texture = examples.load_globe_texture()
-        
-        # 添加地球模型到场景中
-        self.earth_mesh = mesh
-        # 保存地球的初始状态
-        self.earth_initial_points = self.earth_mesh.points.copy()
-        self.plotter_widget.add_mesh(self.earth_mesh, texture=texture, name='earth')
-        
-        # 添加星空模型（第一层：星空背景）
-        mesh_sky = examples.planets.load_earth()
-        mesh_sky.points *= 1000000
-        
-        # 加载星空纹理
-        texture_sky = pv.Texture('textures/starmap_8k_flipped.jpg')
-        
-        # 添加星空模型到场景中
-        self.plotter_widget.add_mesh(mesh_sky, texture=texture_sky, name='sky')
-        
-        # 添加星座连线图（第二层）
-        mesh_constellations = examples.planets.load_earth()
-        mesh_constellations.points *= 1000000  # 稍微大一点，确保在星空背景之上
-        mesh_constellations.flip_faces()
-        
-        # 加载星座连线纹理
-        texture_constellations = pv.Texture('textures/constellation_figures_flipped.jpg')
-        
-        # 添加星座连线模型到场景中
-        self.constellation_mesh = self.plotter_widget.add_mesh(mesh_constellations, texture=texture_constellations, name='constellations', opacity=0.2)
-        
-        # 添加日月和行星
-        self.add_solar_system()
-        
-        # 添加天球网格线
-        self.add_sky_grid()
-        
-        # 添加主要恒星到天球上
-        self.add_main_stars()
-        
-        # 保存恒星对象的引用，以便后续控制其可见性
-        self.stars_cloud = None
-        self.star_labels = []
-        
-        # 设置相机位置
-        cam_pos = (0, -50000, 25000)
-        focal_point = (0, 0, 0)
-        view_up = (0, 0, 1)
-        self.plotter_widget.camera_position = (cam_pos, focal_point, view_up)
-        
-        # 启用地形交互模式（保持 view_up 固定）
-        self.plotter_widget.enable_terrain_style()
-        
-        # 在每次渲染后保存相机位置
-        # 注意：这里我们不使用回调，而是在update_earth_rotation方法中直接使用当前相机位置
-        # 这样可以避免QtInteractor没有add_callback方法的问题
-        
-        # 添加坐标轴，设置标签颜色为白色
-        self.plotter_widget.add_axes(xlabel='X', ylabel='Y', zlabel='Z', color='white')
-        
-        # 更新地球自转的初始位置
-        self.update_earth_rotation()
-        
-        # 渲染场景
-        self.plotter_widget.render()
+    def start_staged_loading(self):
+        """分阶段加载场景：先显示地球，再依次加入星空、网格和恒星，星历文件在后台线程中加载"""
+        self.startup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='startup')
+        self.ephemeris_future = self.startup_executor.submit(self.load_ephemeris_in_background)
+        self.loading_stages = self.scene_stages()
+        QTimer.singleShot(0, self.run_next_loading_stage)
     
-    def add_sky_grid(self):
-        """在天球上添加网格线"""
-        # 天球半径
-        sky_radius = 1000000-500  # 与星空模型的半径相同
-        
-        # 创建经纬网格线
-        # 经度线（垂直方向）
-        longitude_lines = []
-        num_longitudes = 36  # 经度线数量
-        for i in range(num_longitudes):
-            # 计算经度角度（弧度）
-            lon = (i / num_longitudes) * 2 * np.pi
-            
-            # 创建经度线上的点
-            points = []
-            num_points = 100  # 每条线上的点数量
-            for j in range(num_points):
-                # 计算纬度角度（弧度）
-                lat = (-np.pi/2) + (j / (num_points-1)) * np.pi
-                
-                # 计算3D坐标
-                x = sky_radius * np.cos(lat) * np.cos(lon)
-                y = sky_radius * np.cos(lat) * np.sin(lon)
-                z = sky_radius * np.sin(lat)
-                
-                points.append([x, y, z])
-            
-            # 创建经度线
-            line = pv.lines_from_points(points)
-            longitude_lines.append(line)
-        
-        # 纬度线（水平方向）
-        latitude_lines = []
-        num_latitudes = 18  # 纬度线数量
-        for i in range(1, num_latitudes):
-            # 计算纬度角度（弧度）
-            lat = (-np.pi/2) + (i / num_latitudes) * np.pi
-            
-            # 创建纬度线上的点
-            points = []
-            num_points = 100  # 每条线上的点数量
-            for j in range(num_points):
-                # 计算经度角度（弧度）
-                lon = (j / (num_points-1)) * 2 * np.pi
-                
-                # 计算3D坐标
-                x = sky_radius * np.cos(lat) * np.cos(lon)
-                y = sky_radius * np.cos(lat) * np.sin(lon)
-                z = sky_radius * np.sin(lat)
-                
-                points.append([x, y, z])
-            
-            # 创建纬度线
-            line = pv.lines_from_points(points)
-            latitude_lines.append(line)
-        
-        # 合并所有经纬线
-        all_lines = longitude_lines + latitude_lines
-        combined_lines = pv.MultiBlock(all_lines)
-        
-        # 添加网格线到场景中，使用半透明的白色
-        self.sky_grid_actor = self.plotter_widget.add_mesh(combined_lines, color='white', opacity=0.5, line_width=1, name='sky_grid')
+    def load_ephemeris_in_background(self):
+        """后台线程：加载星历文件并统计耗时"""
+        with startup_profiler.stage('load ephemeris (background)'):
+            self.load_ephemeris()
     
-    def toggle_stars(self, state):
-        """显示/隐藏恒星的复选框回调函数"""
-        # 直接控制恒星演员的可见性
-        if hasattr(self, 'stars_actors') and self.stars_actors:
-            # 设置所有恒星演员的可见性
-            for actor in self.stars_actors:
-                if actor:
-                    actor.SetVisibility(state)
-            
-            # 同时控制恒星名称标签的可见性
-            for text_actor in self.star_labels:
-                if text_actor:
-                    text_actor.SetVisibility(state)
-            
-            # 同时控制星座连线的可见性
-            if hasattr(self, 'constellation_lines') and self.constellation_lines:
-                for line_actor in self.constellation_lines:
-                    if line_actor:
-                        line_actor.SetVisibility(state)
+    def run_next_loading_stage(self):
+        """执行下一个加载阶段，每个阶段之间返回事件循环，使窗口能及时刷新"""
+        if not self.loading_stages:
+            self.finish_staged_loading()
+            return
         
-        # 重新渲染场景
-        self.plotter_widget.render()
+        name, stage = self.loading_stages[0]
+        if stage == self.add_solar_system and not self.ephemeris_future.done():
+            # 日月行星需要等待后台的星历文件加载完成
+            self.loading_label.setText("正在加载星历...")
+            QTimer.singleShot(50, self.run_next_loading_stage)
+            return
+        self.loading_stages.pop(0)
+        
+        self.loading_label.setText(f"正在加载: {name}")
+        try:
+            if stage == self.add_solar_system:
+                # 把后台线程中的异常转到这里抛出
+                self.ephemeris_future.result()
+            with startup_profiler.stage(name):
+                stage()
+            # 新加入的对象（如半径约1e6公里的天球）可能在当前裁剪范围之外
+            self.plotter_widget.reset_camera_clipping_range()
+            with startup_profiler.stage(f'render ({name})'):
+                self.plotter_widget.render()
+            startup_profiler.mark_first_frame()
+        except Exception as e:
+            print(f"加载阶段 {name} 失败: {e}")
+        
+        QTimer.singleShot(0, self.run_next_loading_stage)
     
-    def toggle_sky_grid(self, state):
-        """显示/隐藏天球网格的复选框回调函数"""
-        # 直接控制天球网格演员的可见性
-        if hasattr(self, 'sky_grid_actor') and self.sky_grid_actor:
-            # 设置天球网格演员的可见性
-            self.sky_grid_actor.SetVisibility(state)
-        
-        # 重新渲染场景
-        self.plotter_widget.render()
+    def finish_staged_loading(self):
+        """所有阶段加载完成"""
+        self.startup_executor.shutdown(wait=False)
+        if hasattr(self, 'ephemeris'):
+            # 播放时的星历在后台线程中预先计算，界面线程只读取结果
+            self.ephemeris_prefetcher = EphemerisPrefetcher(self.ephemeris, profiler=self.frame_profiler)
+        self.loading_label.hide()
+        self.plotter_widget.reset_camera_clipping_range()
+        self.render_views()
+        print(startup_profiler.report())
+        print(self.scene_actors.summary())
+        # 场景加载完成后再打开启动参数中的附加视图
+        for frame in self.initial_views:
+            self.view_checkboxes[frame].setChecked(True)
     
-    def toggle_constellations(self, state):
-        """显示/隐藏星座连线图的复选框回调函数"""
-        # 直接控制星座连线图演员的可见性
-        if hasattr(self, 'constellation_mesh') and self.constellation_mesh:
-            # 设置星座连线图演员的可见性
-            self.constellation_mesh.SetVisibility(state)
+    def seek_callback(self):
+        """跳转按钮回调函数：先用关键帧插值立即显示，精确位置算好后再刷新一次"""
+        when = datetime.datetime.fromtimestamp(self.seek_edit.dateTime().toSecsSinceEpoch(), tz=utc)
+        with self.frame_profiler.stage('seek'):
+            self.seek(when)
+        self.time_display_label.setText(self.simulation_time.strftime("%Y-%m-%d %H:%M:%S UTC"))
+        self.update_pick_label()
+        self.render_views()
         
-        # 重新渲染场景
-        self.plotter_widget.render()
+        # 暂停时由定时器等待后台的精确结果；运行时之后的帧会自动读取
+        self.seek_refine_attempts = 40
+        QTimer.singleShot(50, self.refine_seek)
     
-    def add_solar_system(self):
-        """添加日月和行星到场景中"""
-        # 定义要显示的天体
-        self.bodies = {
-            'sun': {
-                'name': '太阳',
-                'color': 'yellow', 
-                'size': 10000,
-                'skyfield_name': 10  # 太阳的ID
-            },
-            'moon': {
-                'name': '月球',
-                'color': 'white', 
-                'size': 10000,
-                'skyfield_name': 301  # 月球的ID
-            },
-            'mercury': {
-                'name': '水星',
-                'color': 'white', 
-                'size': 2000,
-                'skyfield_name': 199  # 水星的ID
-            },
-            'venus': {
-                'name': '金星',
-                'color': 'yellow', 
-                'size': 3000,
-                'skyfield_name': 299  # 金星的ID
-            },
-            'mars': {
-                'name': '火星',
-                'color': 'red', 
-                'size': 2500,
-                'skyfield_name': 499  # 火星的ID
-            },
-            'jupiter': {
-                'name': '木星',
-                'color': 'orange', 
-                'size': 8000,
-                'skyfield_name': 5  # 木星 barycenter的ID
-            },
-            'saturn': {
-                'name': '土星',
-                'color': 'yellow', 
-                'size': 6000,
-                'skyfield_name': 6  # 土星 barycenter的ID
-            },
-            'uranus': {
-                'name': '天王星',
-                'color': 'lightblue', 
-                'size': 4000,
-                'skyfield_name': 7  # 天王星 barycenter的ID
-            },
-            'neptune': {
-                'name': '海王星',
-                'color': 'blue', 
-                'size': 3500,
-                'skyfield_name': 8  # 海王星 barycenter的ID
-            }
-        }
-        
-        # 天球半径
-        self.sky_radius = 1000000
+    def refine_seek(self):
+        """跳转后后台的精确星历算好时，用精确位置重新更新一次场景"""
+        prefetcher = self.ephemeris_prefetcher
+        if self.simulation_running or prefetcher is None:
+            return
+        ephemeris = prefetcher.lookup(self.simulation_time, self.simulation_step)
+        if ephemeris is None:
+            self.seek_refine_attempts -= 1
+            if self.seek_refine_attempts > 0:
+                QTimer.singleShot(50, self.refine_seek)
+            return
+        self.update_scene(ephemeris)
+        self.render_views()
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止后台线程"""
+        if self.ephemeris_prefetcher is not None:
+            self.ephemeris_prefetcher.shutdown()
+        if getattr(self, 'keyframes', None):
+            self.keyframes.shutdown()
+        if self.startup_executor is not None:
+            self.startup_executor.shutdown(wait=False, cancel_futures=True)
+        if self.pass_executor is not None:
+            self.pass_executor.shutdown(wait=False, cancel_futures=True)
+        for view in self.scene_views.values():
+            view.close()
+        super().closeEvent(event)
+    
+    def hover_callback(self, obj, event):
+        """鼠标移动时显示光标下的恒星或天体，拖动旋转视角时不拾取"""
+        if self.pick_press_position is not None:
+            return
+        x, y = self.plotter_widget.iren.get_event_position()
+        with self.frame_profiler.stage('pick'):
+            picked = self.pick(x, y)
+        self.hover_label.setText(f"光标: {self.describe_pick(picked).splitlines()[0]}" if picked else "")
+    
+    def pick_press_callback(self, obj, event):
+        """记录左键按下的位置，用于区分单击和拖动"""
+        self.pick_press_position = self.plotter_widget.iren.get_event_position()
+    
+    def pick_release_callback(self, obj, event):
+        """左键单击（按下和松开的位置几乎相同）时选中光标下的恒星或天体"""
+        press_position, self.pick_press_position = self.pick_press_position, None
+        x, y = self.plotter_widget.iren.get_event_position()
+        if press_position is None or abs(x - press_position[0]) + abs(y - press_position[1]) > 3:
+            return
+        with self.frame_profiler.stage('pick'):
+            self.picked = self.pick(x, y)
+        self.update_pick_label()
+    
+    def update_pick_label(self):
+        """刷新选中对象的信息，赤经赤纬随仿真时间变化"""
+        if self.picked is None:
+            self.pick_label.setText("单击恒星或天体查看信息")
+            return
+        self.pick_label.setText(self.describe_pick(self.picked))
+    
+    def predict_passes_callback(self):
+        """过境预报按钮回调函数：在后台线程中计算从当前仿真时间开始的过境（计算本身分配到进程池）"""
+        if not self.satellite_path or not getattr(self, 'ground_stations', None):
+            self.pass_status_label.setText("需要用 --satellites 和 --stations 指定卫星和地面站")
+            return
+        if self.pass_future is not None and not self.pass_future.done():
+            return
+        if self.pass_executor is None:
+            self.pass_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='passes')
+        start_time = self.simulation_time
+        end_time = start_time + datetime.timedelta(days=PASS_PREDICTION_DAYS)
+        self.pass_future = self.pass_executor.submit(predict_passes, self.satellite_path, self.ground_stations,
+                                                     start_time, end_time, self.pass_elevation_spinbox.value())
+        self.pass_button.setEnabled(False)
+        self.pass_status_label.setText("正在计算过境...")
+        QTimer.singleShot(200, self.poll_passes)
+    
+    def poll_passes(self):
+        """等待后台的过境预报完成，完成后显示在表格中"""
+        if not self.pass_future.done():
+            QTimer.singleShot(200, self.poll_passes)
+            return
+        self.pass_button.setEnabled(True)
+        try:
+            self.passes = self.pass_future.result()
+        except Exception as e:
+            self.pass_status_label.setText(f"过境预报失败: {e}")
+            return
         
-        # 遍历每个天体
-        for body_name, body_info in self.bodies.items():
-            try:
-                # 获取天体
-                body = self.planets[body_info['skyfield_name']]
-                
-                # 获取时间尺度
-                t = self.ts.from_datetime(self.simulation_time)
-                
-                # 计算天体相对于地球的位置
-                astrometric = self.earth.at(t).observe(body)
-                ra, dec, distance = astrometric.radec()
-                
-                # 转换为弧度
-                ra_rad = ra.radians
-                dec_rad = dec.radians
-                
-                # 计算天球上的3D坐标
-                # 使用赤经赤纬计算天球坐标
-                x_sky = self.sky_radius * np.cos(dec_rad) * np.cos(ra_rad)
-                y_sky = self.sky_radius * np.cos(dec_rad) * np.sin(ra_rad)
-                z_sky = self.sky_radius * np.sin(dec_rad)
-                
-                # 应用地球自转和镜像变换
-                pos = np.array([x_sky, y_sky, z_sky])
-
-                # 创建天体模型
-                size = body_info['size']
-                sphere = pv.Sphere(radius=size, center=pos)
-                
-                # 添加到场景中
-                actor = self.plotter_widget.add_mesh(sphere, color=body_info['color'], name=body_info['name'])
-                self.solar_system_actors[body_name] = actor
-                
-                # 如果是太阳，添加到地心的连线并设置光源
-                if body_name == 'sun':
-                    # 创建太阳到地心的连线
-                    line_points = [pos, [0, 0, 0]]  # 太阳位置到原点（地心）
-                    line = pv.lines_from_points(line_points)
-                    sun_earth_line = self.plotter_widget.add_mesh(line, color='yellow', line_width=2, name='sun_earth_line')
-                    self.solar_system_actors['sun_earth_line'] = sun_earth_line
-                    
-                    # 在太阳位置设置光源
-                    # 保存光源引用，以便后续更新
-                    light = pv.Light(position=pos, focal_point=[0, 0, 0], intensity=1.0, color='white')
-                    self.plotter_widget.add_light(light)
-                    self.solar_system_actors['sun_light'] = light
-                
-                # 转换为时分秒格式
-                ra_str = ra.hms()
-                dec_str = dec.dms()
-                
-                # 格式化输出
-                ra_hms_str = f"{int(ra_str[0])}h {int(ra_str[1])}m {ra_str[2]:.1f}s"
-                dec_dms_str = f"{int(dec_str[0])}° {int(abs(dec_str[1]))}' {abs(dec_str[2]):.1f}\""
-                if dec_str[0] < 0:
-                    dec_dms_str = f"-{dec_dms_str}"
-                
-                # 添加标签，包含赤经赤纬信息
-                label_text = f"{body_info['name']}\nRA: {ra_hms_str}\nDec: {dec_dms_str}"
-                text_actor = self.plotter_widget.add_text(label_text, position=pos, font_size=8, color=body_info['color'])
-                self.solar_system_actors[f'{body_name}_label'] = text_actor
-                
-                print(f"添加天体: {body_info['name']}，位置: {pos}")
-                print(f"  赤经: {ra_hms_str}，赤纬: {dec_dms_str}")
-                print(f"  距离: {distance.au:.6f} AU")
-                
-            except Exception as e:
-                print(f"添加天体 {body_info['name']} 失败: {e}")
-                continue
+        self.pass_table.setRowCount(len(self.passes))
+        for row, p in enumerate(self.passes):
+            values = (p['station'], p['satellite'], p['aos'].strftime("%m-%d %H:%M:%S"),
+                      p['los'].strftime("%m-%d %H:%M:%S"), f"{p['max_elevation']:.1f}°")
+            for column, value in enumerate(values):
+                self.pass_table.setItem(row, column, QTableWidgetItem(value))
+        self.pass_table.resizeColumnsToContents()
+        self.pass_status_label.setText(f"过境: {len(self.passes)} 次")
+        self.export_passes_button.setEnabled(bool(self.passes))
+    
+    def export_passes(self):
+        """导出CSV按钮回调函数"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出过境预报", "passes.csv", "CSV (*.csv)")
+        if file_path:
+            write_passes_csv(self.passes, file_path)
+            self.pass_status_label.setText(f"已导出 {len(self.passes)} 次过境")
+    
+    def toggle_stars(self, state):
+        """显示/隐藏恒星的复选框回调函数"""
+        # 恒星、标签、星座连线和星表都在stars图层中
+        self.scene_actors.set_visible('stars', state)
         
-        # 标记为使用了真实位置
-        use_real_positions = True
+        # 重新渲染场景
+        self.render_views()
+    
+    def toggle_sky_grid(self, state):
+        """显示/隐藏天球网格的复选框回调函数"""
+        # 网格线和刻度标签都在sky_grid图层中
+        self.scene_actors.set_visible('sky_grid', state)
+        
+        # 重新渲染场景
+        self.render_views()
+    
+    def grid_spacing_callback(self, value):
+        """网格间距设置的回调函数"""
+        self.sky_grid_spacing = value
+        self.update_sky_grid()
+        self.render_views()
+    
+    def toggle_sky_grid_labels(self, state):
+        """显示/隐藏网格刻度的复选框回调函数"""
+        self.sky_grid_labels = bool(state)
+        self.update_sky_grid(force=True)
+        self.render_views()
+    
+    def toggle_constellations(self, state):
+        """显示/隐藏星座连线图的复选框回调函数"""
+        self.scene_actors.set_visible('constellation_figures', state)
+        
+        # 重新渲染场景
+        self.render_views()
     
     def toggle_solar_system(self, state):
         """显示/隐藏日月和行星的复选框回调函数"""
-        # 直接控制日月和行星演员的可见性
-        if hasattr(self, 'solar_system_actors') and self.solar_system_actors:
-            # 设置所有日月和行星演员的可见性
-            for actor_name, actor in self.solar_system_actors.items():
-                if actor:
-                    actor.SetVisibility(state)
+        # 天体、日地连线和天体标签都在solar_system图层中；光源不受影响
+        self.scene_actors.set_visible('solar_system', state)
+        self.scene_actors.set_visible('trails', bool(state) and self.show_trails)
         
         # 重新渲染场景
-        self.plotter_widget.render()
+        self.render_views()
+    
+    def toggle_satellites(self, state):
+        """显示/隐藏卫星的复选框回调函数"""
+        self.scene_actors.set_visible('satellites', state)
+        self.render_views()
+    
+    def toggle_trails(self, state):
+        """显示/隐藏日月行星轨迹的复选框回调函数"""
+        self.show_trails = bool(state)
+        self.scene_actors.set_visible('trails', self.show_trails and self.scene_actors.is_visible('solar_system'))
+        self.render_views()
+    
+    def toggle_scene_view(self, frame, state):
+        """打开/关闭附加视图的复选框回调函数"""
+        if state and frame not in self.scene_views:
+            plotter = QtInteractor(self.view_splitter)
+            self.view_splitter.addWidget(plotter)
+            self.scene_views[frame] = SceneView(self, plotter, frame)
+        elif not state and frame in self.scene_views:
+            view = self.scene_views.pop(frame)
+            view.close()
+            view.plotter.setParent(None)
+            view.plotter.deleteLater()
+        self.view_splitter.setVisible(bool(self.scene_views))
+        self.render_views()
+    
+    def render_views(self):
+        """渲染主视图和所有附加视图"""
+        with self.frame_profiler.stage('render'):
+            self.plotter_widget.render()
+        if self.scene_views:
+            with self.frame_profiler.stage('views'):
+                for view in self.scene_views.values():
+                    view.render()
     
     def toggle_earth_rotation(self, state):
         """地球自转控制复选框回调函数"""
         # 重新渲染场景
-        self.plotter_widget.render()
+        self.render_views()
     
     def slider_callback(self, value):
         """滑块回调函数"""
@@ -547,14 +3774,15 @@ class SatelliteOrbitApp(QMainWindow):
         print("开始运行仿真...")
         self.simulation_running = True
         
-        # 如果还没有定时器，创建一个
+        # 暂停期间的墙钟时间不计入仿真
+        self.simulation_clock.reset()
+        
+        # 如果还没有定时器，创建一个；定时器按目标帧率触发，仿真时间由时钟按墙钟时间推进
         if self.timer is None:
-            from PyQt5.QtCore import QTimer
             self.timer = QTimer()
+            self.timer.setTimerType(Qt.PreciseTimer)
             self.timer.timeout.connect(self.simulation_step_callback)
-            self.timer.start(100)  # 每100毫秒执行一次
-        else:
-            self.timer.start(100)
+        self.timer.start(max(1, int(self.simulation_clock.tick_interval * 1000)))
     
     def pause_simulation(self):
         """暂停仿真"""
@@ -565,588 +3793,226 @@ class SatelliteOrbitApp(QMainWindow):
         if self.timer:
             self.timer.stop()
     
+    def target_fps_callback(self, value):
+        """目标帧率设置回调函数"""
+        self.simulation_clock.target_fps = value
+        self.simulation_clock.reset()
+        if self.timer and self.simulation_running:
+            self.timer.start(max(1, int(self.simulation_clock.tick_interval * 1000)))
+    
     def simulation_step_callback(self):
         """仿真步长回调函数"""
         if not self.simulation_running:
             return
         
-        # 根据滑块值获取映射后的仿真步长
-        slider_value = self.slider.value()
-        step_seconds = self.step_mapping.get(slider_value, 0)
+        # 按墙钟时间计算到期的固定步数，渲染跟不上时多个步合并为一帧
+        ticks = self.simulation_clock.advance()
+        if ticks == 0:
+            return
         
-        # 更新仿真时间
-        self.simulation_time += datetime.timedelta(seconds=step_seconds)
+        # 根据滑块值获取映射后的仿真步长（每0.1秒墙钟时间的仿真秒数），换算为每个固定步的仿真秒数
+        slider_value = self.slider.value()
+        step_seconds = self.step_mapping.get(slider_value, 0) * self.simulation_clock.tick_interval / SIMULATION_STEP_INTERVAL
+        
+        # 更新仿真时间：由锚点加上整数步数算出，避免每帧累加微秒舍入误差，
+        # 与星历窗口按下标算出的时间保持一致；步长变化或时间被跳转后重新设置锚点
+        self.simulation_step = step_seconds
+        anchor = self.simulation_anchor
+        if anchor is None or anchor[1] != step_seconds or anchor[3] != self.simulation_time:
+            anchor = self.simulation_anchor = [self.simulation_time, step_seconds, 0, None]
+        anchor[2] += ticks
+        self.simulation_time = anchor[0] + datetime.timedelta(seconds=step_seconds * anchor[2])
+        anchor[3] = self.simulation_time
         
         # 更新时间显示
         self.time_display_label.setText(self.simulation_time.strftime("%Y-%m-%d %H:%M:%S UTC"))
         
-        # 更新日月和行星位置
-        self.update_solar_system()
+        self.frame_profiler.begin_frame()
         
-        # 更新地球自转
-        self.update_earth_rotation()
+        # 更新日月和行星位置、地球自转等
+        self.update_scene()
         
-        # 重新渲染场景
+        # 重新渲染场景；附加视图共享本步的计算结果，只增加各自的渲染开销
+        self.render_views()
+        self.simulation_clock.record_frame()
+        self.frame_profiler.end_frame()
+        
+        # 每0.5秒刷新一次帧率显示和性能面板
+        now = time.perf_counter()
+        if now - self.fps_label_update_time >= 0.5:
+            self.fps_label_update_time = now
+            self.fps_label.setText(f"帧率: {self.simulation_clock.achieved_fps():.1f} / {self.simulation_clock.target_fps} FPS"
+                                   f"  丢帧: {self.simulation_clock.dropped_frames}")
+            self.update_performance_hud()
+            self.update_pick_label()
+    
+    def update_performance_hud(self):
+        """刷新三维视图右上角的性能面板"""
+        hud = self.scene_actors.get('hud', 'performance')
+        if hud is not None and self.scene_actors.is_visible('hud'):
+            # 3 为右上角；下方是每个图层的演员数量和内存
+            hud.SetText(3, self.frame_profiler.summary() + "\n\n" + self.scene_actors.summary())
+    
+    def toggle_performance_hud(self, state):
+        """显示/隐藏性能面板的复选框回调函数"""
+        if state and self.scene_actors.get('hud', 'performance') is None:
+            self.scene_actors.add('hud', 'performance', self.plotter_widget.add_text(
+                '', position='upper_right', font_size=8, color='white', font='courier', name='performance_hud'))
+        self.scene_actors.set_visible('hud', state)
+        self.update_performance_hud()
         self.plotter_widget.render()
     
-    def update_earth_rotation(self):
-        """更新地球模型的旋转"""
-        # 获取时间尺度
-        t = self.ts.from_datetime(self.simulation_time)
-        
-        # 使用skyfield库计算GMST（返回小时）
-        gmst_hours = t.gmst
-        
-        # 将小时转换为弧度（1小时 = 2π/24 弧度）
-        gmst_rad = gmst_hours * (2 * np.pi / 24)
-        
-        # 计算地球自转角度
-        # 注意：这里我们使用GMST来计算地球的旋转角度
-        # 因为GMST表示的是格林威治子午线的恒星时，与地球自转直接相关
-        rotation_angle = gmst_rad
-        
-        # 应用旋转到地球模型
-        if hasattr(self, 'earth_mesh') and self.earth_mesh:
-            # 创建旋转矩阵（绕z轴旋转）
-            rotation_matrix = np.array([
-                [np.cos(rotation_angle), -np.sin(rotation_angle), 0],
-                [np.sin(rotation_angle), np.cos(rotation_angle), 0],
-                [0, 0, 1]
-            ])
-            
-            # 应用旋转（从初始状态开始）
-            # 假设地球的中心在原点，直接应用旋转矩阵
-            rotated_points = []
-            for point in self.earth_initial_points:
-                # 直接应用旋转矩阵
-                rotated_point = rotation_matrix @ point
-                rotated_points.append(rotated_point)
-            
-            # 更新地球模型的点
-            self.earth_mesh.points = np.array(rotated_points)
-        
-        # 根据checkbox状态决定是否旋转相机
-        if hasattr(self, 'earth_rotation_checkbox'):
-            # 获取checkbox状态
-            earth_rotation_only = self.earth_rotation_checkbox.isChecked()
-            
-            # 如果不选地球自转（即相机随地球一起自转）
-            if not earth_rotation_only:
-                # 获取当前相机位置
-                current_camera = self.plotter_widget.camera_position
-                if current_camera:
-                    cam_pos, focal_point, view_up = current_camera
-                    
-                    # 计算GMST的差值
-                    if self.last_gmst_rad is not None:
-                        # 使用差值作为旋转角度
-                        delta_gmst_rad = gmst_rad - self.last_gmst_rad
-                    else:
-                        # 第一次运行，使用0作为旋转角度
-                        delta_gmst_rad = 0
-                    
-                    # 将相机位置转换为numpy数组
-                    cam_pos_np = np.array(cam_pos)
-                    
-                    # 创建旋转矩阵（绕z轴旋转）
-                    # 注意：这里我们使用负的旋转角度，因为相机需要与地球自转方向相反才能保持相对静止
-                    camera_rotation_matrix = np.array([
-                        [np.cos(delta_gmst_rad), -np.sin(delta_gmst_rad), 0],
-                        [np.sin(delta_gmst_rad), np.cos(delta_gmst_rad), 0],
-                        [0, 0, 1]
-                    ])
-                    
-                    # 应用旋转到相机位置
-                    rotated_cam_pos = camera_rotation_matrix @ cam_pos_np
-                    
-                    # 更新相机位置
-                    self.plotter_widget.camera_position = (tuple(rotated_cam_pos), focal_point, view_up)
+    def toggle_trace_recording(self):
+        """开始/停止录制时间线，停止时写入Chrome trace格式的JSON文件"""
+        if not self.frame_profiler.tracing:
+            self.frame_profiler.start_trace()
+            self.trace_button.setText("停止录制并导出时间线")
+            print("开始录制性能时间线...")
+            return
         
-        # 更新last_gmst_rad为当前值
-        self.last_gmst_rad = gmst_rad
+        file_path = datetime.datetime.now().strftime("frame_trace_%Y%m%d_%H%M%S.json")
+        count = self.frame_profiler.stop_trace(file_path)
+        self.trace_button.setText("录制性能时间线")
+        print(f"已导出 {count} 个事件到 {file_path}，可在 chrome://tracing 或 https://ui.perfetto.dev 中打开")
+
+class OffscreenSkyScene(SkyScene):
+    """离屏天空场景，在没有显示器的环境中渲染与主窗口相同的场景"""
+    def __init__(self, window_size=(1920, 1080), simulation_time=None, star_catalog_path=None, max_texture_size=None,
+                 satellite_path=None, station_path=None):
+        plotter = pv.Plotter(off_screen=True, window_size=list(window_size))
+        self.init_sky_scene(plotter, simulation_time=simulation_time, star_catalog_path=star_catalog_path,
+                            max_texture_size=max_texture_size, satellite_path=satellite_path, station_path=station_path)
+        self.initialize_scene()
     
-    def update_solar_system(self):
-        """更新日月和行星位置"""
-        
-        # 获取时间尺度
-        t = self.ts.from_datetime(self.simulation_time)
-        
-        # 遍历每个天体
-        for body_name, body_info in self.bodies.items():
-            try:
-                # 获取天体
-                body = self.planets[body_info['skyfield_name']]
-                
-                # 计算天体相对于地球的位置
-                astrometric = self.earth.at(t).observe(body)
-                ra, dec, distance = astrometric.radec()
-                
-                # 转换为弧度
-                ra_rad = ra.radians
-                dec_rad = dec.radians
-                
-                # 计算天球上的3D坐标
-                x_sky = self.sky_radius * np.cos(dec_rad) * np.cos(ra_rad)
-                y_sky = self.sky_radius * np.cos(dec_rad) * np.sin(ra_rad)
-                z_sky = self.sky_radius * np.sin(dec_rad)
-                
-                # 应用地球自转和镜像变换
-                pos = np.array([x_sky, y_sky, z_sky])
-
-                # 更新天体位置
-                if body_name in self.solar_system_actors:
-                    actor = self.solar_system_actors[body_name]
-                    if actor:
-                        # 获取球体网格
-                        mesh = actor.GetMapper().GetInput()
-                        # 更新球体位置
-                        mesh.points = mesh.points - mesh.center + pos
-                
-                # 如果是太阳，更新到地心的连线和光源位置
-                if body_name == 'sun':
-                    # 更新太阳到地心的连线
-                    if 'sun_earth_line' in self.solar_system_actors:
-                        line_actor = self.solar_system_actors['sun_earth_line']
-                        if line_actor:
-                            line_mesh = line_actor.GetMapper().GetInput()
-                            line_points = [pos, [0, 0, 0]]  # 太阳位置到原点（地心）
-                            new_line = pv.lines_from_points(line_points)
-                            line_mesh.points = new_line.points
-                    
-                    # 更新光源位置
-                    if 'sun_light' in self.solar_system_actors:
-                        light = self.solar_system_actors['sun_light']
-                        if light:
-                            # 更新光源位置
-                            light.SetPosition(pos[0], pos[1], pos[2])
-                        
-                # 更新标签位置
-                label_name = f'{body_name}_label'
-                if label_name in self.solar_system_actors:
-                    text_actor = self.solar_system_actors[label_name]
-                    if text_actor:
-                        # 更新标签位置（使用PyVista的方法）
-                        text_actor.position = pos
-                        
-                        # 更新标签内容
-                        # 转换为时分秒格式
-                        ra_str = ra.hms()
-                        dec_str = dec.dms()
-                        
-                        # 格式化输出
-                        ra_hms_str = f"{int(ra_str[0])}h {int(ra_str[1])}m {ra_str[2]:.1f}s"
-                        dec_dms_str = f"{int(dec_str[0])}° {int(abs(dec_str[1]))}' {abs(dec_str[2]):.1f}\""
-                        if dec_str[0] < 0:
-                            dec_dms_str = f"-{dec_dms_str}"
-                        
-                        # 更新标签文本
-                        label_text = f"{body_info['name']}\nRA: {ra_hms_str}\nDec: {dec_dms_str}"
-                        # 移除旧标签并添加新标签
-                        self.plotter_widget.remove_actor(text_actor)
-                        new_text_actor = self.plotter_widget.add_text(label_text, position=pos, font_size=8, color=body_info['color'])
-                        self.solar_system_actors[label_name] = new_text_actor
-                
-            except Exception as e:
-                print(f"更新天体 {body_info['name']} 失败: {e}")
-                continue
+    def render_frame(self, when, file_path):
+        """把场景更新到时间when并保存为PNG图片"""
+        self.simulation_time = when
+        self.update_scene()
+        self.plotter_widget.screenshot(file_path)
+
+# 每个渲染进程中的离屏场景，由进程池的初始化函数创建一次
+_offscreen_scene = None
+
+def _init_offscreen_worker(window_size, star_catalog_path, step_seconds, max_texture_size=None, satellite_path=None,
+                           station_path=None, start_time=None):
+    """进程池初始化函数：在每个进程中构建一次离屏场景，场景的初始时间为导出的起始时间"""
+    global _offscreen_scene
+    _offscreen_scene = OffscreenSkyScene(window_size=window_size, simulation_time=start_time,
+                                         star_catalog_path=star_catalog_path, max_texture_size=max_texture_size,
+                                         satellite_path=satellite_path, station_path=station_path)
+    # 星历引擎按帧间隔向前批量计算
+    _offscreen_scene.simulation_step = step_seconds
+
+def _render_offscreen_frames(output_dir, frames):
+    """在当前进程中依次渲染一段连续的帧，frames为 (帧序号, 时间) 列表"""
+    for index, when in frames:
+        _offscreen_scene.render_frame(when, os.path.join(output_dir, f"frame_{index:06d}.png"))
+    return len(frames)
+
+def render_time_lapse(output_dir, start_time, end_time, step_seconds, workers=None,
+                      window_size=(1920, 1080), star_catalog_path=None, max_texture_size=None, satellite_path=None,
+                      station_path=None):
+    """离屏批量渲染从start_time到end_time（含）每隔step_seconds秒的帧，输出编号的PNG图片
     
-    def read_constellations(self, file_path):
-        """读取星座数据文件"""
-        constellations = {}
-        current_constellation = None
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 检查是否是星座标题行
-                if '主要恒星坐标:' in line:
-                    # 提取星座名称
-                    constellation_name = line.split('主要恒星坐标:')[0].strip()
-                    current_constellation = constellation_name
-                    constellations[current_constellation] = []
-                else:
-                    # 解析恒星数据
-                    if current_constellation:
-                        # 使用正则表达式解析恒星数据
-                        pattern = r'(.+?)\s+\((.+?)\):\s+视星等\s+([\d.-]+),\s+赤经\s+(.+?),\s+赤纬\s+(.+?),\s+光谱型\s+(.+)'
-                        match = re.match(pattern, line)
-                        
-                        if match:
-                            star_id, star_name, magnitude, ra_str, dec_str, spectral_type = match.groups()
-                        else:
-                            # 尝试简化格式
-                            parts = line.split('): 视星等 ')
-                            if len(parts) == 2:
-                                star_part = parts[0]
-                                rest_part = parts[1]
-                                
-                                # 提取恒星ID和名称
-                                star_id_name = star_part.split(' ')
-                                star_id = star_id_name[0]
-                                if len(star_id_name) > 1:
-                                    star_name = ' '.join(star_id_name[1:])
-                                else:
-                                    star_name = star_id
-                                
-                                # 提取视星等、赤经、赤纬、光谱型
-                                rest_parts = rest_part.split(', 赤经 ')
-                                if len(rest_parts) == 2:
-                                    magnitude = rest_parts[0]
-                                    ra_dec_spec = rest_parts[1].split(', 赤纬 ')
-                                    if len(ra_dec_spec) == 2:
-                                        ra_str = ra_dec_spec[0]
-                                        dec_spec = ra_dec_spec[1].split(', 光谱型 ')
-                                        if len(dec_spec) == 2:
-                                            dec_str = dec_spec[0]
-                                            spectral_type = dec_spec[1]
-                                        else:
-                                            dec_str = dec_spec[0]
-                                            spectral_type = ''
-                                    else:
-                                        ra_str = ra_dec_spec[0]
-                                        dec_str = ''
-                                        spectral_type = ''
-                                else:
-                                    magnitude = rest_parts[0]
-                                    ra_str = ''
-                                    dec_str = ''
-                                    spectral_type = ''
-                            else:
-                                # 最简单的格式
-                                parts = line.split(': 视星等 ')
-                                if len(parts) == 2:
-                                    star_info = parts[0]
-                                    rest_info = parts[1]
-                                    
-                                    # 提取恒星ID和名称
-                                    star_parts = star_info.split(' ')
-                                    star_id = star_parts[0]
-                                    star_name = ' '.join(star_parts[1:]) if len(star_parts) > 1 else star_id
-                                    
-                                    # 提取其他信息
-                                    info_parts = rest_info.split(', ')
-                                    if len(info_parts) >= 4:
-                                        magnitude = info_parts[0]
-                                        ra_str = info_parts[1].replace('赤经 ', '')
-                                        dec_str = info_parts[2].replace('赤纬 ', '')
-                                        spectral_type = info_parts[3].replace('光谱型 ', '')
-                                    else:
-                                        magnitude = info_parts[0]
-                                        ra_str = ''
-                                        dec_str = ''
-                                        spectral_type = ''
-                                else:
-                                    continue
-                        
-                        # 转换赤经赤纬为数值
-                        try:
-                            # 解析赤经
-                            # 尝试从括号中提取度数
-                            ra_match = re.search(r'\(([\d.-]+)°\)', ra_str)
-                            if ra_match:
-                                # 直接使用括号中的度数
-                                ra_deg = float(ra_match.group(1))
-                            else:
-                                # 尝试解析时:分格式
-                                ra_parts = ra_str.split('h ')
-                                if len(ra_parts) == 2:
-                                    ra_hour = float(ra_parts[0])
-                                    ra_min_part = ra_parts[1].split('m')[0]
-                                    ra_min = float(ra_min_part)
-                                    ra_deg = (ra_hour + ra_min/60) * 15  # 1小时 = 15度
-                                else:
-                                    # 直接是度数
-                                    ra_deg = float(ra_str.replace('°', ''))
-                            
-                            # 解析赤纬
-                            # 尝试从括号中提取度数
-                            dec_match = re.search(r'\(([\d.-]+)°\)', dec_str)
-                            if dec_match:
-                                # 直接使用括号中的度数
-                                dec_deg = float(dec_match.group(1))
-                            else:
-                                # 尝试解析度:分格式
-                                dec_parts = dec_str.split('° ')
-                                if len(dec_parts) == 2:
-                                    dec_deg = float(dec_parts[0])
-                                    dec_min_part = dec_parts[1].split("'")[0]
-                                    dec_min = float(dec_min_part)
-                                    if dec_deg < 0:
-                                        dec_deg = dec_deg - dec_min/60
-                                    else:
-                                        dec_deg = dec_deg + dec_min/60
-                                else:
-                                    # 直接是度数
-                                    dec_deg = float(dec_str.replace('°', ''))
-                            
-                            # 转换为弧度
-                            ra_rad = np.radians(ra_deg)#(360 - (ra_deg+180)%360)
-                            dec_rad = np.radians(dec_deg)
-                            
-                            # 计算三维坐标
-                            # 假设距离为1（天球）
-                            distance = 1.0
-                            x = distance * np.cos(dec_rad) * np.cos(ra_rad)
-                            y = distance * np.cos(dec_rad) * np.sin(ra_rad)
-                            z = distance * np.sin(dec_rad)
-                            
-                            # 添加恒星数据
-                            constellations[current_constellation].append({
-                                'id': star_id,
-                                'name': star_name,
-                                'magnitude': float(magnitude),
-                                'ra_deg': ra_deg,
-                                'dec_deg': dec_deg,
-                                'ra_rad': ra_rad,
-                                'dec_rad': dec_rad,
-                                'spectral_type': spectral_type,
-                                'x': x,
-                                'y': y,
-                                'z': z
-                            })
-                        except Exception as e:
-                            print(f"解析恒星数据失败: {line}, 错误: {e}")
-                            continue
-        
-        return constellations
+    时间范围被切分为连续的段，分配给进程池中的多个进程并行渲染，
+    每个进程只构建一次场景，段内连续的帧可以复用星历引擎的批量计算结果。
+    """
+    if step_seconds <= 0:
+        raise ValueError("帧间隔必须为正数")
+    if end_time < start_time:
+        raise ValueError("结束时间不能早于起始时间")
+    os.makedirs(output_dir, exist_ok=True)
     
-    def add_main_stars(self):
-        """在天球上添加主要恒星"""
-        # 读取星座数据
-        constellations = self.read_constellations('stars.txt')
-        
-        # 定义星座颜色映射
-        constellation_colors = {
-            '猎户座': 'red',
-            '摩羯座': 'green',
-            '天鹰座': 'blue',
-            '天琴座': 'cyan',
-            '天鹅座': 'magenta',
-            '大熊座': 'yellow',
-            '牧夫座': 'orange',
-            '狮子座': 'purple',
-            '双子座': 'pink',
-            '仙女座': 'lightgreen',
-            '飞马座': 'lightblue'
-        }
-        
-        # 定义星座连线数据
-        constellation_connections = {
-            '猎户座': [
-                [0, 2],
-                [2, 6],
-                [4, 5],
-                [5, 6],
-                [6, 1],
-                [1, 3],
-                [3, 4],
-                [4, 0]
-            ],
-            '摩羯座': [
-                [2, 1],
-                [1, 5],
-                [5, 8],
-                [8, 3],
-                [3, 0],
-                [0, 4],
-                [4, 9],
-                [9, 6],
-                [6, 7],
-                [7, 1]
-            ],
-            '牧夫座': [
-                [0, 1],
-                [1, 4],
-                [4, 5],
-                [5, 3],
-                [3, 6],
-                [6, 0],
-                [0, 2],
-                [0, 7]
-            ],
-            '狮子座': [
-                [0, 7],
-                [7, 1],
-                [1, 6],
-                [6, 8],
-                [8, 4],
-                [1, 3],
-                [3, 2],
-                [2, 5],
-                [5, 0]
-            ],
-            '双子座': [
-                [1, 13],
-                [0, 11],
-                [11, 7],
-                [11, 9],
-                [9, 13],
-                [13, 8],
-                [13, 4],
-                [4, 12],
-                [4, 3],
-                [11, 6],
-                [6, 10],
-                [10, 5],
-                [10, 2]
-            ],
-            '仙女座_飞马座联合': [
-                [2, 1],
-                [1, 3],
-                [3, 0],
-                [4, 10],
-                [10, 9],
-                [9, 6],
-                [6, 7],
-                [7, 0],
-                [0, 5],
-                [5, 8],
-                [5, 6]
-            ]
-        }
-        
-        # 天球半径
-        sky_radius = 1000000 - 500  # 与星空模型的半径相同
-        
-        # 保存恒星演员、标签和连线
-        self.stars_actors = []
-        self.star_labels = []
-        self.constellation_lines = []
-        
-        # 特殊处理：联合仙女座和飞马座
-        combined_stars = []
-        combined_positions = []
-        andromeda_stars = constellations.get('仙女座', [])
-        pegasus_stars = constellations.get('飞马座', [])
-        
-        if andromeda_stars or pegasus_stars:
-            # 收集仙女座恒星
-            for star in andromeda_stars:
-                scale = sky_radius
-                pos = (star['x'] * scale, star['y'] * scale, star['z'] * scale)
-                combined_stars.append(star)
-                combined_positions.append(pos)
-                
-                # 添加恒星（球体）
-                size = max(5, 20 - star['magnitude'] * 2)
-                sphere = pv.Sphere(radius=size, center=pos)
-                actor = self.plotter_widget.add_mesh(sphere, color='lightgreen', name=star['name'])
-                self.stars_actors.append(actor)
-                
-                # 添加标签
-                text_actor = self.plotter_widget.add_text(star['name'], position=pos, font_size=8, color='lightgreen', name=f'star_label_{star['name']}')
-                self.star_labels.append(text_actor)
-            
-            # 收集飞马座恒星
-            for star in pegasus_stars:
-                scale = sky_radius
-                pos = (star['x'] * scale, star['y'] * scale, star['z'] * scale)
-                combined_stars.append(star)
-                combined_positions.append(pos)
-                
-                # 添加恒星（球体）
-                size = max(5, 20 - star['magnitude'] * 2)
-                sphere = pv.Sphere(radius=size, center=pos)
-                actor = self.plotter_widget.add_mesh(sphere, color='lightblue', name=star['name'])
-                self.stars_actors.append(actor)
-                
-                # 添加标签
-                text_actor = self.plotter_widget.add_text(star['name'], position=pos, font_size=8, color='lightblue', name=f'star_label_{star['name']}')
-                self.star_labels.append(text_actor)
-            
-            # 绘制仙女座和飞马座的联合连线
-            if len(combined_positions) > 1:
-                connections = constellation_connections.get('仙女座_飞马座联合', [])
-                if connections:
-                    all_lines = []
-                    for connection in connections:
-                        if len(connection) == 2:
-                            idx1, idx2 = connection
-                            if 0 <= idx1 < len(combined_positions) and 0 <= idx2 < len(combined_positions):
-                                all_lines.extend([2, idx1, idx2])
-                    
-                    if all_lines:
-                        poly_data = pv.PolyData(combined_positions)
-                        poly_data.lines = all_lines
-                        actor = self.plotter_widget.add_mesh(poly_data, color='white', line_width=2, name='仙女座_飞马座联合_line')
-                        self.constellation_lines.append(actor)
-            
-            print(f"加载联合星座: 仙女座_飞马座, 恒星数量: {len(combined_stars)}")
-        
-        # 遍历其他星座
-        for constellation_name, stars in constellations.items():
-            # 跳过已经处理过的星座
-            if constellation_name in ['仙女座', '飞马座']:
-                continue
-            
-            if not stars:
-                continue
-            
-            # 确定星座颜色
-            color = constellation_colors.get(constellation_name, 'white')
-            
-            # 收集恒星位置
-            star_positions = []
-            
-            for star in stars:
-                scale = sky_radius
-                pos = (star['x'] * scale, star['y'] * scale, star['z'] * scale)
-                star_positions.append(pos)
-                
-                # 添加恒星（球体）
-                size = max(5, 20 - star['magnitude'] * 2)
-                sphere = pv.Sphere(radius=size, center=pos)
-                actor = self.plotter_widget.add_mesh(sphere, color=color, name=star['name'])
-                self.stars_actors.append(actor)
-                
-                # 添加标签
-                text_actor = self.plotter_widget.add_text(star['name'], position=pos, font_size=8, color=color, name=f'star_label_{star['name']}')
-                self.star_labels.append(text_actor)
-            
-            # 连接恒星形成星座轮廓
-            if len(star_positions) > 1:
-                # 检查是否有预设的连线数据
-                connections = constellation_connections.get(constellation_name, [])
-                
-                if connections:
-                    # 使用预设的连线数据
-                    all_lines = []
-                    for connection in connections:
-                        if len(connection) == 2:
-                            idx1, idx2 = connection
-                            if 0 <= idx1 < len(star_positions) and 0 <= idx2 < len(star_positions):
-                                # 添加线段
-                                all_lines.extend([2, idx1, idx2])
-                    
-                    if all_lines:
-                        # 创建折线
-                        poly_data = pv.PolyData(star_positions)
-                        poly_data.lines = all_lines
-                        actor = self.plotter_widget.add_mesh(poly_data, color=color, line_width=2, name=f"{constellation_name}_line")
-                        self.constellation_lines.append(actor)
-                        print(f"使用预设连线数据绘制 {constellation_name} 星座")
-                else:
-                    # 默认连接所有恒星
-                    poly_data = pv.PolyData(star_positions)
-                    lines = [len(star_positions)] + list(range(len(star_positions)))
-                    poly_data.lines = lines
-                    actor = self.plotter_widget.add_mesh(poly_data, color=color, line_width=2, name=f"{constellation_name}_line")
-                    self.constellation_lines.append(actor)
-            
-            print(f"加载星座: {constellation_name}, 恒星数量: {len(stars)}")
+    n_frames = int((end_time - start_time).total_seconds() // step_seconds) + 1
+    frames = [(i, start_time + datetime.timedelta(seconds=i * step_seconds)) for i in range(n_frames)]
+    
+    workers = workers or os.cpu_count() or 1
+    # 每个进程分到几段，便于负载均衡
+    n_chunks = min(n_frames, workers * 4)
+    chunks = [frames[i * n_frames // n_chunks:(i + 1) * n_frames // n_chunks] for i in range(n_chunks)]
+    
+    print(f"离屏渲染 {n_frames} 帧到 {output_dir}，进程数: {workers}")
+    start = time.perf_counter()
+    done = 0
+    # OpenGL上下文不能跨fork复制，使用spawn启动渲染进程
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_offscreen_worker,
+                             initargs=(window_size, star_catalog_path, step_seconds, max_texture_size,
+                                       satellite_path, station_path, start_time)) as pool:
+        for count in pool.map(_render_offscreen_frames, [output_dir] * len(chunks), chunks):
+            done += count
+            print(f"已渲染 {done}/{n_frames} 帧")
+    print(f"离屏渲染完成，用时 {time.perf_counter() - start:.1f} 秒")
+
+def parse_utc_time(text):
+    """解析ISO格式的时间字符串，未指定时区时按UTC处理"""
+    when = datetime.datetime.fromisoformat(text)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=utc)
+    return when
 
 if __name__ == "__main__":
-    # 创建应用程序
-    app = QApplication(sys.argv)
+    import argparse
+    parser = argparse.ArgumentParser(description="地球自转与日月行星位置仿真")
+    parser.add_argument('--star-catalog', help="二进制分块星表文件（.npy）")
+    parser.add_argument('--satellites', help="卫星轨道根数文件：TLE（两行或三行格式）或OMM（.csv、.xml）")
+    parser.add_argument('--stations', help="地面站CSV文件，每行为 名称,纬度,经度[,海拔米]")
+    parser.add_argument('--passes', metavar='CSV',
+                        help="不显示窗口，预报--satellites中的卫星经过--stations地面站的过境并写入CSV")
+    parser.add_argument('--min-elevation', type=float, default=PASS_MIN_ELEVATION_DEG,
+                        help=f"过境预报的最低仰角（度），默认{PASS_MIN_ELEVATION_DEG}")
+    parser.add_argument('--convert-star-catalog', nargs=2, metavar=('CSV', 'NPY'),
+                        help="把CSV星表（Hipparcos、Yale BSC等）转换为二进制分块星表后退出")
+    parser.add_argument('--export-frames', metavar='DIR',
+                        help="不显示窗口，离屏渲染时间序列并把编号的PNG帧写入DIR")
+    parser.add_argument('--start', help="导出或过境预报的起始时间（ISO格式，默认UTC），默认为当前时间")
+    parser.add_argument('--end', help=f"导出或过境预报的结束时间（ISO格式，默认UTC），默认为起始时间后1天（过境预报为{PASS_PREDICTION_DAYS}天）")
+    parser.add_argument('--step', type=float, default=3600, help="导出的帧间隔（秒），默认3600")
+    parser.add_argument('--workers', type=int, help="导出或过境预报使用的进程数，默认为CPU核数")
+    parser.add_argument('--size', default='1920x1080', help="导出图片的尺寸，默认1920x1080")
+    parser.add_argument('--views', type=lambda text: [frame.strip() for frame in text.split(',') if frame.strip()], default=[],
+                        help=f"启动时打开的附加视图，逗号分隔：{','.join(SCENE_VIEW_FRAMES)}")
+    parser.add_argument('--max-texture-size', type=int,
+                        help="纹理的最大边长（像素），显存较小的机器可设为4096或2048，默认只受GPU限制")
+    args, qt_args = parser.parse_known_args()
+    
+    unknown_views = [frame for frame in args.views if frame not in SCENE_VIEW_FRAMES]
+    if unknown_views:
+        parser.error(f"未知的视图: {', '.join(unknown_views)}")
     
-    # 创建主窗口
-    window = SatelliteOrbitApp()
+    if args.convert_star_catalog:
+        convert_star_catalog(*args.convert_star_catalog)
+        sys.exit(0)
+    
+    if args.passes:
+        if not args.satellites or not args.stations:
+            parser.error("--passes 需要同时指定 --satellites 和 --stations")
+        start_time = parse_utc_time(args.start) if args.start else datetime.datetime.now(datetime.timezone.utc)
+        end_time = parse_utc_time(args.end) if args.end else start_time + datetime.timedelta(days=PASS_PREDICTION_DAYS)
+        passes = predict_passes(args.satellites, load_ground_stations(args.stations), start_time, end_time,
+                                min_elevation_deg=args.min_elevation, workers=args.workers)
+        write_passes_csv(passes, args.passes)
+        print(f"过境预报已写入 {args.passes}")
+        sys.exit(0)
+    
+    if args.export_frames:
+        start_time = parse_utc_time(args.start) if args.start else datetime.datetime.now(datetime.timezone.utc)
+        end_time = parse_utc_time(args.end) if args.end else start_time + datetime.timedelta(days=1)
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        render_time_lapse(args.export_frames, start_time, end_time, args.step, workers=args.workers,
+                          window_size=(width, height), star_catalog_path=args.star_catalog,
+                          max_texture_size=args.max_texture_size, satellite_path=args.satellites,
+                          station_path=args.stations)
+        sys.exit(0)
+    
+    # 创建应用程序
+    app = QApplication(sys.argv[:1] + qt_args)
     
-    # 显示主窗口
-    window.show()
+    # 创建并显示主窗口，场景在事件循环开始后分阶段加载
+    with startup_profiler.stage('create window'):
+        window = SatelliteOrbitApp(star_catalog_path=args.star_catalog, max_texture_size=args.max_texture_size,
+                                   satellite_path=args.satellites, station_path=args.stations, views=args.views)
+        window.show()
     
     # 运行应用程序
     sys.exit(app.exec_())